@@ -3,7 +3,7 @@ from .genius import GeniusAccessor
 from .metadata import GeniusMetadata
 from .io import odbc
 from .io.text import get_output_template, SheetsAPI
-from .lib import CleaningGuide, SupplementGuide, RedistributionGuide
+from .lib import CleaningGuide, SupplementGuide, RedistributionGuide, SupplementIndex
 from .util import (
     transmutation,
     nullable,
@@ -31,6 +31,7 @@ __all__ = [
     "CleaningGuide",
     "SupplementGuide",
     "RedistributionGuide",
+    "SupplementIndex",
     "ZeroNumeric",
     "transmutation",
     "nullable",
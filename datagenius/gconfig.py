@@ -1,6 +1,9 @@
+import hashlib
 import os
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Any, Union, Tuple
+from typing import Dict, List, Any, Union, Tuple, FrozenSet, Pattern
 import string
 
 import yaml
@@ -8,6 +11,21 @@ import yaml
 mod_path = Path(__file__).parent
 
 
+@lru_cache(maxsize=4096)
+def _match_start(pattern: str, words: Tuple[str, ...]) -> bool:
+    """
+    Checks whether a regex pattern matches the start of any of the passed words.
+    -
+    Args:
+        pattern (str): A regex pattern.
+        words (Tuple[str, ...]): A tuple of words.
+    -
+    Returns:
+        bool: True if pattern matches the start of any of words.
+    """
+    return any(map(re.compile(pattern).match, words))
+
+
 class Patterns:
     def __init__(self) -> None:
         """
@@ -23,6 +41,7 @@ class Patterns:
         self._suffixes = raw.get("suffixes", [])
         self._invalid_words = raw.get("invalid_words", [])
         self._invalid_chars = self._get_invalid_chars()
+        self._compile()
 
     @property
     def compound_fnames(self) -> List[str]:
@@ -92,6 +111,182 @@ class Patterns:
         """
         return self._invalid_words
 
+    @property
+    def compound_fname_res(self) -> List[Pattern]:
+        """
+        Returns:
+            List[Pattern]: A compiled regex for each of compound_fnames, in
+                order.
+        """
+        return self._compound_fname_res
+
+    @property
+    def lname_particle_re(self) -> Pattern:
+        """
+        Returns:
+            Pattern: A regex matching any of lname_particles.
+        """
+        return self._lname_particle_re
+
+    @property
+    def camelcase_res(self) -> List[Pattern]:
+        """
+        Returns:
+            List[Pattern]: A compiled regex for each of camelcase_particles, in
+                order, matching the particle followed by the lowercase letter
+                that should be capitalized.
+        """
+        return self._camelcase_res
+
+    @property
+    def ampersand_set(self) -> FrozenSet[str]:
+        """
+        Returns:
+            FrozenSet[str]: The ampersands, for fast membership checks.
+        """
+        return self._ampersand_set
+
+    @property
+    def invalid_word_set(self) -> FrozenSet[str]:
+        """
+        Returns:
+            FrozenSet[str]: The invalid_words, for fast membership checks.
+        """
+        return self._invalid_word_set
+
+    @property
+    def invalid_word_re(self) -> Pattern:
+        """
+        Returns:
+            Pattern: A regex matching any of invalid_words as a whole
+                whitespace-separated word.
+        """
+        return self._invalid_word_re
+
+    @property
+    def prefix_starts(self) -> FrozenSet[str]:
+        """
+        Returns:
+            FrozenSet[str]: Every leading part of every prefix, so that
+                abbreviations like "dr" are recognized as the prefix "dr.".
+        """
+        return self._prefix_starts
+
+    @property
+    def suffix_starts(self) -> FrozenSet[str]:
+        """
+        Returns:
+            FrozenSet[str]: Every leading part of every suffix. See prefix_starts.
+        """
+        return self._suffix_starts
+
+    def match_affix(self, s: str, kind: str) -> bool:
+        """
+        Checks whether s, read as a regex, matches the start of any of the
+        prefixes or suffixes. Strings without regex special characters are
+        looked up in prefix_starts/suffix_starts rather than compiled.
+        -
+        Args:
+            s (str): The string to check.
+            kind (str): Either 'prefix' or 'suffix'.
+        -
+        Returns:
+            bool: True if s matches the start of any affix of that kind.
+        """
+        s = s.lower()
+        prefix = kind == "prefix"
+        if s and re.escape(s) == s:
+            return s in (self._prefix_starts if prefix else self._suffix_starts)
+        return _match_start(s, tuple(self._prefixes if prefix else self._suffixes))
+
+    @property
+    def invalid_chars_table(self) -> Dict[int, None]:
+        """
+        Returns:
+            Dict[int, None]: A str.translate table that deletes invalid_chars.
+        """
+        return self._invalid_chars_table
+
+    @property
+    def version(self) -> str:
+        """
+        Returns:
+            str: A hash of all the pattern lists, including any added from custom
+                pattern files, which changes whenever they do.
+        """
+        return self._version
+
+    def _compile(self) -> None:
+        """
+        Builds the compiled regexes, sets and tables that the name classes use
+        to check strings against the pattern lists, so each check is a single
+        operation instead of a loop over a list.
+        """
+        # Compound fnames and camelcase particles are each checked in turn,
+        # so they are compiled separately rather than combined:
+        self._compound_fname_res = [re.compile(p) for p in self._compound_fnames]
+        self._lname_particle_re = self._combine(self._lname_particles)
+        self._camelcase_res = [
+            re.compile(p + "[a-z]") for p in self._camelcase_particles
+        ]
+        self._ampersand_set = frozenset(self._ampersands)
+        self._invalid_word_set = frozenset(self._invalid_words)
+        self._invalid_word_re = self._combine(
+            [re.escape(w) for w in self._invalid_words], r"(?!\S)", r"(?<!\S)"
+        )
+        self._prefix_starts = self._starts(self._prefixes)
+        self._suffix_starts = self._starts(self._suffixes)
+        self._invalid_chars_table = str.maketrans("", "", "".join(self._invalid_chars))
+        # Pattern lists are deduplicated through sets when updated, so they are
+        # sorted to make the hash independent of their order:
+        lists = (
+            self._compound_fnames,
+            self._lname_particles,
+            self._ampersands,
+            self._camelcase_particles,
+            self._prefixes,
+            self._suffixes,
+            self._invalid_words,
+            self._invalid_chars,
+        )
+        self._version = hashlib.sha1(
+            repr([sorted(x) for x in lists]).encode()
+        ).hexdigest()
+
+    @staticmethod
+    def _combine(patterns: List[str], tail: str = "", head: str = "") -> Pattern:
+        """
+        Combines a list of regex patterns into a single alternation.
+        -
+        Args:
+            patterns (List[str]): A list of regex patterns.
+            tail (str, optional): A regex pattern that must follow whichever of
+                patterns matches. Defaults to "".
+            head (str, optional): A regex pattern that must precede whichever of
+                patterns matches. Defaults to "".
+        -
+        Returns:
+            Pattern: The compiled regex, which never matches if patterns is
+                empty.
+        """
+        if not patterns:
+            return re.compile("(?!)")
+        alternation = "|".join(f"(?:{p})" for p in patterns)
+        return re.compile(f"{head}(?:{alternation}){tail}")
+
+    @staticmethod
+    def _starts(words: List[str]) -> FrozenSet[str]:
+        """
+        Generates every non-empty leading part of each of the passed words.
+        -
+        Args:
+            words (List[str]): A list of words.
+        -
+        Returns:
+            FrozenSet[str]: The leading parts.
+        """
+        return frozenset(w[:i] for w in words for i in range(1, len(w) + 1))
+
     @classmethod
     def _load_patterns(cls) -> Dict[str, List[str]]:
         """
@@ -174,6 +369,7 @@ class Patterns:
             if prop:
                 prop += v
                 setattr(self, f"_{k}", list(set(prop)))
+        self._compile()
 
 
 class GConfig:
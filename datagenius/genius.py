@@ -1,5 +1,7 @@
+import hashlib
 import os
-from typing import Callable
+from concurrent import futures
+from typing import Callable, Tuple
 
 import pandas as pd
 import numpy as np
@@ -25,6 +27,7 @@ class GeniusAccessor:
             df: A pandas DataFrame.
         """
         self.df = df
+        self._factorized = dict()
 
     def preprocess(
         self,
@@ -54,18 +57,39 @@ class GeniusAccessor:
             pp_tms.insert(0, header_func)
         return self.transmute(*pp_tms, metadata=metadata, **options)
 
-    def explore(self, metadata: md.GeniusMetadata = None) -> tuple:
+    def explore(self, metadata: md.GeniusMetadata = None, **options) -> tuple:
         """
         A convenient way to run functions from lib.explore on self.df.
 
         Args:
             metadata: A GeniusMetadata object.
+            **options: Keyword args. See the explore transmutations
+                for details on the arguments they take.
 
         Returns: self.df, and a metadata dictionary describing explore
             results.
 
         """
-        return self.transmute(*TMS["explore"], metadata=metadata)
+        ex_tms = self._align_tms_with_options(TMS["explore"], options)
+        return self.transmute(*ex_tms, metadata=metadata, **options)
+
+    def profile(self, metadata: md.GeniusMetadata = None, **options) -> tuple:
+        """
+        A faster alternative to explore for large DataFrames. Collects
+        the same metadata as explore's default transmutations, plus
+        additional statistics, in a single pass over each column. See
+        lib.explore.profile_columns.
+
+        Args:
+            metadata: A GeniusMetadata object.
+            **options: Keyword args. See the profile transmutations
+                for details on the arguments they take.
+
+        Returns: self.df, and a metadata dictionary describing profile
+            results.
+
+        """
+        return self.transmute(*TMS["profile"], metadata=metadata, **options)
 
     def clean(self, metadata: md.GeniusMetadata = None, **options) -> tuple:
         """
@@ -121,7 +145,8 @@ class GeniusAccessor:
     def _align_tms_with_options(tms: list, options: dict) -> list:
         """
         Takes a list of transmutations and returns only those with all
-        their required args in options.
+        their required args in options. Args with default values are
+        not required.
 
         Args:
             tms: A list of transmutations.
@@ -133,7 +158,9 @@ class GeniusAccessor:
         """
         result = []
         for tm in tms:
-            if None not in u.align_args(tm, options, "df").values():
+            defaults = u.get_arg_defaults(tm)
+            t_kwargs = u.align_args(tm, options, "df")
+            if None not in [v for k, v in t_kwargs.items() if k not in defaults]:
                 result.append(tm)
         return result
 
@@ -159,6 +186,98 @@ class GeniusAccessor:
         self.df = metadata(self.df, *transmutations, **options)
         return self.df, metadata
 
+    def factorize(self, column) -> Tuple[np.ndarray, pd.Index]:
+        """
+        Encodes the values in the passed column as integer codes, so
+        the column can be counted, grouped, or evaluated once per
+        unique value. Results are cached per column and reused until
+        the column's values change, so transmutations in the same
+        pipeline only hash each column once. Unhashable values are
+        factorized via their string representation.
+
+        Args:
+            column: A column label in self.df, or a list of them to
+                encode as one key, e.g. to group by. Rows that are null
+                in any of the columns get a code of -1, as a groupby
+                would drop them.
+
+        Returns: A tuple of a numpy array of codes, one for each row in
+            the column (-1 for nulls), and an Index of the unique values
+            the codes refer to (a MultiIndex for a list of columns).
+
+        """
+        if isinstance(column, list):
+            return self._factorize_key(column)
+        s = self.df[column]
+        values = s.to_numpy(copy=False)
+        fingerprint = self._fingerprint(values)
+        cached = self._factorized.get(column)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[2]
+        try:
+            result = pd.factorize(s)
+        except TypeError:
+            result = pd.factorize(u.stringify_unhashable(s))
+        # Object columns are fingerprinted by the addresses of their
+        # values, so a copy of the column is kept to keep those values
+        # alive and stop their addresses being reused by new values:
+        pin = values.copy() if values.dtype == "O" else None
+        self._factorized[column] = (fingerprint, pin, result)
+        return result
+
+    def _factorize_key(self, columns: list) -> Tuple[np.ndarray, pd.MultiIndex]:
+        """
+        Combines the cached codes of the passed columns into codes for
+        each unique combination of their values.
+
+        Args:
+            columns: A list of column labels in self.df.
+
+        Returns: A tuple of a numpy array of codes, one for each row in
+            self.df (-1 where any of columns is null), and a MultiIndex
+            of the unique combinations the codes refer to.
+
+        """
+        factorized = [self.factorize(c) for c in columns]
+        valid = np.ones(self.df.shape[0], dtype=bool)
+        for c_codes, _ in factorized:
+            valid &= c_codes >= 0
+        key = np.zeros(valid.sum(), dtype=np.int64)
+        for c_codes, c_uniques in factorized:
+            # Re-factorizing after each column keeps key below the
+            # number of rows, so it can't overflow:
+            key = pd.factorize(key * len(c_uniques) + c_codes[valid])[0]
+        codes = np.full(self.df.shape[0], -1, dtype=np.int64)
+        codes[valid] = key
+        # The first row of each combination, found by assigning rows in
+        # reverse so that earlier rows overwrite later ones:
+        first = np.empty(key.max(initial=-1) + 1, dtype=np.int64)
+        rows = np.flatnonzero(valid)
+        first[key[::-1]] = rows[::-1]
+        uniques = pd.MultiIndex.from_arrays(
+            [c_uniques.take(c_codes[first]) for c_codes, c_uniques in factorized],
+            names=columns,
+        )
+        return codes, uniques
+
+    @staticmethod
+    def _fingerprint(values: np.ndarray) -> bytes:
+        """
+        Hashes the raw memory of the passed array, which is much
+        cheaper than hashing its values and changes whenever any of
+        them are changed, in place or otherwise.
+
+        Args:
+            values: A numpy array.
+
+        Returns: A bytes digest of values' dtype and memory.
+
+        """
+        values = np.ascontiguousarray(values)
+        h = hashlib.blake2b(str(values.dtype).encode(), digest_size=16)
+        h.update(memoryview(values) if values.dtype == "O" else values.view(np.uint8))
+        return h.digest()
+
     def supplement(
         self,
         *other,
@@ -166,12 +285,17 @@ class GeniusAccessor:
         select_cols: (str, tuple) = None,
         suffixes: (str, tuple) = None,
         split_results: bool = False,
+        metadata: md.GeniusMetadata = None,
+        cache: str = None,
+        staging: str = None,
+        workers: int = None,
     ) -> (pd.DataFrame, tuple):
         """
 
         Args:
             *other: An arbitrary list of DataFrames to supplement
-                self.df with.
+                self.df with. SupplementIndexes of DataFrames can be
+                passed instead, see lib.supplement.SupplementIndex.
             on: A str or list of column names, tuples of column
                 names and dictionary conditions, or SupplementGuide
                 objects. All columns referenced must be in self.df
@@ -191,57 +315,300 @@ class GeniusAccessor:
                 from the other DataFrames. Otherwise, will return a
                 single DataFrame containing all the rows in the primary
                 frame with the successfully matched rows joined onto it.
+                The columns joined onto matched rows keep the dtypes
+                they had in the other frames where their values allow.
+            metadata: A GeniusMetadata object. If passed, the number of
+                pairs of rows compared by each inexact match is
+                collected, along with the number of pairs there would
+                be without blocking.
+            cache: The path to a directory. If passed, the matches
+                found for each row are stored there, and later calls
+                with the same other DataFrames and arguments only match
+                the rows whose on values weren't seen before. See
+                lib.supplement.SupplementCache.
+            staging: The path to a directory. If passed, the other
+                DataFrames are staged into a temporary sqlite database
+                there and matched in SQL, so they don't need to fit in
+                memory, and can be passed as iterables of DataFrame
+                chunks instead. See lib.supplement.SupplementStage.
+            workers: An integer. If passed, the chunks of the plan are
+                supplemented in a pool of that many processes, or if
+                there's only one chunk, its inexact matches are scored
+                in one. See lib.supplement.match_inexact.
 
         Returns: A single supplemented DataFrame or tuple of a
             supplemented DataFrame and unmatched rows from the primary
             DataFrame, depending on whether split_results is True.
 
         """
-        frames = [self.df, *other]
         ons = lib.supplement.prep_ons(on)
-        chunks, remainder = lib.supplement.chunk_dframes(
-            lib.supplement.build_plan(ons), *frames
-        )
+        plan = lib.supplement.build_plan(ons)
+        if cache is not None:
+            matched, unmatched = self._supplement_cached(
+                plan,
+                other,
+                on,
+                select_cols,
+                suffixes,
+                metadata,
+                cache,
+                staging,
+                workers,
+            )
+            if split_results:
+                return matched, unmatched
+            return pd.concat([matched, unmatched])
+        # SupplementIndexes are shared between calls, so rather than
+        # being chunked their rows in each chunk are looked up:
+        indexes = {
+            i: lib.supplement.plan_rows(plan, o.df)
+            for i, o in enumerate(other)
+            if isinstance(o, lib.supplement.SupplementIndex)
+        }
+        staged = None
+        if staging is not None:
+            staged = lib.supplement.SupplementStage(
+                staging,
+                plan,
+                self.df,
+                {i: o for i, o in enumerate(other) if i not in indexes},
+            )
+        try:
+            return self._supplement_chunks(
+                plan,
+                other,
+                indexes,
+                staged,
+                select_cols,
+                suffixes,
+                split_results,
+                metadata,
+                workers,
+            )
+        finally:
+            if staged is not None:
+                staged.close()
+
+    def _supplement_chunks(
+        self,
+        plan: tuple,
+        other: tuple,
+        indexes: dict,
+        staged: lib.supplement.SupplementStage,
+        select_cols: (str, tuple),
+        suffixes: (str, tuple),
+        split_results: bool,
+        metadata: md.GeniusMetadata,
+        workers: int = None,
+    ) -> (pd.DataFrame, tuple):
+        """
+        Supplements self.df one chunk of the plan at a time. See
+        supplement.
+
+        Args:
+            plan: A tuple of SupplementGuide objects created by
+                lib.supplement.build_plan.
+            other: See supplement.
+            indexes: A dictionary of the positions in other of
+                SupplementIndexes, and their plan_rows.
+            staged: A SupplementStage of the rest of other, or None if
+                they're in memory.
+            select_cols: See supplement.
+            suffixes: See supplement.
+            split_results: See supplement.
+            metadata: See supplement.
+            workers: See supplement.
+
+        Returns: See supplement.
+
+        """
+        in_memory = [] if staged else [i for i in range(len(other)) if i not in indexes]
+        frames = [self.df, *[other[i] for i in in_memory]]
+        chunks, remainder = lib.supplement.chunk_dframes(plan, *frames)
+        if staged is not None:
+            p_rows = lib.supplement.plan_rows(plan, self.df)
         suffixes = lib.supplement.prep_suffixes(suffixes, len(other))
         select_cols = u.tuplify(select_cols)
-        results = []
-        p_cols = set(frames[0].columns)
-        for sg in chunks:
-            p_frame = sg.chunks[0]
-            o_frames = sg.chunks[1:]
-            for i, other in enumerate(o_frames):
-                rsuffix = suffixes[i]
-                if not other.empty:
-                    o_cols = set(other.columns)
-                    other["merged_on"] = ",".join(sg.on)
-                    other = (
-                        other[
-                            {
-                                *sg.on,
-                                *o_cols.intersection(set(select_cols)),
-                                "merged_on",
-                            }
-                        ]
-                        if select_cols
-                        else other
+        tasks = []
+        for k, sg in enumerate(chunks):
+            o_frames = iter(sg.chunks[1:])
+            others = []
+            for i, other_frame in enumerate(other):
+                rows = matches = None
+                if i in indexes:
+                    rows = indexes[i][k]
+                    o_size = rows.shape[0]
+                    o_cols = other_frame.df.columns
+                elif staged is not None:
+                    o_size = staged.size(i, k)
+                    o_cols = staged.columns(i)
+                else:
+                    other_frame = next(o_frames)
+                    o_size = other_frame.shape[0]
+                    o_cols = other_frame.columns
+                if o_size == 0:
+                    continue
+                if select_cols:
+                    o_cols = [c for c in o_cols if c in sg.on or c in select_cols]
+                # Staged frames are matched in SQL before any chunks
+                # are handed to worker processes:
+                if staged is not None and i not in indexes:
+                    pos1, pos2, scores = staged.match(i, k, sg)
+                    other_frame, pos2 = staged.fetch(i, pos2)
+                    matches = (np.searchsorted(p_rows[k], pos1), pos2, scores)
+                others.append(
+                    dict(
+                        frame=other_frame,
+                        rows=rows,
+                        columns=list(o_cols),
+                        rsuffix=suffixes[i],
+                        size=o_size,
+                        matches=matches,
                     )
-                    if sg.inexact:
-                        p_frame = lib.supplement.do_inexact(
-                            p_frame, other, sg.on, sg.thresholds, sg.block, rsuffix
-                        )
-                    else:
-                        p_frame = lib.supplement.do_exact(
-                            p_frame, other, sg.on, rsuffix
-                        )
-            results.append(p_frame)
-        result_df = pd.concat(results)
-        unmatched = result_df[result_df["merged_on"].isna()]
-        matched = result_df[~result_df["merged_on"].isna()]
-        unmatched = pd.concat([unmatched[p_cols], remainder])
+                )
+            tasks.append((sg.chunks[0], sg, others))
+        if workers is not None and workers > 1 and len(tasks) > 1:
+            with futures.ProcessPoolExecutor(workers) as pool:
+                jobs = [pool.submit(lib.supplement.supplement_chunk, *t) for t in tasks]
+                results = [j.result() for j in jobs]
+        else:
+            results = [
+                lib.supplement.supplement_chunk(*t, workers=workers) for t in tasks
+            ]
+        matched, unmatched = [], []
+        p_cols = list(frames[0].columns)
+        for (result, pair_cts), (_, _, others) in zip(results, tasks):
+            if metadata is not None and pair_cts:
+                metadata.collect(
+                    pd.DataFrame(pair_cts), "find_candidates", "supplement"
+                )
+            if others:
+                is_matched = result["merged_on"].notna()
+                matched.append(result[is_matched])
+                unmatched.append(result.loc[~is_matched, p_cols])
+            else:
+                matched.append(result.iloc[:0])
+                unmatched.append(result)
+        unmatched.append(remainder)
+        o_dtypes = []
+        for i, o in enumerate(other):
+            if i in indexes:
+                o_dtypes.append(o.df.dtypes)
+            elif staged is not None:
+                o_dtypes.append(staged.dtypes(i))
+            else:
+                o_dtypes.append(o.dtypes)
+        # Chunks with unmatched rows upcast the joined columns, so they
+        # are cast back to keep matched rows' dtypes independent of them:
+        matched = lib.supplement.restore_dtypes(
+            pd.concat(matched),
+            lib.supplement.source_dtypes(self.df, o_dtypes, suffixes),
+        )
         if split_results:
-            return matched, unmatched
+            return matched, pd.concat(unmatched)
         else:
-            return pd.concat([matched, unmatched])
+            return pd.concat([matched, *unmatched])
+
+    def _supplement_cached(
+        self,
+        plan: tuple,
+        other: tuple,
+        on: (str, list, tuple),
+        select_cols: (str, tuple),
+        suffixes: (str, tuple),
+        metadata: md.GeniusMetadata,
+        cache: str,
+        staging: str = None,
+        workers: int = None,
+    ) -> tuple:
+        """
+        Supplements self.df using results stored in a SupplementCache,
+        only matching the rows it has no results for. See supplement.
+
+        Returns: A tuple of the supplemented DataFrame of matched rows
+            and the unmatched rows from self.df.
+
+        """
+        store = lib.supplement.SupplementCache(cache)
+        hashes = store.row_hashes(plan, self.df)
+        key = store.fingerprint(plan, self.df.columns, other, select_cols, suffixes)
+        matches = store.load(key)
+        new = ~np.isin(hashes, matches["_row_hash"].to_numpy())
+        if metadata is not None:
+            metadata.collect(
+                pd.DataFrame(dict(cached_rows=[(~new).sum()], new_rows=[new.sum()])),
+                "supplement_cache",
+                "supplement",
+            )
+        # Rows with the same hash get the same matches, so only the
+        # first row with each new hash is matched:
+        new &= ~pd.Series(hashes).duplicated().to_numpy()
+        if new.any():
+            fresh = (
+                self.df[new]
+                .reset_index(drop=True)
+                .genius.supplement(
+                    *other,
+                    on=on,
+                    select_cols=select_cols,
+                    suffixes=suffixes,
+                    metadata=metadata,
+                    staging=staging,
+                    workers=workers,
+                )
+            )
+            fresh = fresh.drop(columns=self.df.columns)
+            fresh["_row_hash"] = hashes[new][fresh.index.to_numpy()]
+            matches = pd.concat([matches, fresh], ignore_index=True)
+            store.save(key, matches)
+        matched, unmatched = store.join(plan, self.df, hashes, matches)
+        o_dtypes = [
+            o.df.dtypes if isinstance(o, lib.supplement.SupplementIndex) else o.dtypes
+            for o in other
+        ]
+        suffixes = lib.supplement.prep_suffixes(suffixes, len(other))
+        matched = lib.supplement.restore_dtypes(
+            matched, lib.supplement.source_dtypes(self.df, o_dtypes, suffixes)
+        )
+        return matched, unmatched
+
+    def resolve_entities(
+        self,
+        *other,
+        on: (str, list, tuple),
+        entity_col: str = "entity_id",
+        metadata: md.GeniusMetadata = None,
+        workers: int = None,
+    ) -> tuple:
+        """
+        Links the records in self.df and the other DataFrames that refer
+        to the same entity. See lib.supplement.resolve_entities.
+
+        Args:
+            *other: An arbitrary list of DataFrames.
+            on: See supplement. Each SupplementGuide is a separate
+                rule for linking records.
+            entity_col: The name of the entity id column to add.
+            metadata: A GeniusMetadata object. If passed, the number of
+                records and entities are collected.
+            workers: An integer. If passed, inexact matches are scored
+                in a pool of that many processes.
+
+        Returns: A tuple of self.df and the other DataFrames, each with
+            an entity_col of entity ids shared by linked records.
+
+        """
+        results = lib.supplement.resolve_entities(
+            self.df, *other, on=on, entity_col=entity_col, workers=workers
+        )
+        if metadata is not None:
+            ids = pd.concat([r[entity_col] for r in results])
+            metadata.collect(
+                pd.DataFrame(dict(records=[ids.shape[0]], entities=[ids.nunique()])),
+                "resolve_entities",
+                "supplement",
+            )
+        return results
 
     def apply_strf(
         self, *columns, strf: Callable = None, **col_strf_map
@@ -105,6 +105,53 @@ class ODBConnector:
                 df.to_dict("records", into=col.OrderedDict),
             )
 
+    def new_index(self, table: str, *columns) -> None:
+        """
+        Creates an index on columns of a table in the connected db.
+
+        Args:
+            table: The name of a table in the connected db.
+            *columns: An arbitrary list of column names in the table.
+
+        Returns: None
+        """
+        t = self._tables[table]
+        name = f"ix_{table}_{len(t.indexes)}"
+        sa.Index(name, *[t.c[c] for c in columns]).create(self.engine)
+
+    def execute(self, query: str, **params) -> None:
+        """
+        Runs a SQL statement that doesn't return rows, like an UPDATE or
+        DELETE, against the connected db in its own transaction.
+
+        Args:
+            query: A string of SQL, which can contain :named parameters.
+            **params: Values for the named parameters in query.
+
+        Returns: None
+        """
+        # begin commits on success and rolls back on error, rather than
+        # relying on the driver to autocommit the statement:
+        with self.engine.begin() as conn:
+            conn.execute(sa.text(query), **params)
+
+    def select_chunks(self, query: str, chunksize: int = 50000, **params):
+        """
+        Runs a SQL query against the connected db and streams its
+        results, so that they never need to fit in memory all at once.
+
+        Args:
+            query: A string of SQL, which can contain :named parameters.
+            chunksize: An integer, the number of rows in each chunk.
+            **params: Values for the named parameters in query.
+
+        Returns: A generator of pandas DataFrames.
+        """
+        with self.engine.connect() as conn:
+            yield from pd.read_sql(
+                sa.text(query), conn, params=params, chunksize=chunksize
+            )
+
     def purge(self) -> bool:
         """
         A simple method that deletes the entire db file found at
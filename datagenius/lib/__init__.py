@@ -1,5 +1,6 @@
 from . import preprocess, explore, clean, reformat, supplement
 from .guides import CleaningGuide, SupplementGuide, RedistributionGuide
+from .supplement import SupplementIndex
 
 __all__ = [
     "preprocess",
@@ -11,4 +12,5 @@ __all__ = [
     "CleaningGuide",
     "SupplementGuide",
     "RedistributionGuide",
+    "SupplementIndex",
 ]
@@ -1,10 +1,12 @@
 from typing import Sequence
 
+import numpy as np
 import pandas as pd
 from numpy import nan
 
 import datagenius.util as u
 import datagenius.lib.guides as gd
+import datagenius.lib.supplement as su
 
 
 @u.transmutation(stage="clean", priority=15)
@@ -118,6 +120,48 @@ def reject_on_str_content(df: pd.DataFrame, reject_str_content: dict) -> tuple:
     return df, u.package_rejects_metadata(rejects)
 
 
+@u.transmutation(stage="clean", priority=5)
+def deduplicate(df: pd.DataFrame, dedupe_on: (str, list, tuple)) -> tuple:
+    """
+    Rejects the rows in a DataFrame that duplicate an earlier row. Takes
+    the same on values as GeniusAccessor.supplement, so duplicates can
+    be exact, or inexact within blocks using SupplementGuides, and a
+    SupplementGuide's conditions limit it to the rows that meet them.
+    Rows not covered by any of the on values are kept.
+
+    Args:
+        df: A DataFrame.
+        dedupe_on: A str or list of column names, tuples of column
+            names and dictionary conditions, or SupplementGuide
+            objects.
+
+    Returns: The DataFrame, with only the first row of each cluster of
+        duplicates, and a metadata dictionary. The rejects have a
+        cluster_id column, the index of the row they duplicate in the
+        returned DataFrame.
+
+    """
+    plan = su.build_plan(su.prep_ons(dedupe_on))
+    ids = su.plan_ids(plan, df)
+    # Rows start in their own clusters, and each guide's clusters are
+    # offset past the labels already used:
+    labels = np.arange(df.shape[0])
+    offset = df.shape[0]
+    for i, sg in enumerate(plan):
+        rows = np.flatnonzero(ids == i)
+        guide_labels = su.find_duplicates(df, sg, rows)
+        labels[rows] = guide_labels + offset
+        offset += guide_labels.max(initial=-1) + 1
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    dupes = first[inverse] != np.arange(df.shape[0])
+    kept_idx = np.cumsum(~dupes) - 1
+    rejects = df[dupes]
+    df = df[~dupes].reset_index(drop=True)
+    result = u.package_rejects_metadata(rejects)
+    result["rejects"] = rejects.assign(cluster_id=kept_idx[first[inverse][dupes]])
+    return df, result
+
+
 @u.transmutation(stage="clean", priority=9)
 def cleanse_redundancies(df: pd.DataFrame, redundancy_map: dict) -> tuple:
     """
@@ -171,11 +215,26 @@ def cleanse_typos(df: pd.DataFrame, cleaning_guides: dict):
         cleaning_guides[k] = gd.CleaningGuide.convert(v)
 
     for k, cl_guide in cleaning_guides.items():
-        new = df[k].apply(cl_guide)
-        # nan != nan always evaluates to True, so need to subtract the
-        # number of nans from the differing values:
-        results[k] = (df[k] != new).sum() - df[k].isna().sum()
-        df[k] = new
+        # Each unique value only needs to be checked against the guide
+        # once:
+        codes, uniques = df.genius.factorize(k)
+        uniques = np.asarray(uniques, dtype=object)
+        corrected = np.empty(len(uniques), dtype=object)
+        corrected[:] = [cl_guide(x) for x in uniques]
+        changed = [c is not x and c != x for c, x in zip(corrected, uniques)]
+        # Null values have a code of -1, which maps to the trailing False:
+        rows = np.array(changed + [False])[codes]
+        new = df[k].to_numpy(dtype=object, copy=True)
+        new[rows] = corrected[codes[rows]]
+        # Nulls share no code, but a guide can still map them to a value,
+        # so each one is checked on its own. The metadata only counts
+        # non-null values that were changed:
+        nulls = codes == -1
+        null_values = np.empty(nulls.sum(), dtype=object)
+        null_values[:] = [cl_guide(x) for x in new[nulls]]
+        new[nulls] = null_values
+        results[k] = rows.sum()
+        df[k] = pd.Series(new, index=df.index).infer_objects()
 
     return df, {"metadata": results}
 
@@ -275,17 +334,29 @@ def accrete(
 
     """
     accretion_cols = u.tuplify(accretion_cols)
+    accrete_group_by = list(u.tuplify(accrete_group_by))
     md = u.gen_empty_md_df(df.columns)
     for c in accretion_cols:
         df[c] = df[c].fillna("")
         df[c] = df[c].astype(str)
-        result = df.groupby(accrete_group_by)[c].apply(accretion_sep.join).reset_index()
-        df = df.merge(result, on=accrete_group_by, suffixes=("", "_x"))
-        cx = c + "_x"
-        md[c] = (df[c] != df[cx]).sum()
-        df[c] = df[cx]
-        df.drop(columns=cx, inplace=True)
-        df[c] = df[c].str.strip()
+        # The groups come from the factorize cache, so accrete_group_by
+        # is only hashed again if c is one of its columns:
+        groups, _ = df.genius.factorize(accrete_group_by)
+        # Rows with a null in accrete_group_by belong to no group and are
+        # dropped, and the rest are gathered into their groups in the
+        # order each group first appears, as an inner merge would:
+        if (
+            (groups < 0).any()
+            or (np.diff(groups) < 0).any()
+            or not df.index.equals(pd.RangeIndex(df.shape[0]))
+        ):
+            rows = np.flatnonzero(groups >= 0)
+            rows = rows[np.argsort(groups[rows], kind="stable")]
+            df = df.take(rows).reset_index(drop=True)
+            groups = groups[rows]
+        result = df[c].groupby(groups).agg(accretion_sep.join).to_numpy()[groups]
+        md[c] = (df[c] != result).sum()
+        df[c] = pd.Series(result, index=df.index, dtype=object).str.strip()
         df[c] = df[c].apply(
             lambda x: x if len(x) > 0 and x[-1] != accretion_sep else x[:-1]
         )
@@ -1,6 +1,12 @@
+import string
+from typing import Iterable
+
+import numpy as np
 import pandas as pd
+from numpy import nan
 
 import datagenius.util as u
+import datagenius.sketches as sk
 
 
 @u.transmutation(stage="explore")
@@ -19,24 +25,30 @@ def count_values(df: pd.DataFrame):
 
 
 @u.transmutation(stage="explore")
-def count_uniques(df: pd.DataFrame):
+def count_uniques(df: pd.DataFrame, uniques_error: float = None):
     """
     Counts the unique values in each column in the passed DataFrame.
     Null values are not counted.
 
     Args:
         df: A DataFrame.
+        uniques_error: A float. If passed, unique values are estimated
+            with a HyperLogLog sketch with at most this standard error
+            (e.g. 0.01 for 1%) instead of being counted exactly. Use
+            this on very large columns to count in constant memory.
 
     Returns: The DataFrame, and a metadata dictionary.
 
     """
     md = u.gen_empty_md_df(df.columns)
-    # This loop avoids using nunique on raw data, which can cause
-    # errors if the data contains unexpected data types like lists.
-    # Using gconvert to convert to string before counting uniques
-    # prevents errors.
     for c in df.columns:
-        md[c] = df[c].apply(u.gconvert, target_type=str).nunique()
+        if uniques_error is not None:
+            hll = sk.HyperLogLog(uniques_error)
+            hll.update(df[c])
+            md[c] = len(hll)
+        else:
+            _, uniques = df.genius.factorize(c)
+            md[c] = len(uniques)
     return df, {"metadata": md}
 
 
@@ -67,19 +79,262 @@ def collect_data_types(df: pd.DataFrame):
     Returns: The DataFrame, and a metadata dictionary.
 
     """
-    dtypes = df.applymap(u.get_class_name)
-    orig_cols = list(dtypes.columns)
-    dtypes["ctr"] = 1
     result = u.gen_empty_md_df(df.columns)
-    for c in orig_cols:
-        c_pcts = (dtypes.groupby([c]).sum() / dtypes[c].count()).round(2)
-        c_pcts = c_pcts.reset_index()
-        result[c] = ",".join(
-            c_pcts.apply(lambda s: f"{s[c]}({s.ctr})", axis=1).tolist()
-        )
+    for c in df.columns:
+        if df[c].dtype == "O":
+            # Equal values of different types (1 and 1.0) share a code
+            # when factorized, so object columns are typed per value:
+            nulls = df[c].isna()
+            types = df[c][~nulls].map(type).value_counts()
+            types.index = types.index.map(u.get_type_name)
+            null_ct = nulls.sum()
+        else:
+            codes, uniques = df.genius.factorize(c)
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            names = pd.Index(uniques, dtype=object).map(u.get_class_name)
+            types = pd.Series(counts, index=names)
+            null_ct = (codes == -1).sum()
+        if null_ct > 0:
+            types["nan"] = null_ct
+        types = (types.groupby(level=0).sum() / df.shape[0]).round(2)
+        result[c] = ",".join([f"{t}({pct})" for t, pct in types.items()])
+    return df, {"metadata": result}
+
+
+# Maps each character to its class, e.g. "02134-1234" -> "99999-9999":
+_SHAPE_TABLE = str.maketrans(
+    "0123456789" + string.ascii_letters, "9" * 10 + "A" * len(string.ascii_letters)
+)
+
+
+@u.transmutation(stage="explore")
+def collect_value_shapes(df: pd.DataFrame, top_shapes: int):
+    """
+    Masks the values in the passed DataFrame's columns into shapes, with
+    digits replaced by 9 and letters replaced by A (so that the SKU
+    "ABC-123" has the shape "AAA-999"), and assembles a string of the
+    most common shapes in each column with the percent of non-null
+    values that shape represents. Each unique value is only masked once,
+    so this scales with the number of unique values in a column rather
+    than its length.
+
+    Args:
+        df: A DataFrame.
+        top_shapes: An integer, the number of most common shapes to
+            report for each column.
+
+    Returns: The DataFrame, and a metadata dictionary.
+
+    """
+    result = u.gen_empty_md_df(df.columns)
+    for c in df.columns:
+        codes, uniques = df.genius.factorize(c)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        shapes = pd.Index(uniques.astype(str)).str.translate(_SHAPE_TABLE)
+        shapes = pd.Series(counts, index=shapes).groupby(level=0).sum()
+        shapes = shapes.sort_values(ascending=False, kind="stable")[:top_shapes]
+        shapes = (shapes / max(counts.sum(), 1)).round(2)
+        result[c] = ",".join([f"{s}({pct})" for s, pct in shapes.items()])
     return df, {"metadata": result}
 
 
+# The fewest of a column's groups that discover_dependencies will
+# screen dependencies on before it samples rows instead:
+_MIN_GROUPS = 100
+
+
+@u.transmutation(stage="explore")
+def discover_dependencies(
+    df: pd.DataFrame, dependency_threshold: float, dependency_sample: int = 10000
+):
+    """
+    Finds columns whose values (approximately) determine the values of
+    other columns, and ranks the columns that would make good clusters
+    for id_clustering_violations and complete_clusters. A column A
+    determines a column B if every row sharing a value of A also shares
+    a value of B. The strength of the dependency is the share of rows
+    (with a value in A) that would not need to change for A to exactly
+    determine B, i.e. whose B is the most common B for their A.
+
+    A cluster key is a column whose values repeat and that determines
+    at least one other column, where at least one other column never
+    repeats within its clusters. Keys are ranked by how many columns
+    they determine or keep unique, with larger clusters breaking ties.
+
+    Args:
+        df: A DataFrame.
+        dependency_threshold: A float between 0 and 1, the minimum
+            strength of a dependency to report. Use 1 to only find
+            exact dependencies.
+        dependency_sample: An integer. Column pairs are screened on a
+            random sample of about this many rows, and only the pairs
+            that pass are checked on the full DataFrame. Exact
+            dependencies always pass, but approximate ones close to the
+            threshold may be missed. Pass None to check every pair on
+            the full DataFrame.
+
+    Returns: The DataFrame, and a metadata dictionary with three rows:
+        functional_dependencies, with the columns each column determines
+        and the strength of each dependency, strongest first;
+        cluster_key_ranks, with the rank of each candidate cluster key;
+        and cluster_unique_cols, with the columns that are unique within
+        each candidate cluster key's clusters.
+
+    """
+    codes = {c: df.genius.factorize(c) for c in df.columns}
+    n_uniques = {c: len(uniques) for c, (_, uniques) in codes.items()}
+    codes = {c: c_codes for c, (c_codes, _) in codes.items()}
+    # Constant columns are trivially determined by everything, and
+    # columns that never repeat trivially determine everything:
+    dependents = [c for c in df.columns if n_uniques[c] + (codes[c] < 0).any() > 1]
+    determinants = [c for c in dependents if n_uniques[c] < (codes[c] >= 0).sum()]
+    sample_rate = None
+    rng = np.random.default_rng(0)
+    if dependency_sample is not None and df.shape[0] > dependency_sample:
+        sample_rate = dependency_sample / df.shape[0]
+        row_sample = np.sort(rng.choice(df.shape[0], dependency_sample, replace=False))
+    deps = u.gen_empty_md_df(df.columns, nan).astype(object)
+    ranks = u.gen_empty_md_df(df.columns, nan)
+    uniques = u.gen_empty_md_df(df.columns, nan).astype(object)
+    scores = dict()
+    for a in determinants:
+        strengths = dict()
+        unique_within = []
+        if sample_rate is not None and n_uniques[a] * sample_rate >= _MIN_GROUPS:
+            # Sampling whole groups of a's values rather than rows keeps
+            # the groups intact, so the sample's strengths are unbiased
+            # and exact dependencies and unique columns always pass:
+            sampled = rng.random(n_uniques[a]) < sample_rate
+            sample = np.flatnonzero(sampled[codes[a]] & (codes[a] >= 0))
+        elif sample_rate is not None:
+            # Too few of a's groups would be sampled to be representative,
+            # possibly none, so rows are sampled instead. Any rows of an
+            # exact dependency are still exact, so those always pass:
+            sample = row_sample[codes[a][row_sample] >= 0]
+        maybe_unique = []
+        for b in dependents:
+            if a == b:
+                continue
+            if sample_rate is not None:
+                strength, unique = _dependency_stats(
+                    codes[a][sample], codes[b][sample], n_uniques[b]
+                )
+                if strength < dependency_threshold:
+                    if unique:
+                        maybe_unique.append(b)
+                    continue
+            strength, unique = _dependency_stats(codes[a], codes[b], n_uniques[b])
+            if strength >= dependency_threshold:
+                strengths[b] = strength
+            if unique:
+                unique_within.append(b)
+        # Unique columns only matter for cluster keys, which must also
+        # determine other columns:
+        if strengths:
+            for b in maybe_unique:
+                if _dependency_stats(codes[a], codes[b], n_uniques[b])[1]:
+                    unique_within.append(b)
+        if strengths:
+            strengths = sorted(strengths.items(), key=lambda x: -x[1])
+            deps[a] = ",".join([f"{b}({round(st, 2)})" for b, st in strengths])
+        if strengths and unique_within:
+            uniques[a] = ",".join(unique_within)
+            scores[a] = (-len(strengths) - len(unique_within), n_uniques[a])
+    for i, a in enumerate(sorted(scores, key=scores.get)):
+        ranks[a] = i + 1
+    md = pd.concat([deps, ranks.astype(object), uniques], ignore_index=True)
+    md["transmutation"] = [
+        "functional_dependencies",
+        "cluster_key_ranks",
+        "cluster_unique_cols",
+    ]
+    return df, {"metadata": md}
+
+
+def _dependency_stats(a: np.ndarray, b: np.ndarray, b_uniques: int) -> tuple:
+    """
+    Measures how strongly the factorized column a determines the
+    factorized column b.
+
+    Args:
+        a: A numpy array of factorize codes.
+        b: A numpy array of factorize codes.
+        b_uniques: The number of unique values b's codes refer to.
+
+    Returns: A tuple containing the share of rows with a value in a
+        whose b matches the most common b in their group (1.0 if a
+        exactly determines b), and a boolean indicating whether b's
+        values never repeat within a's groups.
+
+    """
+    has_a = a >= 0
+    a, b = a[has_a], b[has_a]
+    if a.shape[0] == 0:
+        return 0.0, False
+    # Each (a, b) pair gets its own integer, with nulls in b as 0, so
+    # sorting the pairs lines up each of a's groups:
+    pairs, pair_cts = np.unique(
+        a.astype(np.int64) * (b_uniques + 1) + b + 1, return_counts=True
+    )
+    groups = pairs // (b_uniques + 1)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    strength = np.maximum.reduceat(pair_cts, starts).sum() / a.shape[0]
+    has_b = pairs % (b_uniques + 1) != 0
+    unique = bool(has_b.any()) and bool((pair_cts[has_b] == 1).all())
+    return strength, unique
+
+
+@u.transmutation(stage="profile")
+def profile_columns(
+    df: pd.DataFrame, profile_top_k: int = 5, uniques_error: float = 0.01
+):
+    """
+    Collects the same metadata as the explore transmutations
+    count_values, count_uniques, count_nulls, and collect_data_types,
+    as well as the most frequent values in each column and the min/max
+    of each column's values and their lengths, all in a single pass
+    over each column. Unique counts are estimated with a HyperLogLog.
+
+    Args:
+        df: A DataFrame.
+        profile_top_k: An integer, the number of most frequent values
+            to report for each column.
+        uniques_error: A float, the standard error of the unique value
+            estimates. None uses the default of 0.01.
+
+    Returns: The DataFrame, and a metadata dictionary.
+
+    """
+    profile = sk.FrameProfile(profile_top_k, uniques_error)
+    profile.update(df)
+    return df, {"metadata": profile.to_metadata()}
+
+
+def profile_chunks(
+    chunks: Iterable[pd.DataFrame], profile_top_k: int = 5, uniques_error: float = 0.01
+) -> sk.FrameProfile:
+    """
+    Profiles a dataset one chunk at a time, so that datasets too large
+    to fit in memory can be profiled. For example, pass the result of
+    pd.read_csv with a chunksize.
+
+    Args:
+        chunks: An iterable of DataFrames with the same columns.
+        profile_top_k: An integer, the number of most frequent values
+            to report for each column.
+        uniques_error: A float, the standard error of the unique value
+            estimates. None uses the default of 0.01.
+
+    Returns: A FrameProfile of the entire dataset. Use its to_metadata
+        method to get the same metadata profile_columns collects.
+
+    """
+    profile = sk.FrameProfile(profile_top_k, uniques_error)
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile
+
+
 @u.transmutation(stage="violations")
 def id_type_violations(df: pd.DataFrame, required_types: dict) -> tuple:
     """
@@ -150,7 +405,6 @@ def id_clustering_violations(
 
     """
     md = u.gen_empty_md_df(df.columns)
-    df["row_ct"] = 1
     # Preprocess cluster_unique_cols to handle column combinations:
     u_col_names = []
     cols_to_count = []
@@ -165,35 +419,38 @@ def id_clustering_violations(
         else:
             u_col_names.append(c)
             cols_to_count.append(c)
-    # Reset_index twice so each cluster has a unique id:
-    cluster_row_cts = (
-        df.groupby(cluster_group_by)["row_ct"].sum().reset_index().reset_index()
+    # Clusters are found once through the factorize cache, rather than
+    # re-hashing cluster_group_by for every groupby and merge:
+    codes, keys = df.genius.factorize(list(cluster_group_by))
+    clusters = df.reset_index(drop=True)
+    # Rows with a null in cluster_group_by belong to no cluster, and get
+    # nan for every cluster statistic:
+    cluster = pd.Series(codes).where(codes >= 0)
+    grouped = clusters.groupby(cluster)
+    stats = pd.concat(
+        [
+            # Number the clusters in the sorted order of their keys:
+            keys.to_frame(index=False).groupby(list(cluster_group_by)).ngroup(),
+            pd.Series(np.bincount(codes[codes >= 0], minlength=len(keys))),
+            # Get the count of each unique value in the ungrouped columns:
+            grouped[u_col_names].nunique().reset_index(drop=True),
+            # Get the count of each value in the ungrouped columns:
+            grouped[cols_to_count].count().reset_index(drop=True),
+        ],
+        axis=1,
+        ignore_index=True,
     )
-    cluster_row_cts.rename(columns={"index": "cluster_id"}, inplace=True)
-    # row_ct in core df no longer necessary:
-    df = df.drop(columns="row_ct")
-    # Get the count of each unique value in the ungrouped columns:
-    nu = df.groupby(cluster_group_by).nunique().reset_index()
-    # Get the count of each value in the ungrouped columns:
-    ct = df.groupby(cluster_group_by).count().reset_index()
-    # Combine row_cts, unique counts, and counts into core df:
-    clusters = (
-        df.merge(cluster_row_cts, how="left", on=cluster_group_by)
-        .merge(
-            nu[[*cluster_group_by, *u_col_names]],
-            on=cluster_group_by,
-            how="left",
-            suffixes=("", "_nu"),
-        )
-        .merge(
-            ct[[*cluster_group_by, *cols_to_count]],
-            on=cluster_group_by,
-            how="left",
-            suffixes=("", "_ct"),
-        )
+    stats.columns = [
+        "cluster_id",
+        "row_ct",
+        *u.broadcast_suffix(u_col_names, "_nu"),
+        *u.broadcast_suffix(cols_to_count, "_ct"),
+    ]
+    clusters = pd.concat(
+        [clusters, stats.reindex(cluster).reset_index(drop=True)], axis=1
     )
     # Apply a row_number to each row within each cluster:
-    clusters["rn"] = clusters.groupby([*cluster_group_by, "cluster_id"]).cumcount() + 1
+    clusters["rn"] = grouped.cumcount() + 1
     # Unique columns and column combinations must be unique:
     for c in u_col_names:
         result = clusters[c + "_nu"] != clusters["row_ct"]
@@ -82,6 +82,21 @@ class CleaningGuide(abc.Mapping, abc.Callable):
         return len(self._data)
 
 
+# Blocking methods available to SupplementGuide, and the default value
+# of each one's integer parameter:
+BLOCKING_METHODS = dict(
+    sorted_neighbourhood=3,
+    qgram=3,
+    prefix=3,
+    soundex=None,
+    metaphone=None,
+    length=2,
+)
+
+# Methods available to SupplementGuide for scoring inexact matches:
+INEXACT_METHODS = ("jaro_winkler", "tfidf")
+
+
 class SupplementGuide(abc.MutableSequence):
     """
     A simple object used by supplement functions below to control what
@@ -95,6 +110,11 @@ class SupplementGuide(abc.MutableSequence):
         thresholds: (float, tuple) = None,
         block: (str, tuple) = None,
         inexact: bool = False,
+        blocking: (str, tuple) = None,
+        reorder_on: bool = False,
+        top_k: int = None,
+        method: str = "jaro_winkler",
+        tolerances: dict = None,
     ):
         """
 
@@ -109,7 +129,9 @@ class SupplementGuide(abc.MutableSequence):
                 as on. Used only if inexact is True, each threshold
                 will be used with the on at the same index and matches
                 in that column must equal or exceed the threshold to
-                qualify as a match.
+                qualify as a match. If tolerances are passed, pass one
+                threshold for each on column without a tolerance
+                instead.
             block: A string or tuple of strings, column names in the
                 target DataFrame. Use this if you're lucky enough to
                 have data that you can match partially exactly on and
@@ -117,6 +139,38 @@ class SupplementGuide(abc.MutableSequence):
                 matches.
             inexact: A boolean, indicates whether this SupplementGuide
                 represents exact or inexact match guidelines.
+            blocking: A string or tuple of a string and an integer.
+                Used only if inexact is True, restricts inexact matches
+                to pairs of rows that share a key derived from the
+                first on column, so that every row doesn't need to be
+                compared with every other row. See
+                lib.supplement.find_candidates for the available
+                methods.
+            reorder_on: A boolean. Used only if inexact is True. Inexact
+                matches compare the on columns in order, and only
+                compare the rows that matched every previous column on
+                the next one. If True, the on columns are compared in
+                order of how selective they are on a sample of rows
+                instead.
+            top_k: An integer. Used only if inexact is True or
+                tolerances are passed. If passed, only the top_k best
+                matches for each row in the target DataFrame are kept
+                (pass 1 to keep only the best match), and their average
+                similarity across the on columns is added as a
+                match_score column.
+            method: A string, one of INEXACT_METHODS. Used only if
+                inexact is True. jaro_winkler compares each pair of
+                values character by character, while tfidf compares the
+                TF-IDF weighted character n-grams of each value, which
+                is faster and more accurate for long free text like
+                company names and addresses. blocking and reorder_on
+                are ignored by tfidf, which only ever compares values
+                sharing an n-gram.
+            tolerances: A dictionary of numeric or datetime on columns
+                and the largest difference between matching values in
+                them, like {"amount": 0.01, "date": "3D"}. The rest of
+                the on columns are matched exactly, or using thresholds
+                if inexact is True. See lib.supplement.do_tolerance.
         """
         self.on: tuple = on
         c = {None: (None,)} if conditions is None else conditions
@@ -126,13 +180,34 @@ class SupplementGuide(abc.MutableSequence):
         self.thresholds: tuple = u.tuplify(thresholds)
         self.block: tuple = u.tuplify(block)
         self.inexact: bool = inexact
+        self.blocking: tuple = u.tuplify(blocking)
+        self.reorder_on: bool = reorder_on
+        self.top_k: int = top_k
+        self.method: str = method
+        self.tolerances: dict = tolerances
+        if self.blocking is not None and self.blocking[0] not in BLOCKING_METHODS:
+            raise ValueError(
+                f"Invalid blocking method={self.blocking[0]}. Valid "
+                f"methods={tuple(BLOCKING_METHODS.keys())}"
+            )
+        if self.method not in INEXACT_METHODS:
+            raise ValueError(
+                f"Invalid method={self.method}. Valid methods={INEXACT_METHODS}"
+            )
+        if self.tolerances is not None and not set(self.tolerances).issubset(on):
+            raise ValueError(
+                f"Tolerances must be for on columns: tolerances="
+                f"{self.tolerances}, on={self.on}"
+            )
         if self.inexact:
+            # Columns with tolerances are matched by them, not thresholds:
+            on = tuple([c for c in self.on if c not in (self.tolerances or {})])
             if self.thresholds is None:
-                self.thresholds = tuple([0.9 for _ in range(len(self.on))])
-            elif len(self.thresholds) != len(self.on):
+                self.thresholds = tuple([0.9 for _ in range(len(on))])
+            elif len(self.thresholds) != len(on):
                 raise ValueError(
                     f"If provided, thresholds length must match on "
-                    f"length: thresholds={self.thresholds}, on={self.on}"
+                    f"length: thresholds={self.thresholds}, on={on}"
                 )
         self.chunks: list = []
 
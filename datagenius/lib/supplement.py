@@ -1,108 +1,2454 @@
-import warnings
+import hashlib
+import os
+import pickle
+import tempfile
+from concurrent import futures
 
+import jellyfish
+import numpy as np
 import pandas as pd
-import recordlinkage as link
+from numpy import nan
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
 
 import datagenius.util as u
 import datagenius.lib.guides as gd
+from datagenius.io import odbc
 
 
 def do_exact(
-    df1: pd.DataFrame, df2: pd.DataFrame, on: tuple, rsuffix: str = "_s"
+    df1: pd.DataFrame,
+    df2,
+    on: tuple,
+    rsuffix: str = "_s",
+    rows: np.ndarray = None,
+    columns: tuple = None,
+    merged_on: str = None,
+) -> pd.DataFrame:
+    """
+    Merges two DataFrames with overlapping columns based on exact
+    matches in those columns.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame containing columns shared with df1, or
+            a SupplementIndex of one. Either way, null on values match
+            each other, as they do in pd.merge.
+        on: A tuple of columns shared by df1 and df2, which will be
+            used to left join rows from df2 onto exact matches in
+            df1.
+        rsuffix: An optional suffix to use for overlapping columns
+            outside the on columns. Will only be applied to df2
+            columns.
+        rows: Used only if df2 is a SupplementIndex, see join_matches.
+        columns: Used only if df2 is a SupplementIndex, see
+            join_matches.
+        merged_on: Used only if df2 is a SupplementIndex, see
+            join_matches.
+
+    Returns: A DataFrame containing all the rows in df1, joined
+        with any matched rows from df2.
+
+    """
+    if isinstance(df2, SupplementIndex):
+        pos1, pos2 = match_exact(df1, df2, on, rows)
+        columns = df2.df.columns if columns is None else columns
+        columns = [c for c in columns if c not in on]
+        return join_matches(df1, df2, pos1, pos2, rsuffix, columns, merged_on)
+    return df1.merge(df2, "left", on=on, suffixes=("", rsuffix))
+
+
+def match_exact(df1: pd.DataFrame, df2, on: tuple, rows: np.ndarray = None) -> tuple:
+    """
+    Finds the pairs of rows in two DataFrames that exactly match on
+    their overlapping columns, the same way do_exact does.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame containing columns shared with df1, or
+            a SupplementIndex of one.
+        on: A tuple of columns shared by df1 and df2.
+        rows: Used only if df2 is a SupplementIndex, see
+            find_candidates.
+
+    Returns: A tuple of two numpy arrays of the same length, each pair
+        of values being the positions of a matched pair of rows in df1
+        and df2, sorted by their position in df1.
+
+    """
+    if isinstance(df2, SupplementIndex):
+        return find_candidates(df1, df2, on, block=on, rows=rows, nulls=True)
+    on = list(on)
+    pairs = (
+        df1[on]
+        .assign(_pos1=np.arange(df1.shape[0]))
+        .merge(df2[on].assign(_pos2=np.arange(df2.shape[0])), "inner", on=on)
+    )
+    pos1, pos2 = pairs["_pos1"].to_numpy(), pairs["_pos2"].to_numpy()
+    order = np.lexsort((pos2, pos1))
+    return pos1[order], pos2[order]
+
+
+def do_inexact(
+    df1: pd.DataFrame,
+    df2,
+    on: tuple,
+    thresholds: tuple,
+    block: tuple = None,
+    rsuffix: str = "_s",
+    blocking: tuple = None,
+    candidates: tuple = None,
+    reorder_on: bool = False,
+    rows: np.ndarray = None,
+    columns: tuple = None,
+    merged_on: str = None,
+    top_k: int = None,
+) -> pd.DataFrame:
+    """
+    Merges two DataFrames with overlapping columns based on inexact
+    matches in those columns. The on columns are compared in order,
+    and only the pairs of rows that matched on every previous column
+    are compared on the next one, so put the most selective columns
+    first.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame containing columns shared with df1, or
+            a SupplementIndex of one.
+        on: A tuple of columns shared by df1 and df2, which will be
+            used to left join rows from df2 onto inexact matches in
+            df1.
+        thresholds: A tuple of floats, indicating how close each on
+            comparison must be to qualify the row as a match. Must
+            be the same length as on.
+        block: A tuple of columns shared by df1 and df2, similar to
+            on, which must represent an exact match between the two
+            frames. Useful when you can reduce the possible match
+            space of two datasets by restricting inexact matches to
+            records that at least have an exact match on a different
+            column.
+        rsuffix: An optional suffix to use for overlapping columns
+            outside the on columns. Will only be applied to df2
+            columns.
+        blocking: A tuple of a blocking method and optionally its
+            parameter, see find_candidates.
+        candidates: A tuple of two numpy arrays, the candidate pairs
+            returned by find_candidates, if they have already been
+            found. Overrides block, blocking and rows.
+        reorder_on: A boolean. If True, the on columns are instead
+            compared in order of how many of a sample of the candidate
+            pairs they match, fewest first.
+        rows: See find_candidates.
+        columns: See join_matches.
+        merged_on: See join_matches.
+        top_k: An integer. If passed, only the top_k best matches for
+            each row in df1 are joined, best first, along with a
+            match_score column containing the average similarity of
+            the match across the on columns.
+
+    Returns: A DataFrame containing all the rows in df1, joined
+        with any matched rows from df2.
+
+    """
+    pos1, pos2, scores = match_inexact(
+        df1, df2, on, thresholds, block, blocking, candidates, reorder_on, rows, top_k
+    )
+    return join_matches(
+        df1,
+        df2,
+        pos1,
+        pos2,
+        rsuffix,
+        columns,
+        merged_on,
+        scores if top_k is not None else None,
+    )
+
+
+def match_inexact(
+    df1: pd.DataFrame,
+    df2,
+    on: tuple,
+    thresholds: tuple,
+    block: tuple = None,
+    blocking: tuple = None,
+    candidates: tuple = None,
+    reorder_on: bool = False,
+    rows: np.ndarray = None,
+    top_k: int = None,
+    workers: int = None,
+) -> tuple:
+    """
+    Finds the pairs of rows in two DataFrames that inexactly match on
+    their overlapping columns, the same way do_inexact does.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame containing columns shared with df1, or
+            a SupplementIndex of one.
+        on: See do_inexact.
+        thresholds: See do_inexact.
+        block: See do_inexact.
+        blocking: See do_inexact.
+        candidates: See do_inexact.
+        reorder_on: See do_inexact.
+        rows: See find_candidates.
+        top_k: An integer. If passed, only the top_k best matches for
+            each row in df1 are returned, best first.
+        workers: An integer. If passed, the candidates are split into
+            this many spans of df1 rows, which are scored in parallel
+            processes.
+
+    Returns: A tuple of three numpy arrays of the same length: the
+        positions of each matched pair of rows in df1 and df2, sorted
+        by their position in df1, and the average similarity of each
+        pair across the on columns.
+
+    """
+    if candidates is None:
+        candidates = find_candidates(df1, df2, on, block, blocking, rows)
+    order = range(len(on))
+    if reorder_on:
+        order = order_by_pass_rate(df1, df2, on, thresholds, candidates)
+    pos1, pos2 = candidates
+    if np.any(pos1[1:] < pos1[:-1]):
+        sort = np.argsort(pos1, kind="stable")
+        pos1, pos2 = pos1[sort], pos2[sort]
+    normalized = [
+        (_normalized(df1, on[i]), _normalized(df2, on[i]), thresholds[i]) for i in order
+    ]
+    # Candidates are scored a block of df1 rows at a time, so that only
+    # the matches are held onto:
+    cuts = np.unique(
+        np.concatenate(
+            ([0], np.searchsorted(pos1, pos1[::_SCORE_CHUNK]), [pos1.shape[0]])
+        )
+    )
+    if workers is None or workers < 2 or cuts.shape[0] < 3:
+        pos1, pos2, total = _score_blocks(normalized, pos1, pos2, cuts, top_k)
+    else:
+        # Each worker scores a contiguous span of blocks, and the spans
+        # are put back together in order:
+        spans = np.array_split(np.arange(cuts.shape[0] - 1), workers)
+        spans = [(cuts[s[0]], cuts[s[-1] + 1]) for s in spans if s.shape[0]]
+        with futures.ProcessPoolExecutor(workers) as pool:
+            jobs = [
+                pool.submit(
+                    _score_blocks,
+                    normalized,
+                    pos1[start:end],
+                    pos2[start:end],
+                    cuts[(cuts >= start) & (cuts <= end)] - start,
+                    top_k,
+                )
+                for start, end in spans
+            ]
+            results = [j.result() for j in jobs]
+        pos1, pos2, total = [np.concatenate(x) for x in zip(*results)]
+    return pos1, pos2, total / len(on)
+
+
+def _score_blocks(
+    normalized: list,
+    pos1: np.ndarray,
+    pos2: np.ndarray,
+    cuts: np.ndarray,
+    top_k: int = None,
+) -> tuple:
+    """
+    Scores candidate pairs of rows one block at a time, comparing each
+    on column in turn. Runs in worker processes for match_inexact.
+
+    Args:
+        normalized: A list of tuples of the normalized forms of an on
+            column in df1 and df2 and its threshold, in the order they
+            are compared.
+        pos1: A numpy array of the positions of candidate rows in df1,
+            sorted.
+        pos2: A numpy array of the positions of candidate rows in df2,
+            the same length as pos1.
+        cuts: A numpy array of the positions in pos1 each block starts
+            at, followed by the length of pos1. Blocks must not split
+            a row's candidates.
+        top_k: See match_inexact.
+
+    Returns: A tuple of three numpy arrays: the positions of each
+        matched pair of rows in df1 and df2, and the sum of their
+        scores.
+
+    """
+    matches = [(pos1[:0], pos2[:0], np.zeros(0))]
+    for start, end in zip(cuts[:-1], cuts[1:]):
+        m1, m2 = pos1[start:end], pos2[start:end]
+        total = np.zeros(m1.shape[0])
+        for n1, n2, threshold in normalized:
+            scores = score_jaro_winkler(n1, n2, (m1, m2), threshold)
+            passed = scores >= threshold
+            m1, m2, total = m1[passed], m2[passed], total[passed] + scores[passed]
+        if top_k is not None:
+            best = _top_k(m1, total, top_k)
+            m1, m2, total = m1[best], m2[best], total[best]
+        matches.append((m1, m2, total))
+    return tuple(np.concatenate(x) for x in zip(*matches))
+
+
+def _top_k(groups: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Finds the k highest scores for each group.
+
+    Args:
+        groups: A numpy array of group ids.
+        scores: A numpy array of scores, the same length as groups.
+        k: An integer, the number of scores to keep from each group.
+
+    Returns: A numpy array of indices in groups and scores, sorted by
+        group and then by score, highest first. Ties are kept in their
+        original order.
+
+    """
+    order = np.lexsort((-scores, groups))
+    groups = groups[order]
+    idx = np.arange(groups.shape[0])
+    new_group = np.r_[True, groups[1:] != groups[:-1]] if groups.shape[0] else idx > 0
+    group_start = np.maximum.accumulate(np.where(new_group, idx, 0))
+    return order[idx - group_start < k]
+
+
+def do_tfidf(
+    df1: pd.DataFrame,
+    df2,
+    on: tuple,
+    thresholds: tuple,
+    block: tuple = None,
+    rsuffix: str = "_s",
+    rows: np.ndarray = None,
+    columns: tuple = None,
+    merged_on: str = None,
+    top_k: int = None,
+    ngram: int = 3,
+) -> pd.DataFrame:
+    """
+    Merges two DataFrames with overlapping columns based on the cosine
+    similarity of the TF-IDF weighted character n-grams of the values
+    in those columns, which suits long free text like company names
+    and addresses better than do_inexact. Candidates are found by
+    multiplying sparse matrices of the first on column's vectors, so
+    only pairs of values sharing at least one n-gram are ever scored,
+    and the remaining on columns are compared in order, like in
+    do_inexact.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame containing columns shared with df1, or
+            a SupplementIndex of one.
+        on: A tuple of columns shared by df1 and df2, which will be
+            used to left join rows from df2 onto inexact matches in
+            df1.
+        thresholds: A tuple of floats, indicating how similar each on
+            column must be to qualify the row as a match. Must be the
+            same length as on.
+        block: A tuple of columns shared by df1 and df2, which must
+            match exactly for a pair of rows to be a match.
+        rsuffix: An optional suffix to use for overlapping columns
+            outside the on columns. Will only be applied to df2
+            columns.
+        rows: A numpy array of positions in df2. If passed, only these
+            rows of df2 are matched.
+        columns: See join_matches.
+        merged_on: See join_matches.
+        top_k: See do_inexact.
+        ngram: An integer, the length of the n-grams to compare.
+
+    Returns: A DataFrame containing all the rows in df1, joined
+        with any matched rows from df2.
+
+    """
+    pos1, pos2, scores = match_tfidf(
+        df1, df2, on, thresholds, block, rows, top_k, ngram
+    )
+    return join_matches(
+        df1,
+        df2,
+        pos1,
+        pos2,
+        rsuffix,
+        columns,
+        merged_on,
+        scores if top_k is not None else None,
+    )
+
+
+def match_tfidf(
+    df1: pd.DataFrame,
+    df2,
+    on: tuple,
+    thresholds: tuple,
+    block: tuple = None,
+    rows: np.ndarray = None,
+    top_k: int = None,
+    ngram: int = 3,
+) -> tuple:
+    """
+    Finds the pairs of rows in two DataFrames whose overlapping columns
+    have similar TF-IDF vectors, the same way do_tfidf does.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame containing columns shared with df1, or
+            a SupplementIndex of one.
+        on: See do_tfidf.
+        thresholds: See do_tfidf.
+        block: See do_tfidf.
+        rows: See do_tfidf.
+        top_k: See match_inexact.
+        ngram: See do_tfidf.
+
+    Returns: A tuple of three numpy arrays, see match_inexact.
+
+    """
+    vectors = [
+        _tfidf_vectors(_normalized(df1, c), _normalized(df2, c), ngram) for c in on
+    ]
+    codes1, x1, codes2, x2 = vectors[0]
+    allowed = None
+    if rows is not None:
+        allowed = np.zeros(x2.shape[0], dtype=bool)
+        allowed[codes2[rows][codes2[rows] >= 0]] = True
+    # The best matching values are the best matching rows, unless there
+    # are more columns to compare:
+    top_n = top_k if len(on) == 1 and block is None else None
+    u1, u2, total = _cosine_matches(x1, x2, thresholds[0], top_n, allowed)
+    pos1, pos2, idx = _expand_pairs(u1, u2, codes1, codes2, rows)
+    total = total[idx]
+    if block is not None:
+        other = df2.df if isinstance(df2, SupplementIndex) else df2
+        for b in block:
+            keys = pd.factorize(pd.concat([df1[b], other[b]], ignore_index=True))[0]
+            k1, k2 = keys[: df1.shape[0]][pos1], keys[df1.shape[0] :][pos2]
+            passed = (k1 == k2) & (k1 >= 0)
+            pos1, pos2, total = pos1[passed], pos2[passed], total[passed]
+    for (codes1, x1, codes2, x2), threshold in zip(vectors[1:], thresholds[1:]):
+        scores = _cosine_pairs(x1, x2, codes1[pos1], codes2[pos2])
+        passed = scores >= threshold - 1e-9
+        pos1, pos2, total = pos1[passed], pos2[passed], total[passed] + scores[passed]
+    if top_k is not None:
+        best = _top_k(pos1, total, top_k)
+    else:
+        best = np.lexsort((pos2, pos1))
+    return pos1[best], pos2[best], total[best] / len(on)
+
+
+# The number of rows of TF-IDF vectors multiplied at a time, which
+# caps the memory used by each sparse matrix product:
+_TFIDF_CHUNK = 1000
+
+
+def _tfidf_vectors(n1: tuple, n2: tuple, ngram: int = 3) -> tuple:
+    """
+    Vectorizes the unique values of two normalized Series into TF-IDF
+    weighted character n-grams, with the document frequencies taken
+    from both.
+
+    Args:
+        n1: A tuple, the normalized form of a Series, see _normalize.
+        n2: A tuple, the normalized form of a Series, see _normalize.
+        ngram: An integer, the length of the n-grams.
+
+    Returns: A tuple of n1's factorize codes, a scipy csr matrix of
+        unit length vectors for each of its unique values, and the same
+        for n2.
+
+    """
+    codes1, strings1, _ = n1
+    codes2, strings2, _ = n2
+    vectorizer = TfidfVectorizer(
+        analyzer="char_wb", ngram_range=(ngram, ngram), lowercase=False
+    )
+    try:
+        x = vectorizer.fit_transform(np.concatenate([strings1, strings2])).tocsr()
+    except ValueError:
+        # There are no n-grams at all, so nothing can match:
+        x = sparse.csr_matrix((strings1.shape[0] + strings2.shape[0], 1))
+    return codes1, x[: strings1.shape[0]], codes2, x[strings1.shape[0] :]
+
+
+def _cosine_matches(
+    x1: sparse.csr_matrix,
+    x2: sparse.csr_matrix,
+    threshold: float,
+    top_n: int = None,
+    allowed: np.ndarray = None,
+) -> tuple:
+    """
+    Finds every pair of rows in two matrices of unit length vectors
+    whose cosine similarity meets a threshold, multiplying a chunk of
+    x1's rows at a time.
+
+    Args:
+        x1: A scipy csr matrix.
+        x2: A scipy csr matrix with as many columns as x1.
+        threshold: A float, the minimum similarity of a match. Rows
+            that share no columns never match.
+        top_n: An integer. If passed, only the top_n matches for each
+            row in x1 are kept.
+        allowed: A numpy array of booleans, one for each row in x2. If
+            passed, only the rows in x2 that are True are matched.
+
+    Returns: A tuple of the matched rows in x1 and x2, as numpy arrays,
+        and a numpy array of their similarities.
+
+    """
+    x2t = x2.T.tocsr()
+    matches = [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))]
+    for start in range(0, x1.shape[0], _TFIDF_CHUNK):
+        product = (x1[start : start + _TFIDF_CHUNK] @ x2t).tocoo()
+        # Allow for float error, identical values should match at 1:
+        passed = product.data >= threshold - 1e-9
+        if allowed is not None:
+            passed &= allowed[product.col]
+        r1, r2 = product.row[passed] + start, product.col[passed]
+        scores = np.minimum(product.data[passed], 1)
+        if top_n is not None:
+            best = _top_k(r1, scores, top_n)
+            r1, r2, scores = r1[best], r2[best], scores[best]
+        matches.append((r1, r2, scores))
+    return tuple(np.concatenate(x) for x in zip(*matches))
+
+
+def _cosine_pairs(
+    x1: sparse.csr_matrix, x2: sparse.csr_matrix, idx1: np.ndarray, idx2: np.ndarray
+) -> np.ndarray:
+    """
+    Calculates the cosine similarity of pairs of rows in two matrices of
+    unit length vectors. Each distinct pair is only calculated once.
+
+    Args:
+        x1: A scipy csr matrix.
+        x2: A scipy csr matrix with as many columns as x1.
+        idx1: A numpy array of rows in x1, -1 for nulls.
+        idx2: A numpy array of rows in x2, the same length as idx1.
+
+    Returns: A numpy array of floats, the similarity of each pair.
+        Pairs including a null score 0.
+
+    """
+    scores = np.zeros(idx1.shape[0])
+    valid = (idx1 >= 0) & (idx2 >= 0)
+    n2 = x2.shape[0]
+    pairs, inverse = np.unique(
+        idx1[valid].astype(np.int64) * n2 + idx2[valid], return_inverse=True
+    )
+    u1, u2 = pairs // n2, pairs % n2
+    pair_scores = np.zeros(pairs.shape[0])
+    for i in range(0, pairs.shape[0], _SCORE_CHUNK):
+        c1, c2 = u1[i : i + _SCORE_CHUNK], u2[i : i + _SCORE_CHUNK]
+        pair_scores[i : i + _SCORE_CHUNK] = np.asarray(
+            x1[c1].multiply(x2[c2]).sum(axis=1)
+        ).ravel()
+    scores[valid] = np.minimum(pair_scores[inverse], 1)
+    return scores
+
+
+def _expand_pairs(
+    u1: np.ndarray,
+    u2: np.ndarray,
+    codes1: np.ndarray,
+    codes2: np.ndarray,
+    rows: np.ndarray = None,
+) -> tuple:
+    """
+    Expands matched pairs of unique values into every pair of rows
+    holding them.
+
+    Args:
+        u1: A numpy array of indices of unique values, see codes1.
+        u2: A numpy array of indices of unique values, see codes2, the
+            same length as u1.
+        codes1: A numpy array of factorize codes, one for each row.
+        codes2: A numpy array of factorize codes, one for each row.
+        rows: A numpy array of positions in codes2. If passed, only
+            these rows are paired.
+
+    Returns: A tuple of numpy arrays: the positions of each pair of
+        rows in codes1 and codes2, and the index in u1 and u2 of the
+        pair of values each pair of rows holds.
+
+    """
+
+    def _groups(codes, n):
+        order = np.argsort(codes, kind="stable")
+        order = order[codes[order] >= 0]
+        counts = np.bincount(codes[order], minlength=n)
+        return order, np.cumsum(counts) - counts, counts
+
+    n1 = 0 if u1.shape[0] == 0 else max(codes1.max(initial=-1), u1.max()) + 1
+    n2 = 0 if u2.shape[0] == 0 else max(codes2.max(initial=-1), u2.max()) + 1
+    if rows is not None:
+        allowed = np.full(codes2.shape[0], -1)
+        allowed[rows] = codes2[rows]
+        codes2 = allowed
+    order1, starts1, counts1 = _groups(codes1, n1)
+    order2, starts2, counts2 = _groups(codes2, n2)
+    # Each pair of values expands into counts1 * counts2 pairs of rows:
+    c1, c2 = counts1[u1], counts2[u2]
+    sizes = c1 * c2
+    idx = np.repeat(np.arange(u1.shape[0]), sizes)
+    offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    pos1 = order1[starts1[u1][idx] + offsets // c2[idx]]
+    pos2 = order2[starts2[u2][idx] + offsets % c2[idx]]
+    return pos1, pos2, idx
+
+
+def do_tolerance(
+    df1: pd.DataFrame,
+    df2,
+    on: tuple,
+    tolerances: dict,
+    thresholds: tuple = None,
+    block: tuple = None,
+    rsuffix: str = "_s",
+    rows: np.ndarray = None,
+    columns: tuple = None,
+    merged_on: str = None,
+    top_k: int = None,
+) -> pd.DataFrame:
+    """
+    Merges two DataFrames with overlapping columns, matching numeric or
+    datetime on columns whose values are within a tolerance of each
+    other, like "same account, amount within 0.01, date within 3
+    days". Like pandas.merge_asof, candidates are found by sorting df2,
+    so matching takes O(n log n) time plus the number of matches.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame containing columns shared with df1, or
+            a SupplementIndex of one.
+        on: A tuple of columns shared by df1 and df2, which will be
+            used to left join rows from df2 onto matches in df1.
+        tolerances: A dictionary of on columns and the largest
+            difference between matching values in them. Tolerances for
+            datetime columns can be anything pandas.Timedelta accepts,
+            like "3D".
+        thresholds: A tuple of floats, one for each on column not in
+            tolerances, in the same order. If passed, those columns are
+            inexactly matched, see do_inexact, otherwise they must match
+            exactly.
+        block: A tuple of columns shared by df1 and df2, which must
+            match exactly for a pair of rows to be a match.
+        rsuffix: An optional suffix to use for overlapping columns
+            outside the on columns. Will only be applied to df2
+            columns.
+        rows: See do_tfidf.
+        columns: See join_matches.
+        merged_on: See join_matches.
+        top_k: See do_inexact. Values within tolerance score 1 minus
+            their difference as a share of the tolerance, so top_k=1
+            keeps the nearest match.
+
+    Returns: A DataFrame containing all the rows in df1, joined
+        with any matched rows from df2.
+
+    """
+    pos1, pos2, scores = match_tolerance(
+        df1, df2, on, tolerances, thresholds, block, rows, top_k
+    )
+    return join_matches(
+        df1,
+        df2,
+        pos1,
+        pos2,
+        rsuffix,
+        columns,
+        merged_on,
+        scores if top_k is not None else None,
+    )
+
+
+def match_tolerance(
+    df1: pd.DataFrame,
+    df2,
+    on: tuple,
+    tolerances: dict,
+    thresholds: tuple = None,
+    block: tuple = None,
+    rows: np.ndarray = None,
+    top_k: int = None,
+) -> tuple:
+    """
+    Finds the pairs of rows in two DataFrames whose overlapping columns
+    match within tolerances, the same way do_tolerance does.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame containing columns shared with df1, or
+            a SupplementIndex of one.
+        on: See do_tolerance.
+        tolerances: See do_tolerance.
+        thresholds: See do_tolerance.
+        block: See do_tolerance.
+        rows: See do_tfidf.
+        top_k: See match_inexact.
+
+    Returns: A tuple of three numpy arrays, see match_inexact.
+
+    """
+    other = df2.df if isinstance(df2, SupplementIndex) else df2
+    near = [c for c in on if c in tolerances]
+    rest = [c for c in on if c not in tolerances]
+    if len(near) == 0:
+        raise ValueError(f"None of on={on} have tolerances={tolerances}")
+    if thresholds is not None and len(thresholds) != len(rest):
+        raise ValueError(
+            f"thresholds must have one value for each on column without a "
+            f"tolerance: thresholds={thresholds}, columns={tuple(rest)}"
+        )
+    for c in near:
+        for s in (df1[c], other[c]):
+            if not _is_tolerable(s):
+                raise ValueError(
+                    f"Tolerance columns must be numeric or datetime: {c} has "
+                    f"dtype={s.dtype}"
+                )
+    block = list(u.tuplify(block) or ())
+    if thresholds is None:
+        block += rest
+    # Rows are first matched on the first column with a tolerance, by
+    # looking up the range of values within tolerance in a sorted df2:
+    keys1, keys2 = _block_codes(df1, other, block)
+    v1, v2, tolerance = _tolerance_values(df1[near[0]], other[near[0]], tolerances)
+    valid1 = (keys1 >= 0) & ~np.isnan(v1)
+    valid2 = (keys2 >= 0) & ~np.isnan(v2)
+    if rows is not None:
+        allowed = np.zeros(other.shape[0], dtype=bool)
+        allowed[rows] = True
+        valid2 &= allowed
+    q = np.flatnonzero(valid1)
+    r = np.flatnonzero(valid2)
+    r = r[np.lexsort((v2[r], keys2[r]))]
+    reach = _reach(tolerance)
+    lo = _sorted_positions(keys2[r], v2[r], keys1[q], v1[q] - reach, "left")
+    hi = _sorted_positions(keys2[r], v2[r], keys1[q], v1[q] + reach, "right")
+    counts = np.maximum(hi - lo, 0)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    pos1 = np.repeat(q, counts)
+    pos2 = r[np.repeat(lo, counts) + offsets]
+    total = _tolerance_score(v1[pos1], v2[pos2], tolerance)
+    for c in near[1:]:
+        v1, v2, tolerance = _tolerance_values(df1[c], other[c], tolerances)
+        scores = _tolerance_score(v1[pos1], v2[pos2], tolerance)
+        passed = scores >= 0
+        pos1, pos2, total = pos1[passed], pos2[passed], total[passed] + scores[passed]
+    if thresholds is not None:
+        for c, threshold in zip(rest, thresholds):
+            scores = score_jaro_winkler(
+                _normalized(df1, c), _normalized(df2, c), (pos1, pos2), threshold
+            )
+            passed = scores >= threshold
+            pos1, pos2 = pos1[passed], pos2[passed]
+            total = total[passed] + scores[passed]
+    if top_k is not None:
+        best = _top_k(pos1, total, top_k)
+    else:
+        best = np.lexsort((pos2, pos1))
+    scored = len(on) if thresholds is not None else len(near)
+    return pos1[best], pos2[best], total[best] / scored
+
+
+def _block_codes(df1: pd.DataFrame, df2: pd.DataFrame, block: list) -> tuple:
+    """
+    Assigns the rows of two DataFrames codes that are equal when their
+    values in the block columns are.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame containing the block columns.
+        block: A list of columns shared by df1 and df2.
+
+    Returns: A tuple of two numpy arrays of integers, the codes of each
+        row in df1 and df2. Rows with null block values get -1.
+
+    """
+    if len(block) == 0:
+        return np.zeros(df1.shape[0], dtype=np.int64), np.zeros(
+            df2.shape[0], dtype=np.int64
+        )
+    both = pd.concat([df1[block], df2[block]], ignore_index=True)
+    codes = both.groupby(block, sort=False, dropna=True).ngroup().to_numpy()
+    return codes[: df1.shape[0]], codes[df1.shape[0] :]
+
+
+def _is_tolerable(s: pd.Series) -> bool:
+    """
+    Args:
+        s: A pandas Series.
+
+    Returns: True if s's values can be matched within a tolerance,
+        i.e. s is numeric or datetime.
+
+    """
+    return (
+        pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_any_dtype(s)
+    ) and not pd.api.types.is_complex_dtype(s)
+
+
+def _tolerance_values(s1: pd.Series, s2: pd.Series, tolerances: dict) -> tuple:
+    """
+    Converts two numeric or datetime Series to numbers that can be
+    compared with their tolerance.
+
+    Args:
+        s1: A pandas Series.
+        s2: A pandas Series with the same label as s1, which must be in
+            tolerances.
+        tolerances: See do_tolerance.
+
+    Returns: A tuple of two numpy arrays, floats or integer nanoseconds
+        with nan for nulls, and the tolerance in the same units.
+
+    """
+    tolerance = tolerances[s1.name]
+    if pd.api.types.is_datetime64_any_dtype(s1) or pd.api.types.is_datetime64_any_dtype(
+        s2
+    ):
+        v1, v2 = [
+            pd.to_datetime(s).to_numpy("datetime64[ns]").astype(float) for s in (s1, s2)
+        ]
+        v1[pd.isna(s1).to_numpy()] = nan
+        v2[pd.isna(s2).to_numpy()] = nan
+        return v1, v2, float(pd.Timedelta(tolerance).value)
+    v1, v2 = [pd.to_numeric(s).to_numpy(dtype=float, na_value=nan) for s in (s1, s2)]
+    return v1, v2, float(tolerance)
+
+
+def _tolerance_score(v1: np.ndarray, v2: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Scores how close pairs of values are, relative to a tolerance.
+
+    Args:
+        v1: A numpy array of floats.
+        v2: A numpy array of floats, the same length as v1.
+        tolerance: A float, the largest difference between matching
+            values.
+
+    Returns: A numpy array of floats, 1 for equal values down to 0 for
+        values a full tolerance apart, and -1 for values further apart
+        than that or nulls.
+
+    """
+    diff = np.abs(v1 - v2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(tolerance > 0, 1 - diff / tolerance, 1.0)
+    return np.where(diff <= _reach(tolerance), np.maximum(scores, 0), -1)
+
+
+def _reach(tolerance: float) -> float:
+    """
+    Allows for float error in a tolerance, so that 10.01 is within 0.01
+    of 10.
+
+    Args:
+        tolerance: A float.
+
+    Returns: A float, tolerance plus a hair.
+
+    """
+    return tolerance + abs(tolerance) * 1e-9 + 1e-12
+
+
+def _sorted_positions(
+    keys: np.ndarray,
+    values: np.ndarray,
+    query_keys: np.ndarray,
+    query_values: np.ndarray,
+    side: str = "left",
+) -> np.ndarray:
+    """
+    Like numpy.searchsorted, but for an array sorted by key and then by
+    value, so that each query only finds positions within its key.
+
+    Args:
+        keys: A numpy array of integers, sorted.
+        values: A numpy array, the same length as keys and sorted within
+            each key.
+        query_keys: A numpy array of integers.
+        query_values: A numpy array, the same length as query_keys.
+        side: A string, left or right, see numpy.searchsorted.
+
+    Returns: A numpy array of integers, the position of each query.
+
+    """
+    n = keys.shape[0]
+    flags = np.concatenate(
+        [np.ones(n), np.full(query_keys.shape[0], 0 if side == "left" else 2)]
+    )
+    order = np.lexsort(
+        (
+            flags,
+            np.concatenate([values, query_values]),
+            np.concatenate([keys, query_keys]),
+        )
+    )
+    is_data = order < n
+    data_before = np.cumsum(is_data) - is_data
+    positions = np.empty(query_keys.shape[0], dtype=np.int64)
+    positions[order[~is_data] - n] = data_before[~is_data]
+    return positions
+
+
+def order_by_pass_rate(
+    df1: pd.DataFrame,
+    df2,
+    on: tuple,
+    thresholds: tuple,
+    candidates: tuple,
+    sample_size: int = 1000,
+) -> list:
+    """
+    Scores a random sample of candidate pairs on each on column, to
+    find the order do_inexact should compare the columns in.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame containing columns shared with df1, or
+            a SupplementIndex of one.
+        on: A tuple of columns shared by df1 and df2.
+        thresholds: A tuple of floats, the same length as on.
+        candidates: A tuple of two numpy arrays, the candidate pairs
+            returned by find_candidates.
+        sample_size: An integer, the maximum number of candidate pairs
+            to sample.
+
+    Returns: A list of the indices of on, ordered by the number of
+        sampled pairs that match on that column, lowest first.
+
+    """
+    n = len(candidates[0])
+    sample = np.random.default_rng(0).choice(n, min(n, sample_size), replace=False)
+    sample = (candidates[0][sample], candidates[1][sample])
+    pass_rates = []
+    for i, o in enumerate(on):
+        scores = score_jaro_winkler(
+            _normalized(df1, o), _normalized(df2, o), sample, thresholds[i]
+        )
+        pass_rates.append((scores >= thresholds[i]).sum())
+    return sorted(range(len(on)), key=lambda i: pass_rates[i])
+
+
+def join_matches(
+    df1: pd.DataFrame,
+    df2,
+    pos1: np.ndarray,
+    pos2: np.ndarray,
+    rsuffix: str = "_s",
+    columns: tuple = None,
+    merged_on: str = None,
+    scores: np.ndarray = None,
 ) -> pd.DataFrame:
     """
-    Merges two DataFrames with overlapping columns based on exact
-    matches in those columns.
+    Joins matched pairs of rows from two DataFrames, followed by the
+    rows in df1 that weren't matched.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame, or a SupplementIndex of one.
+        pos1: A numpy array of the positions of matched rows in df1.
+        pos2: A numpy array of the same length as pos1, the positions
+            of the rows in df2 each row in df1 is matched with.
+        rsuffix: A suffix to use for df2 columns that overlap with df1
+            columns.
+        columns: A tuple of the columns in df2 to join. By default,
+            all of them are joined.
+        merged_on: A string. If passed, the joined df2 rows get a
+            merged_on column containing it.
+        scores: A numpy array of floats, the same length as pos1. If
+            passed, the joined df2 rows get a match_score column
+            containing it.
+
+    Returns: A DataFrame containing all the rows in df1, joined with
+        any matched rows from df2.
+
+    """
+    df2 = df2.df if isinstance(df2, SupplementIndex) else df2
+    unmatched = np.ones(df1.shape[0], dtype=bool)
+    unmatched[pos1] = False
+    right = df2.iloc[pos2].reset_index(drop=True)
+    if columns is not None:
+        right = right[list(columns)]
+    if merged_on is not None:
+        right["merged_on"] = merged_on
+    if scores is not None:
+        right["match_score"] = scores
+    right.columns = [c + rsuffix if c in df1.columns else c for c in right.columns]
+    matched = pd.concat((df1.iloc[pos1].reset_index(drop=True), right), axis=1)
+    if not unmatched.any():
+        return matched
+    return pd.concat((matched, df1[unmatched]), ignore_index=True)
+
+
+def match_guide(
+    df1: pd.DataFrame,
+    df2,
+    sg: gd.SupplementGuide,
+    rows: np.ndarray = None,
+    workers: int = None,
+) -> tuple:
+    """
+    Finds the pairs of rows in two DataFrames that a SupplementGuide
+    matches, using whichever of match_exact, match_inexact, match_tfidf
+    or match_tolerance it calls for.
+
+    Args:
+        df1: A pandas DataFrame.
+        df2: A pandas DataFrame containing columns shared with df1, or
+            a SupplementIndex of one.
+        sg: A SupplementGuide.
+        rows: See find_candidates.
+        workers: See match_inexact.
+
+    Returns: A tuple of three numpy arrays, see match_inexact, with
+        None for scores from exact matches, and the number of candidate
+        pairs compared if they were found with find_candidates, else
+        None.
+
+    """
+    if sg.tolerances:
+        thresholds = sg.thresholds if sg.inexact else None
+        return (
+            *match_tolerance(
+                df1, df2, sg.on, sg.tolerances, thresholds, sg.block, rows, sg.top_k
+            ),
+            None,
+        )
+    if sg.inexact and sg.method == "tfidf":
+        return (
+            *match_tfidf(df1, df2, sg.on, sg.thresholds, sg.block, rows, sg.top_k),
+            None,
+        )
+    if sg.inexact:
+        candidates = find_candidates(df1, df2, sg.on, sg.block, sg.blocking, rows)
+        return (
+            *match_inexact(
+                df1,
+                df2,
+                sg.on,
+                sg.thresholds,
+                candidates=candidates,
+                reorder_on=sg.reorder_on,
+                top_k=sg.top_k,
+                workers=workers,
+            ),
+            candidates[0].shape[0],
+        )
+    return (*match_exact(df1, df2, sg.on, rows), None, None)
+
+
+def supplement_chunk(
+    df1: pd.DataFrame, sg: gd.SupplementGuide, others: list, workers: int = None
+) -> tuple:
+    """
+    Supplements a chunk of a DataFrame with the matching rows from the
+    same chunk of any number of other DataFrames. Runs in worker
+    processes for GeniusAccessor.supplement.
+
+    Args:
+        df1: A pandas DataFrame.
+        sg: The SupplementGuide the chunk belongs to.
+        others: A list of dictionaries, one for each other DataFrame,
+            with keys:
+                frame: A pandas DataFrame or SupplementIndex.
+                rows: See find_candidates.
+                columns: A list of the columns in frame to join.
+                rsuffix: See join_matches.
+                size: An integer, the number of rows in frame's chunk.
+                matches: Optional. A tuple of positions and scores,
+                    see match_guide, if they're already found.
+        workers: See match_inexact.
+
+    Returns: A tuple of a DataFrame, see join_all, and a list of
+        dictionaries of the number of candidate pairs compared in each
+        inexact match, and the number of pairs there would be without
+        blocking.
+
+    """
+    merged_on = ",".join(sg.on)
+    joins = []
+    pair_cts = []
+    for o in others:
+        if o.get("matches") is not None:
+            pos1, pos2, scores = o["matches"]
+        else:
+            pos1, pos2, scores, n = match_guide(df1, o["frame"], sg, o["rows"], workers)
+            if n is not None:
+                pair_cts.append(
+                    dict(
+                        merged_on=merged_on,
+                        candidate_pairs=n,
+                        total_pairs=df1.shape[0] * o["size"],
+                    )
+                )
+        columns = o["columns"]
+        if not sg.inexact and not sg.tolerances:
+            columns = [c for c in columns if c not in sg.on]
+        joins.append(
+            (
+                o["frame"],
+                pos1,
+                pos2,
+                columns,
+                o["rsuffix"],
+                merged_on,
+                scores if sg.top_k is not None else None,
+            )
+        )
+    return join_all(df1, joins), pair_cts
+
+
+def find_duplicates(
+    df: pd.DataFrame,
+    sg: gd.SupplementGuide,
+    rows: np.ndarray = None,
+    workers: int = None,
+) -> np.ndarray:
+    """
+    Clusters the rows of a DataFrame that duplicate each other according
+    to a SupplementGuide. Exact duplicates are found by hashing their
+    on and block values, and inexact ones by matching the DataFrame
+    with itself, scoring each unordered pair of candidate rows once.
+    Duplicates are transitive, so if a duplicates b and b duplicates c,
+    all three are in the same cluster. Rows with null on values are
+    never duplicates.
+
+    Args:
+        df: A pandas DataFrame.
+        sg: A SupplementGuide. Its conditions and top_k are ignored.
+        rows: A numpy array of positions in df. If passed, only these
+            rows are clustered.
+        workers: See match_inexact.
+
+    Returns: A numpy array of integer cluster labels, one for each row
+        in rows, or in df if rows isn't passed. Labels are between 0 and
+        the number of rows.
+
+    """
+    frame = df if rows is None else df.iloc[rows]
+    if not sg.inexact and not sg.tolerances:
+        columns = [*sg.on, *(sg.block or ())]
+        hashes = pd.util.hash_pandas_object(frame[columns], index=False)
+        labels = pd.factorize(hashes)[0]
+        nulls = frame[list(sg.on)].isna().any(axis=1).to_numpy()
+        # Rows with nulls get distinct negative labels, and are then
+        # renumbered with the rest so labels stay below the row count:
+        labels[nulls] = -1 - np.arange(nulls.sum())
+        return pd.factorize(labels)[0]
+    frame = frame.reset_index(drop=True)
+    if sg.inexact and sg.method == "jaro_winkler" and not sg.tolerances:
+        candidates = find_candidates(
+            frame, frame, sg.on, sg.block, sg.blocking, unordered=True
+        )
+        pos1, pos2, _ = match_inexact(
+            frame,
+            frame,
+            sg.on,
+            sg.thresholds,
+            candidates=candidates,
+            reorder_on=sg.reorder_on,
+            workers=workers,
+        )
+    else:
+        if sg.tolerances:
+            thresholds = sg.thresholds if sg.inexact else None
+            pos1, pos2, _ = match_tolerance(
+                frame, frame, sg.on, sg.tolerances, thresholds, sg.block
+            )
+        else:
+            pos1, pos2, _ = match_tfidf(frame, frame, sg.on, sg.thresholds, sg.block)
+        pos1, pos2 = pos1[pos1 < pos2], pos2[pos1 < pos2]
+    return cluster_pairs(frame.shape[0], pos1, pos2)
+
+
+def cluster_pairs(n: int, pos1: np.ndarray, pos2: np.ndarray) -> np.ndarray:
+    """
+    Finds the transitive closure of pairs of matched rows.
+
+    Args:
+        n: The number of rows.
+        pos1: A numpy array of row positions.
+        pos2: A numpy array of row positions the same length as pos1,
+            each paired with the value in pos1 at the same index.
+
+    Returns: A numpy array of n integer cluster labels, shared by all
+        the rows linked by a chain of pairs. See UnionFind.labels.
+
+    """
+    clusters = UnionFind(n)
+    clusters.union(pos1, pos2)
+    return clusters.labels()
+
+
+def resolve_entities(
+    *frames,
+    on: (str, list, tuple),
+    entity_col: str = "entity_id",
+    workers: int = None,
+) -> tuple:
+    """
+    Links the records in any number of DataFrames that refer to the
+    same entity, within and across the DataFrames. Every SupplementGuide
+    in the plan built from on is a separate rule, applied to all the
+    rows meeting its conditions, and records linked by any chain of
+    rules are the same entity.
+
+    Args:
+        *frames: An arbitrary list of DataFrames, all containing the
+            columns referenced by on.
+        on: See GeniusAccessor.supplement.
+        entity_col: The name of the entity id column to add.
+        workers: See match_inexact.
+
+    Returns: A tuple of copies of frames, each with an entity_col of
+        integer entity ids, numbered in order of each entity's first
+        record.
+
+    """
+    plan = build_plan(prep_ons(on))
+    columns = plan_columns(plan)
+    # Only the matched columns of every frame are stacked and matched
+    # with themselves:
+    records = pd.concat([f[columns] for f in frames], ignore_index=True)
+    entities = UnionFind(records.shape[0])
+    for sg in plan:
+        rows = np.flatnonzero(_condition_mask(records, sg.conditions))
+        labels = find_duplicates(records, sg, rows, workers)
+        _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        entities.union(rows[first[inverse]], rows)
+    ids = pd.factorize(entities.labels())[0]
+    results = []
+    start = 0
+    for f in frames:
+        results.append(f.assign(**{entity_col: ids[start : start + f.shape[0]]}))
+        start += f.shape[0]
+    return tuple(results)
+
+
+class UnionFind:
+    """
+    A disjoint set of n items backed by a numpy array of each item's
+    parent, which unions whole arrays of pairs at a time.
+    """
+
+    def __init__(self, n: int):
+        """
+
+        Args:
+            n: The number of items, each of which starts in its own
+                set.
+        """
+        self.parent: np.ndarray = np.arange(n)
+
+    def find(self, items: np.ndarray) -> np.ndarray:
+        """
+        Finds the root of each item's set.
+
+        Args:
+            items: A numpy array of items.
+
+        Returns: A numpy array of the root of each item.
+
+        """
+        roots = self.parent[items]
+        while True:
+            up = self.parent[roots]
+            if np.array_equal(up, roots):
+                return roots
+            roots = up
+
+    def union(self, pos1: np.ndarray, pos2: np.ndarray) -> None:
+        """
+        Merges the sets of each pair of items.
+
+        Args:
+            pos1: A numpy array of items.
+            pos2: A numpy array of items the same length as pos1, each
+                paired with the item in pos1 at the same index.
+
+        Returns: None
+
+        """
+        while pos1.shape[0]:
+            r1, r2 = self.find(pos1), self.find(pos2)
+            apart = r1 != r2
+            if not apart.any():
+                break
+            pos1, pos2, r1, r2 = pos1[apart], pos2[apart], r1[apart], r2[apart]
+            # Roots always point to a smaller root, so there are no
+            # cycles. A root paired with several others is only merged
+            # with the smallest, and the rest are merged next pass:
+            np.minimum.at(self.parent, np.maximum(r1, r2), np.minimum(r1, r2))
+            self._compress()
+
+    def labels(self) -> np.ndarray:
+        """
+
+        Returns: A numpy array of the root of every item's set, which is
+            its smallest item.
+
+        """
+        self._compress()
+        return self.parent.copy()
+
+    def _compress(self) -> None:
+        """
+        Points every item directly at its root.
+
+        Returns: None
+
+        """
+        while True:
+            up = self.parent[self.parent]
+            if np.array_equal(up, self.parent):
+                return
+            self.parent = up
+
+
+def join_all(df1: pd.DataFrame, joins: list) -> pd.DataFrame:
+    """
+    Left joins the matched rows of any number of DataFrames onto a
+    DataFrame, one after another, with the same results as calling
+    join_matches for each one except that matched rows stay in their
+    place in df1. Each join only expands arrays of row positions, and
+    the columns of all the DataFrames are gathered once at the end.
+
+    Args:
+        df1: A pandas DataFrame.
+        joins: A list of tuples, each one containing a pandas DataFrame
+            or SupplementIndex of one, the positions of its matched
+            rows in df1 and in itself (sorted by their position in
+            df1), the columns in it to join, the suffix for columns
+            that overlap with those already joined, a merged_on string
+            or None and a numpy array of match scores or None. See
+            join_matches.
+
+    Returns: A DataFrame containing all the rows in df1, joined with
+        any matched rows from each DataFrame in joins, and indexed by
+        df1's index.
+
+    """
+    # The position in df1 of each row in the result, and the index of
+    # the pair in each join each row holds (-1 if it wasn't matched):
+    base = np.arange(df1.shape[0])
+    picks = []
+    for _, pos1, _, _, _, _, _ in joins:
+        counts = np.bincount(pos1, minlength=df1.shape[0])[base]
+        starts = np.searchsorted(pos1, base)
+        reps = np.maximum(counts, 1)
+        rows = np.repeat(np.arange(base.shape[0]), reps)
+        offsets = np.arange(reps.sum()) - np.repeat(np.cumsum(reps) - reps, reps)
+        pick = np.where(counts[rows] > 0, starts[rows] + offsets, -1)
+        base = base[rows]
+        picks = [p[rows] for p in picks] + [pick]
+    take = pd.api.extensions.take
+    data = {c: take(df1[c].array, base) for c in df1.columns}
+    for (df2, _, pos2, columns, rsuffix, merged_on, scores), pick in zip(joins, picks):
+        df2 = df2.df if isinstance(df2, SupplementIndex) else df2
+        # Unmatched rows pick the -1 appended to pos2:
+        rows = np.append(pos2, -1)[pick]
+        fill = bool((rows < 0).any())
+        extra = {c: take(df2[c].array, rows, allow_fill=fill) for c in columns}
+        if merged_on is not None:
+            extra["merged_on"] = np.where(pick >= 0, merged_on, None)
+        if scores is not None:
+            extra["match_score"] = np.append(scores, nan)[pick]
+        for c, v in extra.items():
+            data[c + rsuffix if c in data else c] = v
+    return pd.DataFrame(data, index=df1.index.take(base))
+
+
+def score_jaro_winkler(
+    s1: (pd.Series, tuple),
+    s2: (pd.Series, tuple),
+    candidates: tuple,
+    threshold: float = 0,
+) -> np.ndarray:
+    """
+    Scores the lowercased string similarity of candidate pairs of
+    values in two Series using the Jaro-Winkler algorithm. Each
+    distinct pair of values is only scored once, and pairs whose
+    lengths and characters prove they can't reach threshold are not
+    scored at all.
+
+    Args:
+        s1: A pandas Series, or the normalized form of one from a
+            SupplementIndex.
+        s2: A pandas Series, or the normalized form of one from a
+            SupplementIndex.
+        candidates: A tuple of two numpy arrays, the positions of each
+            candidate pair of values in s1 and s2. See find_candidates.
+        threshold: A float. Pairs that are proven unable to score at
+            least this high are given a score of 0 instead of being
+            scored.
+
+    Returns: A numpy array of floats, one score for each candidate
+        pair. Pairs including a null value score 0.
+
+    """
+    codes1, strings1, stats1 = _normalize(s1) if isinstance(s1, pd.Series) else s1
+    codes2, strings2, stats2 = _normalize(s2) if isinstance(s2, pd.Series) else s2
+    codes1, codes2 = codes1[candidates[0]], codes2[candidates[1]]
+    scores = np.zeros(codes1.shape[0])
+    valid = (codes1 >= 0) & (codes2 >= 0)
+    # Reduce the candidates to the distinct pairs of unique values:
+    n2 = strings2.shape[0]
+    pairs, inverse = np.unique(
+        codes1[valid].astype(np.int64) * n2 + codes2[valid], return_inverse=True
+    )
+    u1, u2 = pairs // n2, pairs % n2
+    pair_scores = np.zeros(pairs.shape[0])
+    for i in range(0, pairs.shape[0], _SCORE_CHUNK):
+        c1, c2 = u1[i : i + _SCORE_CHUNK], u2[i : i + _SCORE_CHUNK]
+        # Allow for float error in the bounds:
+        possible = _jaro_winkler_bound(stats1, stats2, c1, c2) >= threshold - 1e-9
+        pair_scores[i : i + _SCORE_CHUNK][possible] = [
+            jellyfish.jaro_winkler_similarity(str(a), str(b))
+            for a, b in zip(strings1[c1[possible]], strings2[c2[possible]])
+        ]
+    scores[valid] = pair_scores[inverse]
+    return scores
+
+
+# The number of pairs of strings whose bounds are checked at a time,
+# which caps the memory used by the character counts:
+_SCORE_CHUNK = 50000
+
+
+def _normalize(s: pd.Series) -> tuple:
+    """
+    Prepares a Series for inexact matching.
+
+    Args:
+        s: A pandas Series.
+
+    Returns: A tuple of the Series' factorize codes, a numpy array of
+        its unique values as lowercase strings, and _string_stats of
+        those strings.
+
+    """
+    codes, uniques = pd.factorize(s)
+    strings = uniques.astype(str).str.lower().to_numpy(dtype=object)
+    return codes, strings, _string_stats(strings)
+
+
+def _normalized(df, column: str) -> tuple:
+    """
+    Gets the normalized form of a column in a DataFrame or
+    SupplementIndex.
 
     Args:
-        df1: A pandas DataFrame.
-        df2: A pandas DataFrame containing columns shared with df1.
-        on: A tuple of columns shared by df1 and df2, which will be
-            used to left join rows from df2 onto exact matches in
-            df1.
-        rsuffix: An optional suffix to use for overlapping columns
-            outside the on columns. Will only be applied to df2
-            columns.
+        df: A pandas DataFrame or a SupplementIndex.
+        column: A column label in df.
 
-    Returns: A DataFrame containing all the rows in df1, joined
-        with any matched rows from df2.
+    Returns: A tuple, see _normalize.
 
     """
-    return df1.merge(df2, "left", on=on, suffixes=("", rsuffix))
+    if isinstance(df, SupplementIndex):
+        return df.normalized(column)
+    return _normalize(df[column])
 
 
-def do_inexact(
+def _string_stats(strings: np.ndarray) -> tuple:
+    """
+    Collects the statistics _jaro_winkler_bound needs about each string.
+
+    Args:
+        strings: A numpy array of strings.
+
+    Returns: A tuple of numpy arrays: the length of each string, the
+        code points of each string's first 4 characters (-1 past the
+        end of the string), and counts of each string's characters
+        binned by code point modulo 128.
+
+    """
+    lengths = np.array([len(x) for x in strings], dtype=np.int64)
+    points = np.frombuffer("".join(strings).encode("utf-32-le"), dtype=np.uint32)
+    owners = np.repeat(np.arange(lengths.shape[0]), lengths)
+    counts = np.bincount(
+        owners * 128 + points % 128, minlength=lengths.shape[0] * 128
+    ).reshape(-1, 128)
+    prefixes = np.full((lengths.shape[0], 4), -1, dtype=np.int64)
+    starts = np.cumsum(lengths) - lengths
+    for k in range(4):
+        long_enough = lengths > k
+        prefixes[long_enough, k] = points[starts[long_enough] + k]
+    return lengths, prefixes, counts.astype(np.uint16)
+
+
+def _jaro_winkler_bound(
+    stats1: tuple, stats2: tuple, idx1: np.ndarray, idx2: np.ndarray
+) -> np.ndarray:
+    """
+    Calculates an upper bound of the Jaro-Winkler similarity of pairs of
+    strings without comparing them. Jaro similarity is the average of
+    m/len1, m/len2 and (m - t)/m, where m is the number of matching
+    characters and t the number of transpositions, so it can be no
+    higher than if every character the two strings have in common
+    matched without transpositions. Winkler's bonus depends only on the
+    shared prefix.
+
+    Args:
+        stats1: A tuple of statistics from _string_stats.
+        stats2: A tuple of statistics from _string_stats.
+        idx1: A numpy array of indices in stats1.
+        idx2: A numpy array of indices in stats2, the same length as
+            idx1.
+
+    Returns: A numpy array of floats, the bound for each pair.
+
+    """
+    len1, len2 = stats1[0][idx1], stats2[0][idx2]
+    common = np.minimum(stats1[2][idx1], stats2[2][idx2]).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        jaro = np.where(common > 0, (common / len1 + common / len2 + 1) / 3, 0)
+    pre1, pre2 = stats1[1][idx1], stats2[1][idx2]
+    prefix = np.cumprod((pre1 == pre2) & (pre1 >= 0), axis=1).sum(axis=1)
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def find_candidates(
     df1: pd.DataFrame,
-    df2: pd.DataFrame,
+    df2,
     on: tuple,
-    thresholds: tuple,
     block: tuple = None,
-    rsuffix: str = "_s",
-) -> pd.DataFrame:
+    blocking: tuple = None,
+    rows: np.ndarray = None,
+    unordered: bool = False,
+    nulls: bool = False,
+) -> tuple:
     """
-    Merges two DataFrames with overlapping columns based on inexact
-    matches in those columns.
+    Finds the pairs of rows in two DataFrames that should be compared
+    when inexactly matching them. Without block or blocking, every row
+    in df1 is paired with every row in df2.
+
+    Blocking methods derive keys from the lowercased values in the
+    first on column, and only pair rows that share a key:
+        sorted_neighbourhood: Sorts the unique values in df2 and pairs
+            each value in df1 with the values within a window (default
+            3) of where it would be sorted.
+        qgram: Pairs values sharing a substring of length q (default
+            3).
+        prefix: Pairs values sharing their first n (default 3)
+            characters.
+        soundex/metaphone: Pairs values with the same phonetic code.
+        length: Pairs values whose lengths differ by at most n (default
+            2).
 
     Args:
         df1: A pandas DataFrame.
-        df2: A pandas DataFrame containing columns shared with df1.
-        on: A tuple of columns shared by df1 and df2, which will be
-            used to left join rows from df2 onto inexact matches in
-            df1.
-        thresholds: A tuple of floats, indicating how close each on
-            comparison must be to qualify the row as a match. Must
-            be the same length as on.
-        block: A tuple of columns shared by df1 and df2, similar to
-            on, which must represent an exact match between the two
-            frames. Useful when you can reduce the possible match
-            space of two datasets by restricting inexact matches to
-            records that at least have an exact match on a different
-            column.
-        rsuffix: An optional suffix to use for overlapping columns
-            outside the on columns. Will only be applied to df2
-            columns.
+        df2: A pandas DataFrame containing columns shared with df1, or
+            a SupplementIndex of one, in which case its precomputed
+            keys are used.
+        on: A tuple of columns shared by df1 and df2.
+        block: A tuple of columns shared by df1 and df2, which must
+            match exactly for a pair of rows to be a candidate.
+        blocking: A tuple of a method name from the list above and,
+            optionally, its integer parameter.
+        rows: A numpy array of positions in df2. If passed, only these
+            rows of df2 are paired.
+        unordered: A boolean. Pass True when df1 and df2 are the same
+            DataFrame to only pair each row with the rows after it,
+            so each unordered pair of rows is compared once.
+        nulls: A boolean. Pass True to pair rows whose block values
+            are both null, as pd.merge does, instead of never pairing
+            them.
+
+    Returns: A tuple of two numpy arrays of the same length, each pair
+        of values being the positions of a candidate pair of rows in
+        df1 and df2.
+
+    """
+    n2 = df2.df.shape[0] if isinstance(df2, SupplementIndex) else df2.shape[0]
+    if block is None and blocking is None:
+        rows = np.arange(n2) if rows is None else np.asarray(rows)
+        if unordered:
+            i, j = np.triu_indices(rows.shape[0], 1)
+            return rows[i], rows[j]
+        return (
+            np.repeat(np.arange(df1.shape[0]), rows.shape[0]),
+            np.tile(rows, df1.shape[0]),
+        )
+    if isinstance(df2, SupplementIndex):
+        vocab, indptr, indices, sorted_strings = df2.postings(
+            on[0], block, blocking, nulls
+        )
+    else:
+        vocab, indptr, indices, sorted_strings = _build_postings(
+            df2, on[0], block, blocking, nulls=nulls
+        )
+    pos1, keys1 = _row_keys(df1, on[0], block, blocking, sorted_strings, nulls=nulls)
+    codes = vocab.get_indexer(keys1)
+    pos1, codes = pos1[codes >= 0], codes[codes >= 0]
+    # Pair each row in df1 with every row in df2 sharing its key:
+    starts, counts = indptr[codes], indptr[codes + 1] - indptr[codes]
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    pos2 = indices[np.repeat(starts, counts) + offsets]
+    pos1 = np.repeat(pos1, counts)
+    if rows is not None:
+        allowed = np.zeros(n2, dtype=bool)
+        allowed[rows] = True
+        pos1, pos2 = pos1[allowed[pos2]], pos2[allowed[pos2]]
+    if unordered:
+        pos1, pos2 = pos1[pos1 < pos2], pos2[pos1 < pos2]
+    # Rows sharing multiple keys are only paired once:
+    pairs = np.unique(pos1 * n2 + pos2)
+    return pairs // n2, pairs % n2
 
-    Returns: A DataFrame containing all the rows in df1, joined
-        with any matched rows from df2.
+
+def _build_postings(
+    df: pd.DataFrame,
+    column: str,
+    block: tuple = None,
+    blocking: tuple = None,
+    normalized: tuple = None,
+    nulls: bool = False,
+) -> tuple:
+    """
+    Indexes the rows of a DataFrame by their blocking keys, so that
+    find_candidates can look up the rows sharing a key.
+
+    Args:
+        df: A pandas DataFrame.
+        column: The column in df blocking keys are derived from.
+        block: A tuple of columns in df that are part of each key.
+        blocking: A tuple of a blocking method and optionally its
+            parameter.
+        normalized: The normalized form of the column, if already
+            available. See _normalize.
+        nulls: See _row_keys.
+
+    Returns: A tuple of an Index of the unique keys, a numpy array of
+        where each key's rows start in the next array, a numpy array
+        of row positions sorted by key, and, if blocking is
+        sorted_neighbourhood, a sorted numpy array of the unique
+        lowercase strings in column, otherwise None.
 
     """
-    # The recordlinkage library is currently passing an argument
-    # to the underlying jellyfish library that jellyfish is going
-    # to deprecate eventually. Nothing we can do about that so just
-    # suppress it:
-    warnings.filterwarnings(
-        "ignore", message="the name 'jaro_winkler'", category=DeprecationWarning
+    sorted_strings = None
+    if blocking is not None and blocking[0] == "sorted_neighbourhood":
+        normalized = _normalize(df[column]) if normalized is None else normalized
+        sorted_strings = np.unique(normalized[1])
+    pos, keys = _row_keys(
+        df, column, block, blocking, sorted_strings, normalized, True, nulls
     )
-    idxr = link.Index()
-    idxr.block(block) if block is not None else idxr.full()
-    candidate_links = idxr.index(df1, df2)
-    compare = link.Compare()
-    # Create copies since contents of the Dataframe need to
-    # be changed.
-    frames = (df1.copy(), df2.copy())
+    codes, vocab = pd.factorize(keys)
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(vocab)))))
+    return vocab, indptr, pos[np.argsort(codes, kind="stable")], sorted_strings
 
-    for i, o in enumerate(on):
-        compare.string(o, o, method="jarowinkler", threshold=thresholds[i])
-        # Any columns containing strings should be lowercase to
-        # improve matching:
-        for f in frames:
-            if f.dtypes[o] == "O":
-                f[o] = f[o].astype(str).str.lower()
 
-    features = compare.compute(candidate_links, *frames)
-    matches = features[features.sum(axis=1) == len(on)].reset_index()
+class _NullKey:
+    """
+    The key null values are replaced with when they should match each
+    other. It is only equal to itself, and unpickles as the same
+    object, so it can be stored in a saved SupplementIndex.
+    """
+
+    def __reduce__(self):
+        return "_NULL_KEY"
+
+    def __repr__(self):
+        return "_NULL_KEY"
+
+
+_NULL_KEY = _NullKey()
+
+
+def _row_keys(
+    df: pd.DataFrame,
+    column: str,
+    block: tuple = None,
+    blocking: tuple = None,
+    sorted_strings: np.ndarray = None,
+    normalized: tuple = None,
+    right: bool = False,
+    nulls: bool = False,
+) -> tuple:
+    """
+    Generates the keys of each row in a DataFrame used by
+    find_candidates.
+
+    Args:
+        df: A pandas DataFrame.
+        column: The column in df blocking keys are derived from.
+        block: A tuple of columns in df that are part of each key.
+        blocking: A tuple of a blocking method and optionally its
+            parameter.
+        sorted_strings: See _blocking_keys.
+        normalized: The normalized form of the column, if already
+            available. See _normalize.
+        right: See _blocking_keys.
+        nulls: A boolean. If True, null values in block are replaced
+            with _NULL_KEY, so that they match each other.
+
+    Returns: A tuple of a numpy array of row positions and an Index of
+        the same length of their keys. Rows with multiple keys are
+        repeated, and rows with null keys are dropped.
+
+    """
+    block = list(u.tuplify(block)) if block is not None else []
+    frame = df[block].reset_index(drop=True)
+    if nulls:
+        for c in block:
+            if frame[c].isna().any():
+                frame[c] = frame[c].astype(object).where(frame[c].notna(), _NULL_KEY)
+    if blocking is not None:
+        codes, strings, _ = _normalize(df[column]) if normalized is None else normalized
+        keys = _blocking_keys(
+            strings, *blocking, right=right, sorted_strings=sorted_strings
+        )
+        row_keys = np.full(codes.shape[0], np.nan, dtype=object)
+        row_keys[codes >= 0] = keys[codes[codes >= 0]]
+        frame["_key"] = row_keys
+        frame = frame.explode("_key")
+        block.append("_key")
+    frame = frame.dropna(subset=block)
+    if len(block) > 1:
+        keys = pd.MultiIndex.from_frame(frame[block])
+    else:
+        keys = pd.Index(frame[block[0]], dtype=object)
+    return frame.index.to_numpy(dtype=np.int64), keys
+
+
+def _blocking_keys(
+    strings: np.ndarray,
+    method: str,
+    param: int = None,
+    right: bool = False,
+    sorted_strings: np.ndarray = None,
+) -> np.ndarray:
+    """
+    Generates the blocking keys of unique strings.
+
+    Args:
+        strings: A numpy array of unique lowercase strings.
+        method: A string, one of the keys of guides.BLOCKING_METHODS.
+        param: An integer, the method's parameter. Uses the method's
+            default if not passed.
+        right: A boolean, indicates whether the strings are from the
+            DataFrame being matched against. Some methods give those
+            strings a single key and the others every key they should
+            be compared with.
+        sorted_strings: Required by sorted_neighbourhood, the sorted
+            unique strings of the DataFrame being matched against.
+
+    Returns: A numpy array of keys, each of which is either a single
+        value or a list of values for strings in multiple blocks.
+
+    """
+    param = gd.BLOCKING_METHODS[method] if param is None else param
+    if method == "sorted_neighbourhood":
+        ranks = np.searchsorted(sorted_strings, strings)
+        if right:
+            keys = ranks
+        else:
+            # Values between two sorted values are a half step off, so
+            # their window covers one less sorted value:
+            found = np.zeros(strings.shape[0], dtype=bool)
+            in_range = ranks < sorted_strings.shape[0]
+            found[in_range] = sorted_strings[ranks[in_range]] == strings[in_range]
+            half = param // 2
+            keys = [list(range(r - half, r + half + f)) for r, f in zip(ranks, found)]
+    elif method == "length":
+        lengths = [len(x) for x in strings]
+        keys = (
+            lengths
+            if right
+            else [list(range(n - param, n + param + 1)) for n in lengths]
+        )
+    elif method == "qgram":
+        keys = [
+            list({x[i : i + param] for i in range(len(x) - param + 1)}) or [x]
+            for x in strings
+        ]
+    elif method == "prefix":
+        keys = [x[:param] for x in strings]
+    else:
+        keys = [getattr(jellyfish, method)(x) for x in strings]
+    result = np.empty(strings.shape[0], dtype=object)
+    result[:] = keys
+    return result
+
+
+def plan_rows(plan: tuple, df: pd.DataFrame) -> list:
+    """
+    Finds the rows of a DataFrame that fall into each SupplementGuide
+    in a plan, the same way chunk_dframes does, without copying them.
+
+    Args:
+        plan: A tuple of SupplementGuide objects created by build_plan.
+        df: A pandas DataFrame with the column labels named in the plan.
+
+    Returns: A list of numpy arrays, one for each SupplementGuide in
+        the plan, of the positions of the rows in that guide's chunk.
+
+    """
+    ids = plan_ids(plan, df)
+    order = np.argsort(ids, kind="stable")
+    counts = np.bincount(ids, minlength=len(plan) + 1)
+    return np.split(order, np.cumsum(counts)[:-1])[: len(plan)]
+
+
+def plan_ids(plan: tuple, df: pd.DataFrame) -> np.ndarray:
+    """
+    Assigns each row of a DataFrame to the first SupplementGuide in a
+    plan whose conditions it meets.
+
+    Args:
+        plan: A tuple of SupplementGuide objects created by build_plan.
+        df: A pandas DataFrame with the column labels named in the plan.
+
+    Returns: A numpy array of integers, one for each row in df, of the
+        index of the row's SupplementGuide in plan, or len(plan) if the
+        row doesn't meet any of their conditions.
+
+    """
+    if len(plan) == 0:
+        return np.zeros(df.shape[0], dtype=np.int64)
+    return np.select(
+        [_condition_mask(df, p.output("conditions")) for p in plan],
+        np.arange(len(plan)),
+        len(plan),
+    )
+
+
+def plan_columns(plan: tuple) -> list:
+    """
+    Lists the columns a plan chunks and matches DataFrames on.
+
+    Args:
+        plan: A tuple of SupplementGuide objects created by build_plan.
+
+    Returns: A list of column labels.
+
+    """
+    columns = []
+    for sg in plan:
+        for c in (*sg.on, *(sg.block or ()), *sg.conditions.keys()):
+            if c is not None and c not in columns:
+                columns.append(c)
+    return columns
+
+
+def _condition_mask(df: pd.DataFrame, conditions: dict) -> np.ndarray:
+    """
+    Finds the rows of a DataFrame that match all the passed conditions.
+
+    Args:
+        df: A pandas Dataframe containing the column_labels in
+            conditions.keys()
+        conditions: A dictionary of paired column_labels and tuples
+            of values to match against. A None key matches every row.
+
+    Returns: A numpy array of booleans, one for each row in df.
+
+    """
+    mask = np.ones(df.shape[0], dtype=bool)
+    for k, v in conditions.items():
+        if k is not None:
+            mask &= df[k].isin(v).to_numpy()
+    return mask
+
+
+class SupplementIndex:
+    """
+    Precomputes what GeniusAccessor.supplement needs to match other
+    DataFrames against a DataFrame: the lowercased unique values of its
+    on columns, and its rows indexed by their exact and blocking keys.
+    Build one for a reference DataFrame that gets supplemented against
+    repeatedly, save it, and pass it to supplement in place of the
+    DataFrame.
+    """
+
+    def __init__(self, df: pd.DataFrame, on: (str, list, tuple) = None):
+        """
+
+        Args:
+            df: A pandas DataFrame.
+            on: The same on argument you will pass to supplement. Any
+                SupplementGuides that aren't passed here are indexed
+                the first time they're used.
+        """
+        self.df: pd.DataFrame = df
+        self._normalized: dict = dict()
+        self._postings: dict = dict()
+        self._fingerprint: str = None
+        if on is not None:
+            for sg in build_plan(prep_ons(on)):
+                if not sg.inexact:
+                    self.postings(sg.on[0], sg.on, nulls=True)
+                    continue
+                for o in sg.on:
+                    self.normalized(o)
+                if sg.block is not None or sg.blocking is not None:
+                    self.postings(sg.on[0], sg.block, sg.blocking)
+
+    def normalized(self, column: str) -> tuple:
+        """
+        Gets the normalized form of a column, see _normalize.
+
+        Args:
+            column: A column label in the indexed DataFrame.
+
+        Returns: A tuple of the column's codes, unique lowercase
+            strings, and their _string_stats.
+
+        """
+        if column not in self._normalized:
+            self._normalized[column] = _normalize(self.df[column])
+        return self._normalized[column]
+
+    def postings(
+        self,
+        column: str,
+        block: tuple = None,
+        blocking: tuple = None,
+        nulls: bool = False,
+    ):
+        """
+        Gets the rows of the indexed DataFrame indexed by their keys,
+        see _build_postings.
+
+        Args:
+            column: The column blocking keys are derived from.
+            block: A tuple of columns that are part of each key.
+            blocking: A tuple of a blocking method and optionally its
+                parameter.
+            nulls: See _row_keys.
+
+        Returns: A tuple, see _build_postings.
+
+        """
+        block = u.tuplify(block)
+        blocking = u.tuplify(blocking)
+        k = (column if blocking is not None else None, block, blocking, nulls)
+        if k not in self._postings:
+            normalized = self.normalized(column) if blocking is not None else None
+            self._postings[k] = _build_postings(
+                self.df, column, block, blocking, normalized, nulls
+            )
+        return self._postings[k]
+
+    def fingerprint(self) -> str:
+        """
+        Fingerprints the indexed DataFrame, see _frame_fingerprint. The
+        DataFrame is only hashed the first time, since the index is
+        reused between calls.
+
+        Returns: A string, a hex digest.
+
+        """
+        if self._fingerprint is None:
+            self._fingerprint = _frame_fingerprint(self.df)
+        return self._fingerprint
+
+    def save(self, path: str) -> None:
+        """
+        Saves the SupplementIndex to a directory. The indexed DataFrame
+        is pickled and the arrays are saved as .npy files, which load
+        memory-mapped.
+
+        Args:
+            path: The path to a directory, which will be created if it
+                doesn't exist.
+
+        Returns: None
+
+        """
+        os.makedirs(path, exist_ok=True)
+        self.df.to_pickle(os.path.join(path, "frame.pkl"))
+        manifest = dict(
+            normalized=dict(), postings=dict(), fingerprint=self.fingerprint()
+        )
+        arrays = dict()
+        for i, (c, (codes, strings, stats)) in enumerate(self._normalized.items()):
+            manifest["normalized"][c] = f"n{i}"
+            arrays[f"n{i}_codes"] = codes
+            # Fixed width strings can be memory-mapped, unlike objects:
+            arrays[f"n{i}_strings"] = strings.astype(str)
+            for j, stat in enumerate(stats):
+                arrays[f"n{i}_stat{j}"] = stat
+        for i, (k, (vocab, indptr, indices, s_strings)) in enumerate(
+            self._postings.items()
+        ):
+            manifest["postings"][k] = (f"p{i}", vocab, s_strings is not None)
+            arrays[f"p{i}_indptr"] = indptr
+            arrays[f"p{i}_indices"] = indices
+            if s_strings is not None:
+                arrays[f"p{i}_sorted"] = s_strings.astype(str)
+        for name, arr in arrays.items():
+            np.save(os.path.join(path, name + ".npy"), arr)
+        with open(os.path.join(path, "manifest.pkl"), "wb") as f:
+            pickle.dump(manifest, f)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Loads a SupplementIndex saved with save.
+
+        Args:
+            path: The path to a directory containing a saved
+                SupplementIndex.
+
+        Returns: A SupplementIndex.
+
+        """
+
+        def load_array(name):
+            return np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+
+        with open(os.path.join(path, "manifest.pkl"), "rb") as f:
+            manifest = pickle.load(f)
+        index = cls(pd.read_pickle(os.path.join(path, "frame.pkl")))
+        index._fingerprint = manifest.get("fingerprint")
+        for c, name in manifest["normalized"].items():
+            stats = tuple(load_array(f"{name}_stat{j}") for j in range(3))
+            index._normalized[c] = (
+                load_array(f"{name}_codes"),
+                load_array(f"{name}_strings"),
+                stats,
+            )
+        for k, (name, vocab, has_sorted) in manifest["postings"].items():
+            index._postings[k] = (
+                vocab,
+                load_array(f"{name}_indptr"),
+                load_array(f"{name}_indices"),
+                load_array(f"{name}_sorted") if has_sorted else None,
+            )
+        return index
+
+
+def _frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Fingerprints a DataFrame's columns, dtypes and values.
+
+    Args:
+        df: A pandas DataFrame.
+
+    Returns: A string, a hex digest.
+
+    """
+    h = hashlib.sha1()
+    h.update(repr((list(df.columns), list(df.dtypes.astype(str)))).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class SupplementCache:
+    """
+    Stores the results of GeniusAccessor.supplement in a directory, so
+    that supplementing a DataFrame again only has to match the rows
+    with on values it hasn't seen before. Results are keyed by a hash of
+    each row's values in the columns the plan uses, and kept separately
+    for each fingerprint of the other DataFrames and the supplement
+    arguments, so a changed reference never returns stale matches.
+    """
+
+    def __init__(self, path: str):
+        """
+
+        Args:
+            path: The path to a directory, which will be created if it
+                doesn't exist.
+        """
+        self.path: str = path
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def row_hashes(plan: tuple, df: pd.DataFrame) -> np.ndarray:
+        """
+        Hashes the values each row of a DataFrame has in the columns a
+        plan uses to chunk and match it.
+
+        Args:
+            plan: A tuple of SupplementGuide objects created by
+                build_plan.
+            df: A pandas DataFrame with the column labels named in the
+                plan.
+
+        Returns: A numpy array of uint64 hashes, one for each row in df.
+
+        """
+        return pd.util.hash_pandas_object(
+            df[plan_columns(plan)], index=False
+        ).to_numpy()
+
+    @staticmethod
+    def fingerprint(plan: tuple, columns: list, others: tuple, *args) -> str:
+        """
+        Fingerprints everything besides the primary DataFrame's rows
+        that supplement's results depend on.
+
+        Args:
+            plan: A tuple of SupplementGuide objects created by
+                build_plan.
+            columns: A list of the primary DataFrame's columns, which
+                decide which of the other DataFrames' columns get
+                suffixes.
+            others: A tuple of DataFrames or SupplementIndexes. Chunked
+                DataFrames can only be read once, so they can't be
+                fingerprinted.
+            *args: Any other arguments passed to supplement.
+
+        Returns: A string, a hex digest.
+
+        """
+        for o in others:
+            if not isinstance(o, (pd.DataFrame, SupplementIndex)):
+                raise ValueError(
+                    f"cache can only be used with DataFrames or "
+                    f"SupplementIndexes, not chunked frames: {type(o)}. Load "
+                    f"them into memory or supplement without cache."
+                )
+        h = hashlib.sha1()
+        guides = [
+            (
+                sg.on,
+                sg.conditions,
+                sg.thresholds,
+                sg.block,
+                sg.inexact,
+                sg.blocking,
+                sg.reorder_on,
+                sg.top_k,
+                sg.method,
+                sg.tolerances,
+            )
+            for sg in plan
+        ]
+        h.update(repr((guides, list(columns), args)).encode())
+        for o in others:
+            if isinstance(o, SupplementIndex):
+                h.update(o.fingerprint().encode())
+            else:
+                h.update(_frame_fingerprint(o).encode())
+        return h.hexdigest()
+
+    def load(self, fingerprint: str) -> pd.DataFrame:
+        """
+        Loads the results stored for a fingerprint.
+
+        Args:
+            fingerprint: A string returned by fingerprint.
+
+        Returns: A DataFrame of the columns supplement joined onto each
+            row, with a _row_hash column containing the row's hash.
+            It's empty if nothing is stored for fingerprint yet.
+
+        """
+        file = os.path.join(self.path, fingerprint + ".pkl")
+        if not os.path.exists(file):
+            return pd.DataFrame(dict(_row_hash=np.zeros(0, dtype=np.uint64)))
+        return pd.read_pickle(file)
+
+    def save(self, fingerprint: str, matches: pd.DataFrame) -> None:
+        """
+        Stores the results for a fingerprint, replacing any stored
+        before.
+
+        Args:
+            fingerprint: A string returned by fingerprint.
+            matches: A DataFrame, see load.
 
-    a = matches.join(df1, on="level_0", how="outer", rsuffix="")
-    b = a.join(df2, on="level_1", how="left", rsuffix=rsuffix)
-    drop_cols = ["level_0", "level_1", *[i for i in range(len(on))]]
-    b.drop(columns=drop_cols, inplace=True)
-    return b
+        Returns: None
+
+        """
+        matches.to_pickle(os.path.join(self.path, fingerprint + ".pkl"))
+
+    @staticmethod
+    def join(
+        plan: tuple, df: pd.DataFrame, hashes: np.ndarray, matches: pd.DataFrame
+    ) -> tuple:
+        """
+        Joins stored results onto the rows of a DataFrame, in the same
+        order supplement would return them.
+
+        Args:
+            plan: A tuple of SupplementGuide objects created by
+                build_plan.
+            df: A pandas DataFrame.
+            hashes: A numpy array of the row_hashes of df.
+            matches: A DataFrame, see load, containing every hash in
+                hashes.
+
+        Returns: A tuple of a DataFrame of the matched rows and a
+            DataFrame of the unmatched rows, containing only df's
+            columns.
+
+        """
+        order = np.argsort(matches["_row_hash"].to_numpy(), kind="stable")
+        sorted_hashes = matches["_row_hash"].to_numpy()[order]
+        starts = np.searchsorted(sorted_hashes, hashes, "left")
+        counts = np.searchsorted(sorted_hashes, hashes, "right") - starts
+        base = np.repeat(np.arange(df.shape[0]), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        picks = order[np.repeat(starts, counts) + offsets]
+        matches = matches.drop(columns="_row_hash")
+        if "merged_on" in matches.columns:
+            matched = matches["merged_on"].notna().to_numpy()[picks]
+        else:
+            matched = np.zeros(picks.shape[0], dtype=bool)
+        # Supplement returns the rows chunk by chunk, matched rows first:
+        ids = plan_ids(plan, df)[base]
+        rows = np.lexsort((np.arange(base.shape[0]), ids, ~matched))
+        base, picks, matched = base[rows], picks[rows], matched[rows]
+        take = pd.api.extensions.take
+        data = {c: take(df[c].array, base[matched]) for c in df.columns}
+        for c in matches.columns:
+            data[c] = take(matches[c].array, picks[matched])
+        return (
+            pd.DataFrame(data, index=df.index.take(base[matched])),
+            df.iloc[base[~matched]],
+        )
+
+
+class SupplementStage:
+    """
+    Stages the frames GeniusAccessor.supplement matches into a temporary
+    sqlite database, with indexes on the columns each SupplementGuide
+    joins on. Exact matches and blocked inexact candidates are found in
+    SQL and streamed back in chunks, and only the matched rows of the
+    other frames are ever read back, so the other frames never need to
+    fit in memory.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        plan: tuple,
+        df: pd.DataFrame,
+        others: dict,
+        chunksize: int = 50000,
+    ):
+        """
+
+        Args:
+            path: The path to a directory to create the temporary
+                database in.
+            plan: A tuple of SupplementGuide objects created by
+                build_plan. Inexact guides must not use blocking,
+                tolerances or the tfidf method.
+            df: The primary pandas DataFrame.
+            others: A dictionary of the other frames, keyed by their
+                position in supplement's other argument. Each can be a
+                pandas DataFrame, or an iterable of DataFrames (like
+                pandas.read_csv with chunksize) for frames that don't
+                fit in memory.
+            chunksize: An integer, the number of rows staged and
+                streamed back at a time.
+        """
+        for sg in plan:
+            if (
+                sg.blocking
+                or sg.tolerances
+                or (sg.inexact and sg.method != "jaro_winkler")
+            ):
+                raise ValueError(
+                    f"Staged supplements only support exact matches and "
+                    f"jaro_winkler inexact matches with block columns. "
+                    f"Invalid SupplementGuide on={sg.on}"
+                )
+        self.plan: tuple = plan
+        self.chunksize: int = chunksize
+        # An empty frame of each staged frame's columns, with the dtypes
+        # its chunks would have if they were concatenated:
+        self._empty: dict = dict()
+        fd, self._db_path = tempfile.mkstemp(suffix=".db", dir=path)
+        os.close(fd)
+        self.db = odbc.ODBConnector()
+        self.db.setup(self._db_path)
+        self._stage("p", [df[plan_columns(plan)]])
+        self.db.new_index("p", "_plan")
+        indexes = {((sg.block or ()) if sg.inexact else sg.on) for sg in plan}
+        for i, o in others.items():
+            self._stage(f"o{i}", [o] if isinstance(o, pd.DataFrame) else o)
+            for joined in indexes:
+                self.db.new_index(f"o{i}", "_plan", *joined)
+
+    def _stage(self, table: str, chunks) -> None:
+        """
+        Inserts a frame into a new table, with each row's position in
+        the frame and its plan_ids. Nulls are stored as NULL and bools
+        as numbers, rather than as their string representations.
+
+        Args:
+            table: The name of the table.
+            chunks: An iterable of pandas DataFrames.
+
+        Returns: None
+
+        """
+        n = 0
+        for chunk in chunks:
+            chunk = chunk.assign(
+                _pos=np.arange(n, n + chunk.shape[0]),
+                _plan=plan_ids(self.plan, chunk),
+            )
+            self._empty[table] = pd.concat([self._empty.get(table), chunk.iloc[:0]])
+            for c, dtype in chunk.dtypes.items():
+                # Bools and nullable numbers would be stored as strings:
+                if pd.api.types.is_bool_dtype(dtype) or (
+                    isinstance(dtype, pd.api.extensions.ExtensionDtype)
+                    and pd.api.types.is_numeric_dtype(dtype)
+                ):
+                    chunk[c] = chunk[c].astype(float)
+            if n == 0:
+                self.db.new_tbl(table, odbc.gen_schema(chunk))
+            chunk = chunk.astype(object).where(chunk.notna(), nan)
+            for i in range(0, chunk.shape[0], self.chunksize):
+                self.db.insert(table, chunk.iloc[i : i + self.chunksize])
+            n += chunk.shape[0]
+
+    def columns(self, i: int) -> list:
+        """
+        Lists the columns of a staged other frame.
+
+        Args:
+            i: The key of the other frame in others.
+
+        Returns: A list of column labels.
+
+        """
+        return [c for c in self.db.schemas[f"o{i}"] if c not in ("_pos", "_plan")]
+
+    def dtypes(self, i: int) -> pd.Series:
+        """
+        Gets the dtypes of a staged other frame.
+
+        Args:
+            i: The key of the other frame in others.
+
+        Returns: A pandas Series of the dtype of each of the frame's
+            columns.
+
+        """
+        return self._empty[f"o{i}"].dtypes.drop(["_pos", "_plan"])
+
+    def size(self, i: int, k: int) -> int:
+        """
+        Counts the rows of an other frame in a SupplementGuide's chunk.
+
+        Args:
+            i: The key of the other frame in others.
+            k: The position of the SupplementGuide in the plan.
+
+        Returns: An integer.
+
+        """
+        query = f"SELECT COUNT(*) AS n FROM o{i} WHERE _plan = :k"
+        return int(next(self.db.select_chunks(query, k=k))["n"][0])
+
+    def match(self, i: int, k: int, sg: gd.SupplementGuide) -> tuple:
+        """
+        Finds the pairs of rows in the primary frame and an other frame
+        that a SupplementGuide matches. Like pandas.merge, null on
+        values match each other in exact matches, but like the in
+        memory blocks of match_inexact, null block values never match.
+
+        Args:
+            i: The key of the other frame in others.
+            k: The position of sg in the plan.
+            sg: A SupplementGuide.
+
+        Returns: A tuple of three numpy arrays, see match_inexact. The
+            positions are in the whole primary and other frames, and
+            the scores are None for exact matches.
+
+        """
+        compared = sg.on if sg.inexact else ()
+        joined = (sg.block or ()) if sg.inexact else sg.on
+        query = (
+            "SELECT p._pos AS pos1, o._pos AS pos2"
+            + "".join(
+                f', p."{c}" AS l{j}, o."{c}" AS r{j}' for j, c in enumerate(compared)
+            )
+            + f" FROM p JOIN o{i} AS o ON o._plan = p._plan"
+            + "".join(
+                f' AND o."{c}" {"=" if sg.inexact else "IS"} p."{c}"' for c in joined
+            )
+            + " WHERE p._plan = :k ORDER BY p._pos, o._pos"
+        )
+        matches = [(np.zeros(0, dtype=np.int64),) * 2 + (np.zeros(0),)]
+        pending = matches[0]
+        for chunk in self.db.select_chunks(query, self.chunksize, k=k):
+            m1, m2 = chunk["pos1"].to_numpy(), chunk["pos2"].to_numpy()
+            total = np.zeros(m1.shape[0])
+            idx = np.arange(m1.shape[0])
+            for j, threshold in enumerate(sg.thresholds if sg.inexact else ()):
+                scores = score_jaro_winkler(
+                    chunk[f"l{j}"], chunk[f"r{j}"], (idx, idx), threshold
+                )
+                passed = scores >= threshold
+                idx, total = idx[passed], total[passed] + scores[passed]
+            if sg.top_k is None:
+                matches.append((m1[idx], m2[idx], total))
+                continue
+            # A row's candidates can span chunks, so its best matches are
+            # only picked once the next row's candidates start:
+            pending = tuple(
+                np.concatenate(x) for x in zip(pending, (m1[idx], m2[idx], total))
+            )
+            done = pending[0] < m1[-1]
+            best = _top_k(pending[0][done], pending[2][done], sg.top_k)
+            matches.append(tuple(x[done][best] for x in pending))
+            pending = tuple(x[~done] for x in pending)
+        if sg.top_k is not None:
+            best = _top_k(pending[0], pending[2], sg.top_k)
+            matches.append(tuple(x[best] for x in pending))
+        pos1, pos2, total = [np.concatenate(x) for x in zip(*matches)]
+        return pos1, pos2, total / len(sg.on) if sg.inexact else None
+
+    def fetch(self, i: int, positions: np.ndarray) -> tuple:
+        """
+        Reads rows of an other frame back from the database.
+
+        Args:
+            i: The key of the other frame in others.
+            positions: A numpy array of the positions of rows in the
+                other frame.
+
+        Returns: A tuple of a DataFrame of the rows, with the dtypes
+            they had in the other frame where they can be restored, and
+            a numpy array of where each of positions is in it.
+
+        """
+        wanted = np.unique(positions)
+        self.db.drop_tbl("w")
+        self.db.new_tbl("w", dict(_pos=int))
+        for j in range(0, wanted.shape[0], self.chunksize):
+            self.db.insert("w", pd.DataFrame(dict(_pos=wanted[j : j + self.chunksize])))
+        query = f"SELECT o.* FROM o{i} AS o JOIN w ON o._pos = w._pos ORDER BY o._pos"
+        rows = pd.concat(
+            self.db.select_chunks(query, self.chunksize), ignore_index=True
+        )
+        rows = rows.drop(columns=["_pos", "_plan"])
+        rows = restore_dtypes(rows, self.dtypes(i).to_dict())
+        return rows, np.searchsorted(wanted, positions)
+
+    def close(self) -> None:
+        """
+        Deletes the temporary database.
+
+        Returns: None
+
+        """
+        self.db.engine.dispose()
+        os.remove(self._db_path)
 
 
 def chunk_dframes(plan: tuple, *frames) -> tuple:
     """
     Takes any number of pandas DataFrames and breaks each one into
-    chunks based on a chunking plan of SupplementGuide objects.
+    chunks based on a chunking plan of SupplementGuide objects. Each
+    row goes into the chunk of the first SupplementGuide whose
+    conditions it meets. The passed DataFrames are not modified.
 
     Args:
         plan: A tuple of SupplementGuide objects created by
@@ -112,20 +2458,22 @@ def chunk_dframes(plan: tuple, *frames) -> tuple:
             which must have the column labels named in the plan.
 
     Returns: Plan, with each SupplementGuide in the plan now having the
-        chunk of rows that match its conditions, and the first
-        DataFrame from frames, which contains any remaining rows
-        that didn't match any of the conditions.
+        chunk of rows that match its conditions, and a DataFrame
+        containing any rows from the first DataFrame in frames that
+        didn't match any of the conditions.
 
     """
-    df1 = frames[0]
-    for i, df in enumerate(frames):
-        for p in plan:
-            conditions = p.output("conditions")
-            match, result = slice_dframe(df, conditions)
-            p.append(match)
-            if result:
-                df.drop(match.index, inplace=True)
-    return plan, df1
+    for p in plan:
+        p.clear()
+    remainder = None
+    for df in frames:
+        ids = plan_ids(plan, df)
+        chunks = dict(tuple(df.groupby(ids, sort=False)))
+        for i, p in enumerate(plan):
+            p.append(chunks.get(i, df.iloc[:0]))
+        if remainder is None:
+            remainder = chunks.get(len(plan), df.iloc[:0])
+    return plan, remainder
 
 
 def slice_dframe(df: pd.DataFrame, conditions: dict) -> tuple:
@@ -146,16 +2494,9 @@ def slice_dframe(df: pd.DataFrame, conditions: dict) -> tuple:
         the DataFrame is simply being returned untouched.
 
     """
-    df = df.copy()
-    row_ct = df.shape[0]
-    no_conditions = True
-    for k, v in conditions.items():
-        if k is not None:
-            no_conditions = False
-            df = df[df[k].isin(v)]
-    new_ct = df.shape[0]
-    result = True if (row_ct >= new_ct != 0 or no_conditions) else False
-    return df, result
+    mask = _condition_mask(df, conditions)
+    no_conditions = all(k is None for k in conditions.keys())
+    return df[mask], bool(mask.any() or no_conditions)
 
 
 def build_plan(on: tuple) -> tuple:
@@ -244,3 +2585,65 @@ def prep_suffixes(suffixes: (str, tuple), frame_ct: int) -> tuple:
             f"{len(suffixes)}, suffixes={suffixes}"
         )
     return suffixes
+
+
+def source_dtypes(df: pd.DataFrame, dtypes: list, suffixes: tuple) -> dict:
+    """
+    Finds the dtypes that the columns GeniusAccessor.supplement joins
+    onto a DataFrame had in the other frames, by the labels they're
+    joined under.
+
+    Args:
+        df: The pandas DataFrame being supplemented.
+        dtypes: A list of pandas Series, the dtypes of each other
+            frame's columns.
+        suffixes: A tuple of suffixes, see prep_suffixes.
+
+    Returns: A dictionary of column labels and dtypes. The columns of
+        df are left out, since joins never change them.
+
+    """
+    result = dict()
+    for o_dtypes, rsuffix in zip(dtypes, suffixes):
+        for c, dtype in o_dtypes.items():
+            label = c + rsuffix if c in df.columns or c in result else c
+            result.setdefault(label, dtype)
+    return result
+
+
+def restore_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """
+    Casts the columns of a DataFrame back to the dtypes they had in the
+    frames they came from, which joins with unmatched rows and round
+    trips through sqlite can change. Integer and bool columns that
+    contain nulls get float64 and object, the dtypes pandas fills them
+    with, so the result only depends on the values in df.
+
+    Args:
+        df: A pandas DataFrame.
+        dtypes: A dictionary of column labels and dtypes, see
+            source_dtypes.
+
+    Returns: A copy of df with its columns cast.
+
+    """
+    df = df.copy()
+    for c, dtype in dtypes.items():
+        if c not in df.columns:
+            continue
+        if isinstance(dtype, np.dtype) and dtype.kind in "biu" and df[c].isna().any():
+            dtype = np.dtype("float64") if dtype.kind in "iu" else np.dtype("O")
+        if df[c].dtype == dtype:
+            continue
+        try:
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                df[c] = pd.to_datetime(df[c]).astype(dtype)
+            elif pd.api.types.is_timedelta64_dtype(dtype):
+                df[c] = pd.to_timedelta(df[c]).astype(dtype)
+            else:
+                df[c] = df[c].astype(dtype)
+        except (TypeError, ValueError):
+            # Leaves values that can't be cast back, like the string
+            # representations of objects stored in sqlite, as they are:
+            pass
+    return df
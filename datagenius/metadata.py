@@ -64,10 +64,11 @@ class GeniusMetadata(Callable):
             new_kwargs = meta_result.get("new_kwargs")
             o_header = meta_result.get("orig_header")
             if metadata is not None:
-                metadata["transmutation"] = transmutation.__name__
-                stage = getattr(transmutation, "stage", "_no_stage")
-                metadata["stage"] = stage
-                self._intake(metadata, "_collected")
+                self.collect(
+                    metadata,
+                    transmutation.__name__,
+                    getattr(transmutation, "stage", "_no_stage"),
+                )
                 meta_result.pop("metadata")
             if rejects is not None:
                 self._intake(rejects, "_rejects")
@@ -78,6 +79,28 @@ class GeniusMetadata(Callable):
                 self._output_header = o_header
         return result, kwargs
 
+    def collect(
+        self, metadata: pd.DataFrame, transmutation: str, stage: str = "_no_stage"
+    ) -> None:
+        """
+        Adds metadata rows to collected. Used by track, and by functions
+        that aren't transmutations but still produce metadata.
+
+        Args:
+            metadata: A DataFrame of metadata. If it has stage or
+                transmutation columns, those labels are kept.
+            transmutation: A string, the name to label the rows with.
+            stage: A string, the stage to label the rows with.
+
+        Returns: None
+
+        """
+        if "transmutation" not in metadata.columns:
+            metadata["transmutation"] = transmutation
+        if "stage" not in metadata.columns:
+            metadata["stage"] = stage
+        self._intake(metadata, "_collected")
+
     def combine(self, other):
         """
         Combines the data in this GeniusMetadata object with the data
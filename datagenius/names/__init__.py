@@ -1,5 +1,15 @@
-from .namestring import Namestring
-from .nametoken import Nametoken
+from .name import ParsedName
+from .namestring import Namestring, parse_name_string
+from .nametoken import Nametoken, parse_name_tokens
+from .cache import NameCache
 from . import df_tms
 
-__all__ = ["Namestring", "Nametoken", "df_tms"]
+__all__ = [
+    "ParsedName",
+    "Namestring",
+    "Nametoken",
+    "parse_name_string",
+    "parse_name_tokens",
+    "NameCache",
+    "df_tms",
+]
@@ -0,0 +1,152 @@
+import os
+import uuid
+from typing import Dict, List, Union
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from datagenius.config import config
+from datagenius.io import odbc
+from datagenius.names.name import ParsedName
+
+
+class NameCache:
+    def __init__(
+        self, path: Union[str, Path], max_size: int = 1000000, chunksize: int = 50000
+    ) -> None:
+        """
+        Stores ParsedNames in a sqlite database, so that names seen in earlier
+        files don't need to be parsed again. Names are keyed by their raw string
+        and the version of the active config.patterns, so customizing the
+        patterns never returns stale results. Once there are more than max_size
+        names stored, the least recently used are evicted.
+        -
+        Args:
+            path (Union[str, Path]): The path to a directory to keep the database
+                in, which will be created if it doesn't exist.
+            max_size (int, optional): The most names to store. Defaults to
+                1000000.
+            chunksize (int, optional): The number of names written and read at a
+                time. Defaults to 50000.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.max_size = max_size
+        self.chunksize = chunksize
+        self.hits = 0
+        self.misses = 0
+        self.db = odbc.ODBConnector()
+        self.db.setup(os.path.join(path, "names.db"))
+        # Each NameCache stages names in its own working table, so that runs
+        # sharing a cache don't overwrite each other's:
+        self._work = f"w_{uuid.uuid4().hex}"
+        if "names" not in self.db.tables:
+            schema = dict(version=str, name=str)
+            schema.update({f: str for f in ParsedName._fields[:-1]})
+            schema.update(valid=int, used=int)
+            self.db.new_tbl("names", schema)
+            self.db.new_index("names", "version", "name")
+            self.db.new_index("names", "used")
+
+    def get(self, names: List[str]) -> Dict[str, ParsedName]:
+        """
+        Looks up names in the cache, and marks the ones found as recently used.
+        -
+        Args:
+            names (List[str]): A list of distinct raw name strings.
+        -
+        Returns:
+            Dict[str, ParsedName]: The ParsedNames of the names that were found.
+        """
+        results = dict()
+        if len(names) > 0:
+            self._stage(names)
+            query = (
+                f"SELECT n.* FROM names AS n JOIN {self._work} AS w "
+                "ON n.name = w.name WHERE n.version = :version"
+            )
+            for chunk in self.db.select_chunks(
+                query, self.chunksize, version=config.patterns.version
+            ):
+                chunk = chunk.astype(object).where(chunk.notna(), None)
+                for row in chunk.itertuples(index=False):
+                    results[row.name] = ParsedName(
+                        *[getattr(row, f) for f in ParsedName._fields[:-1]],
+                        valid=bool(row.valid),
+                    )
+            self.db.execute(
+                "UPDATE names SET used = :used WHERE version = :version "
+                f"AND name IN (SELECT name FROM {self._work})",
+                used=self._tick(),
+                version=config.patterns.version,
+            )
+        self.hits += len(results)
+        self.misses += len(names) - len(results)
+        return results
+
+    def put(self, names: List[str], parsed: List[ParsedName]) -> None:
+        """
+        Adds newly parsed names to the cache, evicting the least recently used
+        names if that puts it over max_size.
+        -
+        Args:
+            names (List[str]): A list of distinct raw name strings that aren't
+                in the cache.
+            parsed (List[ParsedName]): The ParsedName of each of names.
+        """
+        if len(names) == 0:
+            return
+        frame = pd.DataFrame(list(parsed), columns=ParsedName._fields)
+        frame.insert(0, "name", list(names))
+        frame.insert(0, "version", config.patterns.version)
+        frame["valid"] = frame["valid"].astype(int)
+        frame["used"] = self._tick()
+        # Nulls must be floats to be stored as NULL:
+        frame = frame.astype(object).where(frame.notna(), np.nan)
+        for i in range(0, frame.shape[0], self.chunksize):
+            self.db.insert("names", frame.iloc[i : i + self.chunksize])
+        excess = self.size() - self.max_size
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM names WHERE rowid IN "
+                "(SELECT rowid FROM names ORDER BY used LIMIT :excess)",
+                excess=excess,
+            )
+
+    def size(self) -> int:
+        """
+        Returns:
+            int: The number of names stored.
+        """
+        query = "SELECT COUNT(*) AS n FROM names"
+        return int(next(self.db.select_chunks(query))["n"][0])
+
+    def close(self) -> None:
+        """
+        Closes the connection to the database.
+        """
+        self.db.drop_tbl(self._work)
+        self.db.engine.dispose()
+
+    def _stage(self, names: List[str]) -> None:
+        """
+        Writes names to a working table, so they can be joined against the
+        cache.
+        -
+        Args:
+            names (List[str]): A list of raw name strings.
+        """
+        self.db.drop_tbl(self._work)
+        self.db.new_tbl(self._work, dict(name=str))
+        for i in range(0, len(names), self.chunksize):
+            chunk = pd.DataFrame(dict(name=names[i : i + self.chunksize]))
+            self.db.insert(self._work, chunk)
+
+    def _tick(self) -> int:
+        """
+        Returns:
+            int: One more than the most recent use of any name, which orders
+                names by how recently they were used without relying on clocks.
+        """
+        query = "SELECT COALESCE(MAX(used), 0) + 1 AS t FROM names"
+        return int(next(self.db.select_chunks(query))["t"][0])
@@ -1,11 +1,20 @@
-from typing import List
+from concurrent import futures
+from typing import List, Optional, Tuple, Callable, Any
 
+import numpy as np
 import pandas as pd
 
-from .namestring import Namestring
-from .nametoken import Nametoken
+from .name import ParsedName
+from .namestring import parse_name_string
+from .nametoken import parse_name_tokens
+from .cache import NameCache
 import datagenius.util as u
+import datagenius.metadata as md
 from datagenius import config
+from datagenius.gconfig import Patterns
+
+# The fewest distinct names worth starting a process pool for:
+_POOL_MIN = 10000
 
 
 def parse_name_string_column(
@@ -13,6 +22,10 @@ def parse_name_string_column(
     name_column: str,
     name_num: int = None,
     include_name2: bool = False,
+    workers: int = None,
+    cache: str = None,
+    cache_size: int = 1000000,
+    metadata: md.GeniusMetadata = None,
 ) -> pd.DataFrame:
     """
     Transmutation to parse a string in a single column in a DataFrame and break
@@ -27,27 +40,294 @@ def parse_name_string_column(
         include_name2 (bool): If name_column includes two people (e.g. Bob and
             Helen Parr), set this to True if you want to have the second name
             included in the appended names as well. Defaults to False.
+        workers (int): If passed and there are more than _POOL_MIN distinct
+            names, they are parsed in a pool of this many processes. Defaults
+            to None.
+        cache (str): The path to a directory. If passed, parsed names are stored
+            there, and names parsed by earlier calls with the same patterns
+            aren't parsed again. See NameCache. Defaults to None.
+        cache_size (int): The most names to keep in the cache. Defaults to
+            1000000.
+        metadata (md.GeniusMetadata): A GeniusMetadata object. If passed with
+            cache, the number of distinct names found in and missing from the
+            cache, and the hit rate, are collected under the stage 'names'.
+            Defaults to None.
     -
     Returns:
         pd.DataFrame: The passed DataFrame, with the data in the past column
             broken out into 6 additional columns, the 5 columns specified in
             datagenius' configuration, and an additional column 'valid' which
-            indicates whether the name in name_column is valid as a name.
+            indicates whether the name in name_column is valid as a name. Null
+            names are not valid, and neither are names that can be ruled out
+            without parsing them (see _screen_invalid_names), which have no
+            name components.
+    """
+    labels = _name_labels(name_num, include_name2)
+    # Each distinct name string is only parsed once. The extra trailing row
+    # is for null names, which have a code of -1:
+    codes, uniques = pd.factorize(df[name_column])
+    parsed = np.full((len(uniques) + 1, len(labels)), None, dtype=object)
+    valid = np.zeros(len(uniques) + 1, dtype=bool)
+    rows = np.flatnonzero(~_screen_invalid_names(pd.Series(uniques, dtype=object)))
+    names = list(uniques[rows])
+    if cache is None:
+        results = _parse_names(parse_name_string, names, workers)
+    else:
+        results = _parse_cached(names, cache, cache_size, workers, metadata)
+    parsed[rows], valid[rows] = _components(results, len(labels), include_name2)
+    return df.join(_name_frame(labels, parsed, valid, codes, df.index))
+
+
+def _screen_invalid_names(name_strings: pd.Series) -> np.ndarray:
+    """
+    Finds the name strings that Namestring would certainly find invalid, so they
+    don't need to be parsed: non-strings, and strings containing digits or with
+    fewer than two words that aren't invalid words. Strings with parentheses are
+    never ruled out, because Namestring extracts their contents as alt names.
+    -
+    Args:
+        name_strings (pd.Series): A Series of name strings.
+    -
+    Returns:
+        np.ndarray: A boolean array, True for each name string that is invalid.
+    """
+    lowered = name_strings.str.lower()
+    words = lowered.str.count(r"\S+") - lowered.str.count(
+        config.patterns.invalid_word_re.pattern
+    )
+    invalid = lowered.str.contains("[0-9]").fillna(False) | (words < 2)
+    has_parens = lowered.str.contains("(", regex=False).fillna(False)
+    # Non-strings are null once lowercased:
+    return (lowered.isna() | (invalid & ~has_parens)).to_numpy(dtype=bool)
+
+
+def parse_tokenized_names(
+    df: pd.DataFrame,
+    name_columns: List[str],
+    name_num: int = None,
+    include_name2: bool = False,
+    workers: int = None,
+) -> pd.DataFrame:
+    """
+    Transmutation to parse a name stored in several columns of a DataFrame (first,
+    middle and last name, or just first and last name) and standardize it into
+    its name components (prefix, fname, mname, lname, suffix).
+    -
+    Args:
+        df (pd.DataFrame): The DataFrame to transmute.
+        name_columns (List[str]): The column labels in df that contain the name,
+            in order.
+        name_num (int): See parse_name_string_column.
+        include_name2 (bool): See parse_name_string_column.
+        workers (int): See parse_name_string_column.
+    -
+    Returns:
+        pd.DataFrame: The passed DataFrame, with the same additional columns as
+            parse_name_string_column. Names with fewer than two tokens or with
+            digits are not valid, and have no name components.
+    """
+    labels = _name_labels(name_num, include_name2)
+    tokens = df[list(name_columns)]
+    # Each distinct combination of tokens is only parsed once:
+    codes = tokens.groupby(list(name_columns), sort=False, dropna=False).ngroup()
+    codes = codes.to_numpy()
+    _, first = np.unique(codes, return_index=True)
+    uniques = tokens.iloc[first].reset_index(drop=True)
+    parsed = np.full((len(uniques), len(labels)), None, dtype=object)
+    valid = np.zeros(len(uniques), dtype=bool)
+    rows = np.flatnonzero(~_screen_invalid_tokens(uniques))
+    token_lists = uniques.iloc[rows].astype(object).values.tolist()
+    results = _parse_names(parse_name_tokens, token_lists, workers)
+    parsed[rows], valid[rows] = _components(results, len(labels), include_name2)
+    return df.join(_name_frame(labels, parsed, valid, codes, df.index))
+
+
+def _screen_invalid_tokens(tokens: pd.DataFrame) -> np.ndarray:
+    """
+    Finds the rows of name tokens that Nametoken would certainly find invalid, so
+    they don't need to be parsed: rows with fewer than two string tokens, and
+    rows with digits in any token.
+    -
+    Args:
+        tokens (pd.DataFrame): A DataFrame of name tokens.
+    -
+    Returns:
+        np.ndarray: A boolean array, True for each row that is invalid.
+    """
+    is_str = tokens.applymap(lambda x: isinstance(x, str))
+    digits = np.zeros(tokens.shape[0], dtype=bool)
+    for c in tokens.columns:
+        s = tokens[c].where(is_str[c])
+        digits |= s.astype(object).str.contains("[0-9]").fillna(False).to_numpy()
+    non_str = (tokens.notna() & ~is_str).any(axis=1).to_numpy()
+    return (is_str.sum(axis=1).to_numpy() < 2) | digits | non_str
+
+
+def _name_labels(name_num: Optional[int], include_name2: bool) -> List[str]:
+    """
+    Generates the labels of the name component columns added by
+    parse_name_string_column and parse_tokenized_names.
+    -
+    Args:
+        name_num (Optional[int]): See parse_name_string_column.
+        include_name2 (bool): See parse_name_string_column.
+    -
+    Returns:
+        List[str]: The column labels.
     """
     suffix = str(name_num) if name_num else ""
     suffix2 = str(name_num + 1) if name_num else "2"
-    names = df[name_column].apply(Namestring)
     labels = u.broadcast_suffix(config.name_column_labels, suffix)
     if include_name2:
         labels += u.broadcast_suffix(config.name_column_labels, suffix2)
+    return labels
+
+
+def _name_frame(
+    labels: List[str],
+    parsed: np.ndarray,
+    valid: np.ndarray,
+    codes: np.ndarray,
+    index: pd.Index,
+) -> pd.DataFrame:
+    """
+    Builds the name component and valid columns for every row from the results
+    for each distinct name.
+    -
+    Args:
+        labels (List[str]): The name component column labels.
+        parsed (np.ndarray): A 2D array of the name components of each distinct
+            name.
+        valid (np.ndarray): A boolean array of whether each distinct name is
+            valid.
+        codes (np.ndarray): The position of each row's name in parsed and valid.
+        index (pd.Index): The index of the resulting DataFrame.
+    -
+    Returns:
+        pd.DataFrame: The name component columns and the valid column.
+    """
     name_df = pd.DataFrame(
-        names.apply(lambda n: n.to_list(force_name2=include_name2)).to_list(),
-        columns=labels,
+        {label: parsed[codes, i] for i, label in enumerate(labels)}, index=index
     )
-    name_df["valid"] = names.apply(lambda n: n.valid)
-    df = df.join(name_df)
-    return df
+    name_df["valid"] = valid[codes]
+    return name_df
+
+
+def _parse_names(
+    parse: Callable[[Any], ParsedName],
+    names: List[Any],
+    workers: Optional[int] = None,
+) -> List[ParsedName]:
+    """
+    Parses each of the passed names, in a process pool if there are enough of
+    them to be worth it.
+    -
+    Args:
+        parse (Callable[[Any], ParsedName]): parse_name_string or
+            parse_name_tokens.
+        names (List[Any]): The names to pass to parse.
+        workers (Optional[int], optional): The number of processes to use.
+            Defaults to None.
+    -
+    Returns:
+        List[ParsedName]: The ParsedName of each name.
+    """
+    if workers is None or workers < 2 or len(names) <= _POOL_MIN:
+        return [parse(n) for n in names]
+    batches = np.array_split(np.arange(len(names)), workers)
+    # The workers are sent the active patterns, which may have been customized:
+    with futures.ProcessPoolExecutor(
+        workers, initializer=_use_patterns, initargs=(config.patterns,)
+    ) as pool:
+        jobs = [
+            pool.submit(_parse_batch, parse, [names[i] for i in b]) for b in batches
+        ]
+        return [p for j in jobs for p in j.result()]
+
+
+def _parse_batch(
+    parse: Callable[[Any], ParsedName], names: List[Any]
+) -> List[ParsedName]:
+    """
+    Parses each of the passed names in a worker process. See _parse_names.
+    """
+    return [parse(n) for n in names]
 
 
-def parse_tokenized_names(df: pd.DataFrame, name_columns: List[str]) -> pd.DataFrame:
-    return df
+def _parse_cached(
+    names: List[str],
+    cache: str,
+    cache_size: int,
+    workers: Optional[int] = None,
+    metadata: md.GeniusMetadata = None,
+) -> List[ParsedName]:
+    """
+    Parses each of the passed name strings, unless it is stored in a NameCache,
+    and then stores the ones that were parsed.
+    -
+    Args:
+        names (List[str]): A list of distinct name strings.
+        cache (str): See parse_name_string_column.
+        cache_size (int): See parse_name_string_column.
+        workers (Optional[int], optional): See _parse_names.
+        metadata (md.GeniusMetadata, optional): See parse_name_string_column.
+    -
+    Returns:
+        List[ParsedName]: The ParsedName of each name.
+    """
+    store = NameCache(cache, cache_size)
+    try:
+        found = store.get(names)
+        new = [n for n in names if n not in found]
+        found.update(zip(new, _parse_names(parse_name_string, new, workers)))
+        store.put(new, [found[n] for n in new])
+    finally:
+        store.close()
+    if metadata is not None:
+        looked_up = store.hits + store.misses
+        metadata.collect(
+            pd.DataFrame(
+                dict(
+                    cache_hits=[store.hits],
+                    cache_misses=[store.misses],
+                    hit_rate=[store.hits / looked_up if looked_up else 0.0],
+                )
+            ),
+            "parse_name_string_column",
+            "names",
+        )
+    return [found[n] for n in names]
+
+
+def _components(
+    results: List[ParsedName], width: int, include_name2: bool
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lays out the name components of ParsedNames in an array.
+    -
+    Args:
+        results (List[ParsedName]): A list of ParsedNames.
+        width (int): The number of name components to keep.
+        include_name2 (bool): See parse_name_string_column.
+    -
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: A 2D array of the name components of each
+            name, and a boolean array of whether each name is valid.
+    """
+    parsed = np.full((len(results), width), None, dtype=object)
+    valid = np.zeros(len(results), dtype=bool)
+    for i, name in enumerate(results):
+        components = name.to_list(include_name2)[:width]
+        parsed[i, : len(components)] = components
+        valid[i] = name.valid
+    return parsed, valid
+
+
+def _use_patterns(patterns: Patterns) -> None:
+    """
+    Sets the patterns used by a worker process.
+    -
+    Args:
+        patterns (Patterns): The Patterns object to use.
+    """
+    config._patterns = patterns
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, List, Callable, Union, Dict, Any
+from typing import Optional, List, Callable, Union, Dict, Any, NamedTuple
 import re
 import pandas as pd
 
@@ -9,6 +9,44 @@ from datagenius.config import config
 NameOperation = Callable[[str, Optional[int]], str]
 
 
+class ParsedName(NamedTuple):
+    """
+    The result of parsing a name: just its components and whether it is valid,
+    without any of the working state of the Name that parsed it.
+    """
+
+    prefix: Optional[str] = None
+    fname: Optional[str] = None
+    mname: Optional[str] = None
+    lname: Optional[str] = None
+    suffix: Optional[str] = None
+    prefix2: Optional[str] = None
+    fname2: Optional[str] = None
+    mname2: Optional[str] = None
+    lname2: Optional[str] = None
+    suffix2: Optional[str] = None
+    alt_name: Optional[str] = None
+    alt_name2: Optional[str] = None
+    valid: bool = False
+
+    def to_list(self, force_name2: bool = False) -> List[Optional[str]]:
+        """
+        Generates a list of the name's components. See Name.to_list.
+        -
+        Args:
+            force_name2 (bool): True to include name2 values in the list even if
+                they are all null. Default is False.
+        -
+        Returns:
+            List[Optional[str]]: A list consisting of the name's prefix, first
+                name, middle name, last name, and suffix, followed by the same for
+                name2 if there is one.
+        """
+        if (self.fname2 and self.lname2) or force_name2:
+            return list(self[:10])
+        return list(self[:5])
+
+
 class Name:
     def __init__(
         self,
@@ -165,9 +203,7 @@ class Name:
         Returns:
             str: The cleansed string
         """
-        for char in config.patterns.invalid_chars:
-            s = s.replace(char, "")
-        return s
+        return s.translate(config.patterns.invalid_chars_table)
 
     @staticmethod
     def cleanse_invalid_word(s: str, index: Optional[int] = None) -> str:
@@ -184,13 +220,8 @@ class Name:
         Returns:
             str: The string, or '' if it is an invalid word.
         """
-        string_list = s.split(" ")
-        invalid = []
-        for s in string_list:
-            if s.lower() in config.patterns.invalid_words:
-                invalid.append(s)
-        for s in invalid:
-            string_list.remove(s)
+        invalid_words = config.patterns.invalid_word_set
+        string_list = [x for x in s.split(" ") if x.lower() not in invalid_words]
         if len(string_list) > 0:
             return " ".join(string_list)
         else:
@@ -231,8 +262,8 @@ class Name:
             str: Camel-cased version of name.
         """
         # Check for and process camel-cased type names:
-        for particle in config.patterns.camelcase_particles:
-            m = re.search(particle + "[a-z]", s)
+        for particle_re in config.patterns.camelcase_res:
+            m = particle_re.search(s)
             if m is not None:
                 s = cls.format_camelcase(s, m.end() - 1)
         # Check for and process multi-part names.
@@ -271,14 +302,18 @@ class Name:
             List[Optional[str]]: A list consisting of the name's prefix, first
                 name, middle name, last name, and suffix.
         """
+        return self.parsed().to_list(force_name2)
+
+    def parsed(self) -> ParsedName:
+        """
+        Allocates and validates the name's components.
+        -
+        Returns:
+            ParsedName: The name's components and whether it is valid.
+        """
         self._allocate()
         self._validate(True)
-        name1 = [self.prefix, self.fname, self.mname, self.lname, self.suffix]
-        if (self.fname2 and self.lname2) or force_name2:
-            name2 = [self.prefix2, self.fname2, self.mname2, self.lname2, self.suffix2]
-        else:
-            name2 = []
-        return name1 + name2
+        return ParsedName(*(getattr(self, f) for f in ParsedName._fields))
 
     @staticmethod
     def search_and_split(s: str, search_char: str) -> str:
@@ -2,7 +2,7 @@ from typing import Optional, Tuple, List
 import re
 
 from datagenius.config import config
-from datagenius.names.name import Name
+from datagenius.names.name import Name, ParsedName
 
 
 class Namestring(Name):
@@ -80,11 +80,9 @@ class Namestring(Name):
         Returns:
             str: The string if no matches were found, '' otherwise.
         """
-        affixes = dict(prefix=config.patterns.prefixes, suffix=config.patterns.suffixes)
         output = s
-        for key, match_against in affixes.items():
-            matches = list(filter(re.compile(s.lower()).match, match_against))
-            if len(matches) > 0:
+        for key in ("prefix", "suffix"):
+            if config.patterns.match_affix(s, key):
                 if getattr(self, key) is None:
                     setattr(self, key, s)
                 elif getattr(self, key + "2") is None:
@@ -103,7 +101,7 @@ class Namestring(Name):
         amp_indices = []
         ampersands = []
         for i, string in enumerate(self.name_list):
-            if string.lower() in config.patterns.ampersands:
+            if string.lower() in config.patterns.ampersand_set:
                 amp_indices.append(i)
                 ampersands.append(string)
         for i in amp_indices:
@@ -159,13 +157,13 @@ class Namestring(Name):
         name_list is needed for it to run.
         """
         absorbed = []
+        compound_fname_res = config.patterns.compound_fname_res
         for i, string in enumerate(self.name_list):
             if i < len(self.name_list) - 1:
                 name2 = self.name_list[i + 1]
                 combo = string + " " + name2
-                for match_against in config.patterns.compound_fnames:
-                    match = re.match(re.compile(match_against), combo.lower())
-                    if match:
+                for compound_fname_re in compound_fname_res:
+                    if compound_fname_re.match(combo.lower()):
                         self.name_list[i] = combo
                         absorbed.append(name2)
         for string in absorbed:
@@ -181,17 +179,15 @@ class Namestring(Name):
         """
         chain = []
         lname_start = None
+        lname_particle_re = config.patterns.lname_particle_re
         for i, string in enumerate(name_list):
-            # Check the string against each lname_particle regex and add it to
+            # Check the string against the lname_particle regex and add it to
             # the chain on match. If a chain has been started and a non-match is
             # found, assume that this string is the final part of the last name
             # chain.
-            for match_against in config.patterns.lname_particles:
-                match = re.match(re.compile(match_against), string.lower())
-                if match or lname_start:
-                    lname_start = i if not lname_start else lname_start
-                    chain.append(string)
-                    break
+            if lname_start or lname_particle_re.match(string.lower()):
+                lname_start = i if not lname_start else lname_start
+                chain.append(string)
         for c in chain:
             name_list.remove(c)
         if lname_start:
@@ -229,3 +225,21 @@ class Namestring(Name):
             s = f"{s[:match.start()].strip()} {s[match_end:].strip()}"
             match = re.search(paren_s, s)
         return s, alt_name1, alt_name2
+
+
+def parse_name_string(name_string: str) -> ParsedName:
+    """
+    Parses a name stored as a single string, without keeping the Namestring
+    that parsed it.
+    -
+    Args:
+        name_string (str): The name as a single string.
+    -
+    Returns:
+        ParsedName: The name's components and whether it is valid.
+    """
+    name = Namestring(name_string)
+    # Its operations include its own bound methods, so clearing them lets the
+    # Namestring be freed right away instead of by the garbage collector:
+    name.operations.clear()
+    return name.parsed()
@@ -1,7 +1,7 @@
 from typing import List, Optional
 
 from datagenius.config import config
-from datagenius.names.name import Name
+from datagenius.names.name import Name, ParsedName
 
 
 class Nametoken(Name):
@@ -53,7 +53,7 @@ class Nametoken(Name):
         ampersands = []
         string_list = s.split(" ")
         for i, s in enumerate(string_list):
-            if s.lower() in config.patterns.ampersands:
+            if s.lower() in config.patterns.ampersand_set:
                 amp_indices.append(i)
                 ampersands.append(s)
         if len(amp_indices) > 0:
@@ -91,3 +91,20 @@ class Nametoken(Name):
                     self.mname = last_string
                     string_list.remove(last_string)
         return " ".join(string_list)
+
+
+def parse_name_tokens(name_list: List[Optional[str]]) -> ParsedName:
+    """
+    Parses a name stored as a list of names, without keeping the Nametoken that
+    parsed it.
+    -
+    Args:
+        name_list (List[Optional[str]]): The name as a list of names.
+    -
+    Returns:
+        ParsedName: The name's components and whether it is valid.
+    """
+    name = Nametoken(name_list)
+    # See parse_name_string:
+    name.operations.clear()
+    return name.parsed()
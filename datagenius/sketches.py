@@ -0,0 +1,708 @@
+import decimal
+import math
+import numbers
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+import datagenius.util as u
+
+# XORed into the hashes of non-integral floats. See _hash_floats:
+_FLOAT_MASK = np.uint64(0x9E3779B97F4A7C15)
+
+
+def hash_values(x: pd.Series) -> np.ndarray:
+    """
+    Hashes each non-null value in the passed Series to a 64 bit
+    integer. Values are hashed by value, the same way pd.factorize
+    tells them apart: numbers (including bools) that are equal hash
+    the same regardless of their type, but numbers never hash the
+    same as their string representations (1 and "1"). Unhashable
+    values are hashed via their string representation.
+
+    Args:
+        x: A pandas Series.
+
+    Returns: A numpy array of uint64 hashes, one for each non-null
+        value in x.
+
+    """
+    x = u.stringify_unhashable(x.dropna())
+    if x.dtype != "O":
+        return _hash_reals(x) if _is_real(x.dtype) else _hash(x)
+    kind = pd.api.types.infer_dtype(x, skipna=False)
+    if kind in ("string", "empty"):
+        return _hash(x)
+    if kind in ("integer", "floating", "mixed-integer-float", "boolean", "decimal"):
+        return _hash_reals(x)
+    # Mixed columns are hashed kind by kind, so each value hashes the
+    # same as it would in a column of only its kind:
+    result = np.empty(len(x), dtype=np.uint64)
+    is_str = x.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    is_num = x.map(_is_real_value).to_numpy(dtype=bool)
+    other = ~(is_str | is_num)
+    result[is_str] = _hash(x[is_str])
+    result[is_num] = _hash_reals(x[is_num])
+    result[other] = _hash_other(x[other])
+    return result
+
+
+def _hash_reals(x: pd.Series) -> np.ndarray:
+    """
+    Hashes each real number in the passed Series by value. Integers,
+    and floats with integral values, are hashed as int64s, so that
+    integers too large to be exact floats keep distinct hashes while 1
+    and 1.0 still hash the same. Other floats are hashed as float64s.
+
+    Args:
+        x: A pandas Series of real numbers or bools, without nulls.
+
+    Returns: A numpy array of uint64 hashes.
+
+    """
+    if x.dtype != "O":
+        if not pd.api.types.is_float_dtype(x.dtype):
+            return _hash(x.astype("int64"))
+        return _hash_floats(x.to_numpy(dtype="float64"))
+    result = np.empty(len(x), dtype=np.uint64)
+    is_int = x.map(lambda v: isinstance(v, (numbers.Integral, np.bool_)))
+    is_int = is_int.to_numpy(dtype=bool)
+    # Integers outside the int64 range are hashed like other objects:
+    is_big = np.zeros(len(x), dtype=bool)
+    is_big[is_int] = [not -(2**63) <= v < 2**63 for v in x[is_int]]
+    is_int &= ~is_big
+    result[is_int] = _hash(x[is_int].astype("int64"))
+    result[is_big] = _hash_other(x[is_big])
+    rest = ~(is_int | is_big)
+    result[rest] = _hash_floats(x[rest].to_numpy(dtype="float64"))
+    return result
+
+
+def _hash_floats(x: np.ndarray) -> np.ndarray:
+    """
+    Hashes float64 values the way _hash_reals does.
+
+    Args:
+        x: A numpy array of float64 values, without nans.
+
+    Returns: A numpy array of uint64 hashes.
+
+    """
+    result = np.empty(x.shape[0], dtype=np.uint64)
+    integral = (np.abs(x) < 2.0**63) & (np.floor(x) == x)
+    result[integral] = _hash(pd.Series(x[integral].astype("int64")))
+    # Flipping bits keeps other floats from hashing the same as the
+    # int64s that share their bytes:
+    result[~integral] = _hash(pd.Series(x[~integral])) ^ _FLOAT_MASK
+    return result
+
+
+def _hash_other(x: pd.Series) -> np.ndarray:
+    """
+    Hashes values that aren't strings or real numbers via their type
+    names and string representations.
+
+    Args:
+        x: A pandas Series.
+
+    Returns: A numpy array of uint64 hashes.
+
+    """
+    return _hash(x.map(lambda v: f"{type(v).__name__}\x00{v}"))
+
+
+def _hash(x: pd.Series) -> np.ndarray:
+    """
+    Hashes each value in the passed Series with pandas' hash function.
+
+    Args:
+        x: A pandas Series.
+
+    Returns: A numpy array of uint64 hashes.
+
+    """
+    return pd.util.hash_pandas_object(x, index=False).to_numpy()
+
+
+def _is_real(dtype) -> bool:
+    """
+    Args:
+        dtype: A numpy or pandas dtype.
+
+    Returns: True if dtype holds real numbers or bools.
+
+    """
+    return (
+        pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype)
+    ) and not pd.api.types.is_complex_dtype(dtype)
+
+
+def _is_real_value(v) -> bool:
+    """
+    Args:
+        v: Any object.
+
+    Returns: True if v is a real number or a bool.
+
+    """
+    return isinstance(v, (numbers.Real, np.bool_, decimal.Decimal))
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """
+    Vectorized equivalent of int.bit_length for an array of uint64
+    values.
+
+    Args:
+        x: A numpy array of uint64 values.
+
+    Returns: A numpy array containing the number of bits needed to
+        represent each value in x.
+
+    """
+    result = np.zeros(x.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        over = x >= (np.uint64(1) << np.uint64(shift))
+        result[over] += shift
+        x = np.where(over, x >> np.uint64(shift), x)
+    return result + (x > 0)
+
+
+class HyperLogLog:
+    """
+    Estimates the number of distinct values in one or more Series in
+    a fixed amount of memory. HyperLogLogs built with the same error
+    can be merged, so chunks of a dataset can be counted separately
+    and combined afterwards.
+    """
+
+    @property
+    def error(self) -> float:
+        # The standard error of the estimate:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def __init__(self, error: float = 0.01):
+        """
+
+        Args:
+            error: A float, the largest standard error (as a fraction
+                of the true distinct count) acceptable for the
+                estimate. Smaller errors use more memory: 0.01 uses
+                16KB, 0.001 is capped at 256KB.
+        """
+        if not 0 < error < 1:
+            raise ValueError(f"error must be between 0 and 1. Passed error={error}")
+        self.precision: int = min(max(math.ceil(math.log2((1.04 / error) ** 2)), 4), 18)
+        self.registers: np.ndarray = np.zeros(1 << self.precision, dtype=np.uint8)
+
+    def update(self, x: pd.Series) -> None:
+        """
+        Adds the non-null values in the passed Series to the sketch.
+
+        Args:
+            x: A pandas Series.
+
+        Returns: None
+
+        """
+        self.update_hashes(hash_values(x))
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        """
+        Adds values that have already been hashed by hash_values to the
+        sketch.
+
+        Args:
+            hashes: A numpy array of uint64 hashes.
+
+        Returns: None
+
+        """
+        p = np.uint64(self.precision)
+        idx = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        remainder = hashes & ((np.uint64(1) << (np.uint64(64) - p)) - np.uint64(1))
+        rho = (64 - self.precision) - _bit_length(remainder).astype(np.int16) + 1
+        np.maximum.at(self.registers, idx, rho.astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """
+        Folds the values counted by another HyperLogLog into this one.
+
+        Args:
+            other: A HyperLogLog object with the same error.
+
+        Returns: This HyperLogLog.
+
+        """
+        if other.precision != self.precision:
+            raise ValueError(
+                f"Cannot merge HyperLogLogs of different precisions: "
+                f"{self.precision} and {other.precision}"
+            )
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        """
+        Estimates the number of distinct values added to the sketch.
+
+        Returns: A float, the estimated distinct count.
+
+        """
+        m = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        e = alpha * m**2 / np.sum(np.power(2.0, -self.registers.astype(float)))
+        zeros = np.count_nonzero(self.registers == 0)
+        # Small cardinalities are better estimated with linear counting:
+        if e <= 2.5 * m and zeros > 0:
+            e = m * math.log(m / zeros)
+        return float(e)
+
+    def __len__(self):
+        return int(round(self.estimate()))
+
+
+class CountMinSketch:
+    """
+    Estimates how many times each value has been seen in a fixed
+    amount of memory. Estimates never undercount. CountMinSketches of
+    the same size can be merged.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        """
+
+        Args:
+            width: An integer, the number of counters in each row of
+                the sketch. Overcounts are at most 2.7 / width times
+                the total count, with high probability.
+            depth: An integer, the number of rows in the sketch. More
+                rows make large overcounts less likely.
+        """
+        self.table: np.ndarray = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Derives one counter position per row of the table for each
+        hash.
+
+        Args:
+            hashes: A numpy array of uint64 hashes.
+
+        Returns: A numpy array of shape (depth, len(hashes)).
+
+        """
+        depth, width = self.table.shape
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = hashes >> np.uint64(32)
+        rows = np.arange(depth, dtype=np.uint64)[:, None]
+        return ((h1 + rows * h2) % np.uint64(width)).astype(np.intp)
+
+    def update_hashes(self, hashes: np.ndarray, counts: np.ndarray = None) -> None:
+        """
+        Adds values that have already been hashed by hash_values to the
+        sketch.
+
+        Args:
+            hashes: A numpy array of uint64 hashes.
+            counts: A numpy array of the number of times each hashed
+                value was seen. Defaults to 1 for each.
+
+        Returns: None
+
+        """
+        counts = np.ones(len(hashes), dtype=np.int64) if counts is None else counts
+        for row, cols in enumerate(self._columns(hashes)):
+            np.add.at(self.table[row], cols, counts)
+
+    def query_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Estimates how many times each hashed value has been seen.
+
+        Args:
+            hashes: A numpy array of uint64 hashes.
+
+        Returns: A numpy array of estimated counts.
+
+        """
+        cols = self._columns(hashes)
+        return np.min(np.take_along_axis(self.table, cols, axis=1), axis=0)
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        """
+        Folds the values counted by another CountMinSketch into this
+        one.
+
+        Args:
+            other: A CountMinSketch object with the same width and
+                depth.
+
+        Returns: This CountMinSketch.
+
+        """
+        if other.table.shape != self.table.shape:
+            raise ValueError(
+                f"Cannot merge CountMinSketches of different shapes: "
+                f"{self.table.shape} and {other.table.shape}"
+            )
+        self.table += other.table
+        return self
+
+
+class MisraGries:
+    """
+    Tracks the most frequent values seen in one or more Series using a
+    fixed number of counters. Any value that makes up more than
+    1 / (k + 1) of the values seen is guaranteed to be tracked.
+    MisraGries objects can be merged.
+    """
+
+    def __init__(self, k: int = 10):
+        """
+
+        Args:
+            k: An integer, the number of counters to keep.
+        """
+        self.k: int = k
+        self.counters: dict = dict()
+
+    def update(self, values: Sequence, counts: Sequence) -> None:
+        """
+        Adds already counted values to the summary.
+
+        Args:
+            values: A sequence of distinct hashable values.
+            counts: A sequence of the number of times each value was
+                seen.
+
+        Returns: None
+
+        """
+        counts = np.asarray(counts)
+        # Reducing the incoming counts first keeps the python dict
+        # small no matter how many distinct values are passed:
+        keep, cut = self._reduce(counts)
+        incoming = dict(zip(np.asarray(values, dtype=object)[keep], counts[keep] - cut))
+        self._absorb(incoming)
+
+    def merge(self, other: "MisraGries") -> "MisraGries":
+        """
+        Folds the counters of another MisraGries into this one.
+
+        Args:
+            other: A MisraGries object.
+
+        Returns: This MisraGries.
+
+        """
+        self._absorb(other.counters)
+        return self
+
+    def most_common(self, n: int = None) -> list:
+        """
+        Lists the tracked values in descending order of their counts.
+
+        Args:
+            n: An integer, the number of values to list. Defaults to
+                all tracked values.
+
+        Returns: A list of value, count tuples.
+
+        """
+        result = sorted(self.counters.items(), key=lambda x: x[1], reverse=True)
+        return result[:n] if n is not None else result
+
+    def _absorb(self, incoming: dict) -> None:
+        """
+        Adds a dictionary of counters to this summary's counters and
+        reduces them back down to k.
+
+        Args:
+            incoming: A dictionary of values and their counts.
+
+        Returns: None
+
+        """
+        merged = dict(self.counters)
+        for v, ct in incoming.items():
+            merged[v] = merged.get(v, 0) + ct
+        values = list(merged.keys())
+        counts = np.fromiter(merged.values(), dtype=np.int64, count=len(values))
+        keep, cut = self._reduce(counts)
+        self.counters = {values[i]: int(counts[i] - cut) for i in np.flatnonzero(keep)}
+
+    def _reduce(self, counts: np.ndarray) -> tuple:
+        """
+        Finds the counters that survive a reduction down to k
+        counters, per the Misra-Gries algorithm.
+
+        Args:
+            counts: A numpy array of counts.
+
+        Returns: A boolean mask of the counts to keep, and the amount
+            to subtract from each kept count.
+
+        """
+        if len(counts) <= self.k:
+            return np.ones(len(counts), dtype=bool), 0
+        cut = np.partition(counts, len(counts) - self.k - 1)[len(counts) - self.k - 1]
+        return counts > cut, cut
+
+
+class ColumnProfile:
+    """
+    Collects the same statistics as lib.explore's transmutations for a
+    single column, along with its most frequent values and the
+    extremes of its values and their lengths, in a single pass over the
+    column. ColumnProfiles can be updated chunk by chunk and merged.
+    Extremes are only collected for columns whose values have an
+    order, so unordered categorical columns have none.
+    """
+
+    def __init__(self, top_k: int = 5, uniques_error: float = 0.01):
+        """
+
+        Args:
+            top_k: An integer, the number of most frequent values to
+                report.
+            uniques_error: A float, the standard error of the unique
+                value estimate. See HyperLogLog. None uses the default
+                of 0.01, since unique values are always estimated here.
+        """
+        uniques_error = 0.01 if uniques_error is None else uniques_error
+        self.top_k: int = top_k
+        self.count: int = 0
+        self.nulls: int = 0
+        self.types: dict = dict()
+        self.uniques = HyperLogLog(uniques_error)
+        self.frequencies = CountMinSketch()
+        # Track more candidates than will be reported so that values
+        # near the cutoff are reported in the right order:
+        self.top_values = MisraGries(top_k * 4)
+        self.min = None
+        self.max = None
+        self.min_len = None
+        self.max_len = None
+        # The rank of each category of an ordered categorical column,
+        # so its extremes are found by the column's order:
+        self.order: dict = dict()
+
+    def update(self, x: pd.Series) -> None:
+        """
+        Adds the values in the passed Series to the profile. Each value
+        is hashed once, and all other statistics are computed from the
+        column's distinct values and their counts.
+
+        Args:
+            x: A pandas Series.
+
+        Returns: None
+
+        """
+        try:
+            codes, uniques = pd.factorize(x)
+            types = None
+        except TypeError:
+            codes, uniques = pd.factorize(u.stringify_unhashable(x))
+            types = x.dropna().map(u.get_class_name).value_counts()
+        nulls = int(np.count_nonzero(codes == -1))
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        values = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+        self.count += len(x) - nulls
+        self.nulls += nulls
+        if len(values) == 0:
+            return
+        hashes = hash_values(values)
+        self.uniques.update_hashes(hashes)
+        self.frequencies.update_hashes(hashes, counts)
+        self.top_values.update(values, counts)
+        # Types are tallied per distinct value, so values that are equal
+        # but of different types (1 and 1.0) count as the first type seen:
+        if types is None:
+            types = pd.Series(counts).groupby(values.map(u.get_class_name).values).sum()
+        self._tally_types(types.to_dict())
+        if isinstance(uniques.dtype, pd.CategoricalDtype):
+            if uniques.dtype.ordered:
+                cats = uniques.dtype.categories
+                self.order.update(zip(cats, range(len(cats))))
+                extremes = values
+            else:
+                extremes = ()
+        elif uniques.dtype == "O":
+            extremes = values
+        else:
+            extremes = (uniques.min(), uniques.max())
+        self.min = _extreme(min, self.min, *extremes, key=self._rank)
+        self.max = _extreme(max, self.max, *extremes, key=self._rank)
+        lengths = values.astype(str).str.len()
+        self.min_len = _extreme(min, self.min_len, lengths.min())
+        self.max_len = _extreme(max, self.max_len, lengths.max())
+
+    def merge(self, other: "ColumnProfile") -> "ColumnProfile":
+        """
+        Folds the statistics of another ColumnProfile into this one.
+
+        Args:
+            other: A ColumnProfile object with the same top_k and
+                uniques_error.
+
+        Returns: This ColumnProfile.
+
+        """
+        self.count += other.count
+        self.nulls += other.nulls
+        self._tally_types(other.types)
+        self.order.update(other.order)
+        self.uniques.merge(other.uniques)
+        self.frequencies.merge(other.frequencies)
+        self.top_values.merge(other.top_values)
+        self.min = _extreme(min, self.min, other.min, key=self._rank)
+        self.max = _extreme(max, self.max, other.max, key=self._rank)
+        self.min_len = _extreme(min, self.min_len, other.min_len)
+        self.max_len = _extreme(max, self.max_len, other.max_len)
+        return self
+
+    def summary(self) -> dict:
+        """
+        Reports the profile's statistics, labeled with the names of the
+        transmutations that collect the same statistics.
+
+        Returns: A dictionary of labels and statistics.
+
+        """
+        total = self.count + self.nulls
+        types = {**self.types, **({"nan": self.nulls} if self.nulls else {})}
+        data_types = ",".join(
+            [f"{t}({round(types[t] / total, 2)})" for t in sorted(types.keys())]
+        )
+        top = self.top_values.most_common()
+        if len(top) > 0:
+            top_values = pd.Series([v for v, _ in top], dtype=object)
+            estimates = self.frequencies.query_hashes(hash_values(top_values))
+            top = sorted(zip(top_values, estimates), key=lambda x: x[1], reverse=True)
+        top_values = ",".join([f"{v}({ct})" for v, ct in top[: self.top_k]])
+        return dict(
+            count_values=self.count,
+            count_uniques=min(len(self.uniques), self.count),
+            count_nulls=self.nulls,
+            collect_data_types=data_types,
+            top_values=top_values,
+            min_values=self.min,
+            max_values=self.max,
+            min_lengths=self.min_len,
+            max_lengths=self.max_len,
+        )
+
+    @property
+    def _rank(self):
+        # Ordered categories are compared by their rank, everything
+        # else by its value:
+        return (lambda v: self.order.get(v, -1)) if self.order else None
+
+    def _tally_types(self, types: dict) -> None:
+        """
+        Adds counts of values by type name to the profile.
+
+        Args:
+            types: A dictionary of type names and counts.
+
+        Returns: None
+
+        """
+        for t, ct in types.items():
+            self.types[t] = self.types.get(t, 0) + int(ct)
+
+
+class FrameProfile:
+    """
+    A collection of ColumnProfiles, one for each column in one or more
+    DataFrames with the same columns. Use it to profile a dataset too
+    large to load at once by updating it with each chunk of the
+    dataset, or by merging the FrameProfiles of each chunk.
+    """
+
+    def __init__(self, top_k: int = 5, uniques_error: float = 0.01):
+        """
+
+        Args:
+            top_k: An integer, the number of most frequent values to
+                report for each column.
+            uniques_error: A float, the standard error of the unique
+                value estimates. See HyperLogLog.
+        """
+        self.top_k: int = top_k
+        self.uniques_error: float = uniques_error
+        self.columns: dict = dict()
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        Adds the values in the passed DataFrame to the profile.
+
+        Args:
+            df: A DataFrame.
+
+        Returns: None
+
+        """
+        for c in df.columns:
+            if c not in self.columns.keys():
+                self.columns[c] = ColumnProfile(self.top_k, self.uniques_error)
+            self.columns[c].update(df[c])
+
+    def merge(self, other: "FrameProfile") -> "FrameProfile":
+        """
+        Folds the ColumnProfiles of another FrameProfile into this one.
+
+        Args:
+            other: A FrameProfile object with the same top_k and
+                uniques_error.
+
+        Returns: This FrameProfile.
+
+        """
+        for c, p in other.columns.items():
+            if c in self.columns.keys():
+                self.columns[c].merge(p)
+            else:
+                self.columns[c] = p
+        return self
+
+    def to_metadata(self) -> pd.DataFrame:
+        """
+        Reports the profile in the same format as GeniusMetadata's
+        collected attribute after an explore.
+
+        Returns: A DataFrame with a row for each statistic and a column
+            for each profiled column.
+
+        """
+        md = pd.DataFrame({c: p.summary() for c, p in self.columns.items()})
+        md.insert(0, "transmutation", md.index)
+        md.insert(0, "stage", "explore")
+        return md.reset_index(drop=True)
+
+
+def _extreme(func, *values, key=None):
+    """
+    Finds the min or max of the passed values, ignoring Nones. Values
+    that can't be compared to each other are compared as strings.
+
+    Args:
+        func: The min or max function.
+        *values: An arbitrary list of values.
+        key: An optional function to compare the values by.
+
+    Returns: The smallest or largest value, or None if no values were
+        passed.
+
+    """
+    values = [v for v in values if v is not None]
+    if len(values) == 0:
+        return None
+    if key is not None:
+        return func(values, key=key)
+    try:
+        return func(values)
+    except TypeError:
+        return func(values, key=str)
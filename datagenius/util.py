@@ -140,7 +140,9 @@ def align_args(
             names match.
 
     Returns: A dictionary containing only the kwargs key-value pairs
-        that func can accept.
+        that func can accept. Args func accepts that are missing from
+        kwargs are paired with their default value, or None if they
+        have no default.
 
     """
     func_args = getattr(func, "args", None)
@@ -152,7 +154,8 @@ def align_args(
         for s in suppress:
             if s in func_args:
                 func_args.remove(s)
-    return {k: kwargs.get(k) for k in func_args}
+    defaults = get_arg_defaults(func)
+    return {k: kwargs.get(k, defaults.get(k)) for k in func_args}
 
 
 def broadcast_suffix(
@@ -313,6 +316,25 @@ def gen_empty_md_df(columns: Sequence, default_val=0) -> pd.DataFrame:
     return pd.DataFrame([[default_val for _ in columns]], columns=columns)
 
 
+def get_arg_defaults(func: Callable) -> Dict[str, Any]:
+    """
+    Collects the default values of the passed function's args. Works
+    on transmutations and other functools.wraps decorated functions.
+
+    Args:
+        func: A callable object.
+
+    Returns: A dictionary of arg names and their default values. Args
+        without defaults are not included.
+
+    """
+    return {
+        k: p.default
+        for k, p in inspect.signature(func).parameters.items()
+        if p.default is not inspect.Parameter.empty
+    }
+
+
 @nullable(nan_return="nan")
 def get_class_name(obj) -> str:
     """
@@ -325,7 +347,20 @@ def get_class_name(obj) -> str:
     Returns: A string representing the name of the object's class.
 
     """
-    t = type(obj)
+    return get_type_name(type(obj))
+
+
+def get_type_name(t: type) -> str:
+    """
+    Gets the name of the passed class, even if it doesn't have a
+    __name__ attribute.
+
+    Args:
+        t: A class.
+
+    Returns: A string representing the name of the class.
+
+    """
     return re.findall(r"<class '(.+)'>", str(t))[0]
 
 
@@ -476,6 +511,30 @@ def standardize_header(header: Iterable) -> Tuple[List[str], List[str]]:
     return result, list(header)
 
 
+def stringify_unhashable(x: pd.Series) -> pd.Series:
+    """
+    Converts only the values in the passed Series that cannot be
+    hashed (lists, ZeroNumerics, etc) to strings, so the Series can be
+    used with pandas' hash-based operations like nunique and factorize
+    without copying every value into a string.
+
+    Args:
+        x: A pandas Series.
+
+    Returns: The Series, untouched if all its values are hashable,
+        otherwise a copy with its unhashable values converted via
+        gconvert.
+
+    """
+    if x.dtype != "O":
+        return x
+    unhashable = ~x.map(pd.api.types.is_hashable)
+    if unhashable.any():
+        x = x.copy()
+        x[unhashable] = x[unhashable].apply(gconvert, target_type=str)
+    return x
+
+
 def translate_null(obj: Any, to=nan):
     # TODO: Create a datagenius null class.
     """
@@ -16,6 +16,9 @@ setup(
         "xlrd==1.2.0",
         "SQLalchemy==1.3.22",
         "recordlinkage==0.14",
+        "jellyfish>=0.8",
+        "scikit-learn>=0.22",
+        "scipy>=1.0",
         "google-api-python-client==1.12.8",
         "google-auth-httplib2==0.0.4",
         "google-auth-oauthlib==0.4.2",
@@ -17,6 +17,29 @@ class TestLoadPatterns:
         p._update_patterns(compound_fnames=new)
         assert set(p.compound_fnames).difference(set(new)) == set()
 
+    def test_that_it_recompiles_on_update(self):
+        p = Patterns()
+        assert not any(r.match("this is") for r in p.compound_fname_res)
+        assert "zz" not in p.invalid_word_set
+        version = p.version
+        p._update_patterns(compound_fnames=["this is"], invalid_words=["zz"])
+        assert p.version != version
+        assert Patterns().version == version
+        assert any(r.match("this is") for r in p.compound_fname_res)
+        assert "zz" in p.invalid_word_set
+
+    def test_compiled_patterns(self):
+        p = Patterns()
+        assert p.camelcase_res[0].search("mcelroy").end() == 3
+        assert {"d", "dr", "dr."} <= p.prefix_starts
+        assert p.match_affix("Dr", "prefix")
+        assert p.match_affix("j.", "suffix")
+        assert not p.match_affix("smith", "suffix")
+        assert "a!b.c".translate(p.invalid_chars_table) == "ab.c"
+        assert not Patterns._combine([]).match("")
+        assert p.invalid_word_re.search("the smith family")
+        assert not p.invalid_word_re.search("theodore smith")
+
     def test_get_invalid_chars(self):
         result = Patterns._get_invalid_chars()
         assert "!" in result
@@ -1,3 +1,5 @@
+import os
+
 import pandas as pd
 import pytest
 from numpy import nan
@@ -5,7 +7,9 @@ from datetime import datetime as dt
 
 import datagenius.genius as ge
 import datagenius.util as u
+import datagenius.lib as lib
 import datagenius.lib.guides as gd
+import datagenius.metadata as md
 from tests import testing_tools
 
 
@@ -58,6 +62,50 @@ class TestGeniusAccessor:
         df, metadata = df.genius.explore()
         pd.testing.assert_frame_equal(metadata.collected, expected)
 
+        # Options are passed to explore transmutations:
+        df = pd.DataFrame(**employees)
+        df, metadata = df.genius.explore(uniques_error=0.01)
+        pd.testing.assert_frame_equal(metadata.collected, expected)
+
+        # Opt-in transmutations only run when their options are passed:
+        df = pd.DataFrame(**employees)
+        df, metadata = df.genius.explore(top_shapes=1)
+        assert metadata.collected.iloc[-1].tolist() == [
+            "explore",
+            "collect_value_shapes",
+            "9(1.0)",
+            "AAAAA(0.5)",
+            "AAAAA AAAAA(0.25)",
+            "9999.9(1.0)",
+        ]
+
+    def test_profile(self, employees):
+        _, explored = pd.DataFrame(**employees).genius.explore()
+        _, profiled = pd.DataFrame(**employees).genius.profile()
+        assert list(profiled.collected["transmutation"]) == [
+            "count_values",
+            "count_uniques",
+            "count_nulls",
+            "collect_data_types",
+            "top_values",
+            "min_values",
+            "max_values",
+            "min_lengths",
+            "max_lengths",
+        ]
+        assert (
+            profiled.collected.iloc[:4].values.tolist()
+            == explored.collected.values.tolist()
+        )
+
+        # Unordered categorical columns and explore's uniques_error=None
+        # are both accepted:
+        df = pd.DataFrame(dict(a=pd.Categorical(["x", "y", "x"])))
+        _, profiled = df.genius.profile(uniques_error=None)
+        collected = profiled.collected.set_index("transmutation")["a"]
+        assert collected["count_uniques"] == 2
+        assert collected["min_values"] is None
+
     def test_clean(self, sales, needs_cleanse_totals):
         df = pd.DataFrame(**needs_cleanse_totals)
         expected = pd.DataFrame(**sales).iloc[1:3].reset_index(drop=True)
@@ -141,6 +189,12 @@ class TestGeniusAccessor:
             == expected
         )
 
+        # Args with defaults aren't required:
+        tms = [ge.lib.clean.accrete, ge.lib.explore.count_uniques]
+        assert pd.DataFrame.genius._align_tms_with_options(
+            tms, dict(accrete_group_by=["a"], accretion_cols="b")
+        ) == [ge.lib.clean.accrete, ge.lib.explore.count_uniques]
+
     def test_transmute(self, customers):
         expected = pd.DataFrame(
             [[1, "Yancy", "Cordwainer", "00025"]],
@@ -154,6 +208,49 @@ class TestGeniusAccessor:
         )
         pd.testing.assert_frame_equal(df, expected)
 
+    def test_factorize(self, sales):
+        df = pd.DataFrame(**sales)
+        codes, uniques = df.genius.factorize("region")
+        assert list(codes) == [0, 0, 1, 1]
+        assert list(uniques) == ["Northern", "Southern"]
+        # Results are cached until the column is reassigned:
+        assert df.genius.factorize("region")[0] is codes
+        df["region"] = ["Southern", "Northern", "Northern", nan]
+        codes, uniques = df.genius.factorize("region")
+        assert list(codes) == [0, 1, 1, -1]
+        assert list(uniques) == ["Southern", "Northern"]
+
+        # In place changes to the column are caught too:
+        df["region"].replace("Southern", "Eastern", inplace=True)
+        codes, uniques = df.genius.factorize("region")
+        assert list(uniques) == ["Eastern", "Northern"]
+        df.loc[3, "region"] = "Western"
+        codes, uniques = df.genius.factorize("region")
+        assert list(codes) == [0, 1, 1, 2]
+        assert list(uniques) == ["Eastern", "Northern", "Western"]
+        df.genius.factorize("sales")
+        df["sales"].values[0] = -1
+        assert df.genius.factorize("sales")[1][0] == -1
+        # And so are changes that reuse the same objects:
+        df = pd.DataFrame(dict(a=["x", "y"]))
+        df.genius.factorize("a")
+        df["a"].values[:] = df["a"].values[::-1].copy()
+        assert list(df.genius.factorize("a")[1]) == ["y", "x"]
+
+        # Unhashable values:
+        df = pd.DataFrame(dict(a=[[1, 2], [1, 2], "x"]))
+        codes, uniques = df.genius.factorize("a")
+        assert list(codes) == [0, 0, 1]
+
+        # Lists of columns are factorized as one key:
+        df = pd.DataFrame(dict(a=["x", "x", "y", None, "x"], b=[1, 2, 1, 1, 1]))
+        codes, uniques = df.genius.factorize(["a", "b"])
+        assert list(codes) == [0, 1, 2, -1, 0]
+        assert list(uniques) == [("x", 1), ("x", 2), ("y", 1)]
+        assert list(uniques.names) == ["a", "b"]
+        assert df.genius.factorize(["a", "b"])[0] is not codes
+        assert df.genius.factorize("a")[0] is df.genius.factorize("a")[0]
+
     def test_supplement(self, sales, regions, stores):
         df1 = pd.DataFrame(**sales)
         df2 = pd.DataFrame(**regions)
@@ -206,6 +303,254 @@ class TestGeniusAccessor:
             == set()
         )
 
+        # Rows keep df1's index labels, repeated for each of their
+        # matches, and df1's columns come first, followed by each other
+        # frame's columns and then merged_on:
+        df1 = pd.DataFrame(**sales, index=["w", "x", "y", "z"])
+        df3 = pd.DataFrame(**stores).iloc[:3]
+        result = df1.genius.supplement(
+            df3, on="region", select_cols=("location", "budget")
+        )
+        assert list(result.index) == ["w", "w", "x", "x", "y", "z"]
+        assert list(result.columns) == [
+            "location",
+            "region",
+            "sales",
+            "location_A",
+            "budget",
+            "merged_on",
+        ]
+        assert list(result.location_A) == [
+            "Bayside",
+            "W Valley",
+            "Bayside",
+            "W Valley",
+            "Precioso",
+            "Precioso",
+        ]
+
+        # Test blocking and candidate pair metadata:
+        df1 = pd.DataFrame(**sales)
+        df3 = pd.DataFrame(**stores)
+        metadata = md.GeniusMetadata()
+        result = df1.genius.supplement(
+            df3,
+            on=gd.SupplementGuide(
+                "location", thresholds=0.7, inexact=True, blocking="prefix"
+            ),
+            select_cols=("budget", "location"),
+            metadata=metadata,
+        )
+        assert list(result.budget.fillna(0)) == [100000, 110000, 90000, 0]
+        assert metadata.collected.to_dict("records") == [
+            dict(
+                stage="supplement",
+                transmutation="find_candidates",
+                merged_on="location",
+                candidate_pairs=3,
+                total_pairs=16,
+            )
+        ]
+
+        # Multiple frames are joined without being modified:
+        df1 = pd.DataFrame(**sales)
+        df2 = pd.DataFrame(**regions)
+        df3 = pd.DataFrame(**stores)
+        result = df1.genius.supplement(
+            df2, df3, on="region", select_cols=("stores", "budget")
+        )
+        assert list(result.stores) == [50, 50, 50, 50, 42, 42, 42, 42]
+        assert list(result.budget) == [
+            100000,
+            90000,
+            100000,
+            90000,
+            110000,
+            90000,
+            110000,
+            90000,
+        ]
+        assert list(result.index) == [0, 0, 1, 1, 2, 2, 3, 3]
+        pd.testing.assert_frame_equal(df1, pd.DataFrame(**sales))
+        pd.testing.assert_frame_equal(df2, pd.DataFrame(**regions))
+        pd.testing.assert_frame_equal(df3, pd.DataFrame(**stores))
+
+        # Tolerance matching, combined with exact matching:
+        df1 = pd.DataFrame(**stores)
+        df3 = pd.DataFrame(**stores)
+        df3["budget"] += [500, 20000, 0, 5000]
+        df3["inventory"] = [1, 2, 3, 4]
+        result = df1.genius.supplement(
+            df3,
+            on=gd.SupplementGuide("region", "budget", tolerances={"budget": 1000}),
+            select_cols="inventory",
+            split_results=True,
+        )
+        assert list(result[0].inventory_A) == [1, 3]
+        assert list(result[0].index) == [0, 2]
+
+        # TF-IDF matching:
+        df1 = pd.DataFrame(**sales)
+        df3 = pd.DataFrame(**stores)
+        result = df1.genius.supplement(
+            df3,
+            on=gd.SupplementGuide(
+                "location", thresholds=0.5, inexact=True, method="tfidf", top_k=1
+            ),
+            select_cols="budget",
+        )
+        assert list(result.budget) == [100000, 90000, 110000, 90000]
+        assert "match_score" in result.columns
+
+        # SupplementIndexes can be passed instead of DataFrames:
+        on = (
+            ({"region": "Northern"}, "region"),
+            gd.SupplementGuide("location", thresholds=0.7, inexact=True),
+        )
+        df1 = pd.DataFrame(**sales)
+        df3 = pd.DataFrame(**stores)
+        expected = df1.genius.supplement(df3, on=on, select_cols="budget")
+        df1 = pd.DataFrame(**sales)
+        df3 = pd.DataFrame(**stores)
+        result = df1.genius.supplement(
+            lib.SupplementIndex(df3, on), on=on, select_cols="budget"
+        )
+        pd.testing.assert_frame_equal(
+            result.reset_index(drop=True),
+            expected.reset_index(drop=True),
+            check_like=True,
+        )
+        pd.testing.assert_frame_equal(df3, pd.DataFrame(**stores))
+
+        # Null keys match each other either way:
+        df1 = pd.DataFrame(dict(a=[1.0, nan, 2.0, None], b=["x", None, "y", None]))
+        df2 = pd.DataFrame(dict(a=[nan, 1, 2], b=[None, "x", None], v=[10, 20, 30]))
+        for on in ("a", "b", gd.SupplementGuide("a", "b")):
+            expected = df1.genius.supplement(df2, on=on, select_cols="v")
+            result = df1.genius.supplement(
+                lib.SupplementIndex(df2, on), on=on, select_cols="v"
+            )
+            pd.testing.assert_frame_equal(result, expected)
+        assert list(result.v.fillna(0)) == [20, 10, 10, 0]
+
+    def test_supplement_cache(self, sales, stores, tmp_path, monkeypatch):
+        df1 = pd.DataFrame(**sales)
+        df2 = pd.DataFrame(**stores)
+        on = gd.SupplementGuide("location", thresholds=0.7, inexact=True)
+        expected = df1.genius.supplement(df2, on=on, select_cols="budget")
+        metadata = md.GeniusMetadata()
+        for _ in range(2):
+            result = df1.genius.supplement(
+                df2, on=on, select_cols="budget", cache=tmp_path, metadata=metadata
+            )
+            pd.testing.assert_frame_equal(result, expected)
+        assert list(metadata.collected.cached_rows.dropna()) == [0, 4]
+
+        # Only new rows are matched:
+        df1.loc[4] = ["Bayside Shop", "Northern", 50]
+        metadata = md.GeniusMetadata()
+        result = df1.genius.supplement(
+            df2, on=on, select_cols="budget", cache=tmp_path, metadata=metadata
+        )
+        assert list(result.budget) == [100000, 90000, 110000, 90000, 100000]
+        assert metadata.collected.new_rows[0] == 1
+
+        # A changed reference isn't served stale matches:
+        df2.loc[0, "budget"] = 1
+        result = df1.genius.supplement(df2, on=on, select_cols="budget", cache=tmp_path)
+        assert list(result.budget) == [1, 90000, 110000, 90000, 1]
+
+        # SupplementIndexes are only hashed once:
+        idx = lib.SupplementIndex(df2)
+        hashed = []
+        monkeypatch.setattr(
+            lib.supplement,
+            "_frame_fingerprint",
+            lambda df: hashed.append(df) or "x",
+        )
+        for _ in range(2):
+            result = df1.genius.supplement(
+                idx, on=on, select_cols="budget", cache=tmp_path
+            )
+            assert list(result.budget) == [1, 90000, 110000, 90000, 1]
+        assert len(hashed) == 1
+
+        # Cached matches keep the dtypes a fresh run gives them:
+        df3 = pd.DataFrame(dict(k=["a", "b", "c"]))
+        df4 = pd.DataFrame(dict(k=["a", "b", "d"], v=[1, 2, 3], b=[True, False, True]))
+        cache = tmp_path / "dtypes"
+        df3.iloc[[0, 2]].genius.supplement(df4, on="k", cache=cache)
+        for split_results in (True, False):
+            expected = df3.genius.supplement(df4, on="k", split_results=split_results)
+            result = df3.genius.supplement(
+                df4, on="k", split_results=split_results, cache=cache
+            )
+            if split_results:
+                assert expected[0].v.dtype == "int64"
+                assert expected[0].b.dtype == bool
+                pd.testing.assert_frame_equal(result[0], expected[0])
+                pd.testing.assert_frame_equal(result[1], expected[1])
+            else:
+                pd.testing.assert_frame_equal(result, expected)
+
+        # Chunked frames can only be read once, so can't be cached:
+        with pytest.raises(ValueError, match="not chunked frames"):
+            df1.genius.supplement(
+                iter([df2[:2], df2[2:]]),
+                on="location",
+                cache=tmp_path,
+                staging=tmp_path,
+            )
+
+    def test_supplement_staging(self, sales, stores, tmp_path):
+        on = (
+            ({"region": "Northern"}, "region"),
+            gd.SupplementGuide("location", thresholds=0.7, inexact=True),
+        )
+        df1 = pd.DataFrame(**sales)
+        df2 = pd.DataFrame(**stores)
+        df3 = pd.DataFrame(**stores)
+        expected = df1.genius.supplement(df2, df3, on=on, select_cols="budget")
+        result = df1.genius.supplement(
+            df2, df3, on=on, select_cols="budget", staging=tmp_path
+        )
+        pd.testing.assert_frame_equal(result, expected)
+        assert os.listdir(tmp_path) == []
+
+        # Other frames can be streamed in chunks:
+        result = df1.genius.supplement(
+            iter([df3[:2], df3[2:]]),
+            on="location",
+            staging=tmp_path,
+        )
+        assert list(result.budget.fillna(0)) == [0, 0, 0, 0]
+
+    def test_supplement_workers(self, sales, stores):
+        on = (
+            ({"region": "Northern"}, "region"),
+            gd.SupplementGuide("location", thresholds=0.7, inexact=True),
+        )
+        df1 = pd.DataFrame(**sales)
+        df2 = pd.DataFrame(**stores)
+        expected = df1.genius.supplement(df2, on=on, select_cols="budget")
+        result = df1.genius.supplement(df2, on=on, select_cols="budget", workers=2)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_resolve_entities(self, sales, stores):
+        df1 = pd.DataFrame(**sales)
+        df2 = pd.DataFrame(**stores)
+        metadata = md.GeniusMetadata()
+        r1, r2 = df1.genius.resolve_entities(
+            df2,
+            on=gd.SupplementGuide(
+                "location", thresholds=0.7, block="region", inexact=True
+            ),
+            metadata=metadata,
+        )
+        assert list(r1.entity_id) == [0, 1, 2, 3]
+        assert list(r2.entity_id) == [0, 1, 2, 3]
+        assert metadata.collected.entities[0] == 4
+
     def test_apply_strf(self, products):
         df = pd.DataFrame(**products)
         expected = pd.DataFrame(
@@ -31,6 +31,14 @@ class TestODBConnector:
         d2 = pd.DataFrame(o.select("products"))
         pd.testing.assert_frame_equal(d2, d)
 
+    def test_new_index_and_select_chunks(self, products):
+        o.new_index("products", "id", "name")
+        assert len(o.tables["products"].indexes) == 1
+        chunks = list(
+            o.select_chunks("SELECT id FROM products WHERE id > :id", 2, id=0)
+        )
+        assert [c.shape[0] for c in chunks] == [2, 2]
+
     def test_drop_tbl(self):
         assert o.drop_tbl("sales")
         assert o.tables.get("sales") is None
@@ -106,6 +106,49 @@ def test_reject_on_conditions(employees):
     pd.testing.assert_frame_equal(md_dict["metadata"], expected_metadata)
 
 
+def test_deduplicate():
+    df = pd.DataFrame(
+        dict(
+            name=["Jon Smith", "John Smith", "Jane Doe", "jon smith", "Jane Doe"],
+            g=[1, 1, 2, 1, 2],
+        )
+    )
+    result, md_dict = cl.deduplicate(df, "name")
+    assert list(result.name) == ["Jon Smith", "John Smith", "Jane Doe", "jon smith"]
+    assert list(md_dict["rejects"].index) == [4]
+    assert list(md_dict["rejects"].cluster_id) == [2]
+
+    result, md_dict = cl.deduplicate(
+        df, gd.SupplementGuide("name", thresholds=0.9, block="g", inexact=True)
+    )
+    assert list(result.name) == ["Jon Smith", "Jane Doe"]
+    assert list(md_dict["rejects"].cluster_id) == [0, 0, 1]
+    pd.testing.assert_frame_equal(
+        md_dict["metadata"], pd.DataFrame([dict(name=3, g=3)])
+    )
+
+    # Only rows meeting the conditions are deduplicated:
+    result, md_dict = cl.deduplicate(
+        df,
+        gd.SupplementGuide("name", thresholds=0.9, conditions={"g": 1}, inexact=True),
+    )
+    assert list(result.name) == ["Jon Smith", "Jane Doe", "Jane Doe"]
+    assert list(md_dict["rejects"].cluster_id) == [0, 0]
+
+    # Rows with null on values never share a cluster with another guide's rows:
+    df = pd.DataFrame(
+        dict(
+            kind=["A", "A", "A", "B", "B", "B"],
+            a=["1", None, "1", None, None, None],
+            b=[None, None, None, "2", "2", "4"],
+        )
+    )
+    result, md_dict = cl.deduplicate(df, [("a", {"kind": "A"}), ("b", {"kind": "B"})])
+    assert list(md_dict["rejects"].index) == [2, 4]
+    assert list(md_dict["rejects"].cluster_id) == [0, 2]
+    assert list(result.b) == [None, None, "2", "4"]
+
+
 def test_reject_on_str_content(customers):
     df = pd.DataFrame(**customers())
     df2, md_dict = cl.reject_on_str_content(df.copy(), dict(foreign_key="25"))
@@ -166,6 +209,13 @@ def test_cleanse_typos(needs_cleanse_typos):
     )
     pd.testing.assert_frame_equal(md_dict["metadata"], expected_metadata)
 
+    # Guides can map nulls too, which aren't counted in the metadata:
+    df = pd.DataFrame(dict(a=["x", None, "y", None]))
+    df2, md_dict = cl.cleanse_typos(df, dict(a=gd.CleaningGuide(((None, "y"), "z"))))
+    assert list(df2.a) == ["x", "z", "z", "z"]
+    expected_metadata = pd.DataFrame([dict(a=1)])
+    pd.testing.assert_frame_equal(md_dict["metadata"], expected_metadata)
+
 
 def test_convert_types(customers, products):
     df = pd.DataFrame(**customers())
@@ -287,3 +337,22 @@ def test_accrete():
     pd.testing.assert_frame_equal(df2, expected)
     expected_metadata = pd.DataFrame([dict(a=0, b=0, c=2)])
     pd.testing.assert_frame_equal(md_dict["metadata"], expected_metadata)
+
+    # Rows with a null group are dropped, and the rest are gathered into
+    # their groups:
+    df = pd.DataFrame(
+        [
+            dict(a="t", b="u"),
+            dict(a="x", b="v"),
+            dict(a=nan, b="w"),
+            dict(a="t", b="y"),
+        ],
+        index=[3, 2, 1, 0],
+    )
+    expected = pd.DataFrame(
+        [dict(a="t", b="u y"), dict(a="t", b="u y"), dict(a="x", b="v")]
+    )
+    df2, md_dict = cl.accrete(df.copy(), ["a"], "b")
+    pd.testing.assert_frame_equal(df2, expected)
+    expected_metadata = pd.DataFrame([dict(a=0, b=2)])
+    pd.testing.assert_frame_equal(md_dict["metadata"], expected_metadata)
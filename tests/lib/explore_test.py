@@ -52,6 +52,31 @@ def test_count_uniques(customers, sales, products):
     df, md_dict = ex.count_uniques(pd.DataFrame(**products))
     pd.testing.assert_frame_equal(md_dict["metadata"], expected)
 
+    # Unhashable values mixed with hashable ones:
+    df = pd.DataFrame(
+        [
+            dict(a=e.ZeroNumeric("00123"), b=1),
+            dict(a=e.ZeroNumeric("00123"), b=1),
+            dict(a="x", b=2),
+        ]
+    )
+    expected = pd.DataFrame([dict(a=2, b=2)])
+    df, md_dict = ex.count_uniques(df)
+    pd.testing.assert_frame_equal(md_dict["metadata"], expected)
+
+    # HyperLogLog mode:
+    df = pd.DataFrame(dict(a=[i % 5000 for i in range(20000)], b=[nan] * 20000))
+    df, md_dict = ex.count_uniques(df, uniques_error=0.01)
+    assert md_dict["metadata"]["a"][0] == pytest.approx(5000, rel=0.03)
+    assert md_dict["metadata"]["b"][0] == 0
+
+    # Both modes tell mixed types apart the same way, by value:
+    df = pd.DataFrame(dict(a=[1, "1", 1.0, True, "a", nan, "a"]))
+    df, md_dict = ex.count_uniques(df)
+    assert md_dict["metadata"]["a"][0] == 3
+    df, md_dict = ex.count_uniques(df, uniques_error=0.01)
+    assert md_dict["metadata"]["a"][0] == 3
+
 
 def test_count_nulls(products):
     # Data type compatibility check:
@@ -101,6 +126,116 @@ def test_collect_data_types():
     pd.testing.assert_frame_equal(md_dict["metadata"], expected)
 
 
+def test_collect_value_shapes():
+    df = pd.DataFrame(
+        [
+            dict(a="02134", b="ABC-123", c=1.5),
+            dict(a="02134-1234", b="XY-12", c=nan),
+            dict(a="12345", b="DEF-456", c=10.25),
+            dict(a=nan, b="GHI-789", c=nan),
+        ]
+    )
+    expected = pd.DataFrame(
+        [
+            dict(
+                a="99999(0.67),99999-9999(0.33)",
+                b="AAA-999(0.75),AA-99(0.25)",
+                c="9.9(0.5),99.99(0.5)",
+            )
+        ]
+    )
+    df, md_dict = ex.collect_value_shapes(df, top_shapes=2)
+    pd.testing.assert_frame_equal(md_dict["metadata"], expected)
+
+    df, md_dict = ex.collect_value_shapes(df, top_shapes=1)
+    assert md_dict["metadata"]["b"][0] == "AAA-999(0.75)"
+
+
+def test_discover_dependencies():
+    df = pd.DataFrame(
+        dict(
+            order_id=[1, 1, 1, 2, 2, 3],
+            customer=["a", "a", "a", "b", "b", "a"],
+            line=[1, 2, 3, 1, 2, 1],
+            sku=["x", "y", "z", "x", "z", "y"],
+            region=["N", "N", "N", "S", "S", "N"],
+            const=[0, 0, 0, 0, 0, 0],
+        )
+    )
+    expected = pd.DataFrame(
+        [
+            dict(
+                order_id="customer(1.0),region(1.0)",
+                customer="region(1.0)",
+                line=nan,
+                sku=nan,
+                region="customer(1.0)",
+                const=nan,
+                transmutation="functional_dependencies",
+            ),
+            dict(
+                order_id=1,
+                customer=nan,
+                line=nan,
+                sku=nan,
+                region=nan,
+                const=nan,
+                transmutation="cluster_key_ranks",
+            ),
+            dict(
+                order_id="line,sku",
+                customer=nan,
+                line=nan,
+                sku=nan,
+                region=nan,
+                const=nan,
+                transmutation="cluster_unique_cols",
+            ),
+        ],
+        dtype=object,
+    )
+    _, md_dict = ex.discover_dependencies(df, 1.0)
+    pd.testing.assert_frame_equal(md_dict["metadata"], expected)
+
+    # Approximate dependencies:
+    df.loc[5, "region"] = "S"
+    _, md_dict = ex.discover_dependencies(df, 0.8)
+    assert md_dict["metadata"]["customer"][0] == "order_id(0.83),region(0.83)"
+
+    # Sampled pairs still find exact dependencies:
+    df = pd.DataFrame(dict(a=[i % 50 for i in range(1000)], b=range(1000)))
+    df["c"] = df["a"] * 2
+    _, md_dict = ex.discover_dependencies(df, 1.0, dependency_sample=100)
+    assert md_dict["metadata"]["a"].tolist() == ["c(1.0)", 1, "b"]
+
+    # Including when the determinant has too few values to sample any:
+    df = pd.DataFrame(dict(manager=[f"m{i % 3}" for i in range(5000)], id=range(5000)))
+    df["region"] = df["manager"].map(dict(m0="N", m1="S", m2="N"))
+    _, md_dict = ex.discover_dependencies(df, 1.0, dependency_sample=100)
+    assert md_dict["metadata"]["manager"][0] == "region(1.0)"
+
+
+def test_profile_columns(employees):
+    df = pd.DataFrame(**employees)
+    df, md_dict = ex.profile_columns(df)
+    md = md_dict["metadata"].set_index("transmutation")
+    assert list(md.loc["count_uniques", :]) == ["explore", 4, 2, 4, 1]
+    assert md.loc["collect_data_types", "wfh_stipend"] == "float(0.5),nan(0.5)"
+    assert md.loc["top_values", "department"] == "Sales(2),Customer Service(2)"
+    assert md.loc["min_lengths", "name"] == 11
+
+    # uniques_error is shared with count_uniques, where None is allowed:
+    _, md_dict2 = ex.profile_columns(df, uniques_error=None)
+    pd.testing.assert_frame_equal(md_dict2["metadata"], md_dict["metadata"])
+
+
+def test_profile_chunks(employees):
+    df = pd.DataFrame(**employees)
+    profile = ex.profile_chunks([df.iloc[:2], df.iloc[2:]])
+    _, md_dict = ex.profile_columns(df)
+    pd.testing.assert_frame_equal(profile.to_metadata(), md_dict["metadata"])
+
+
 def test_id_type_violations():
     df = pd.DataFrame([dict(a=1, b=2.4, c="string"), dict(a=2, b="x", c=nan)])
     expected = pd.DataFrame([dict(a=False, b=True, c=False)])
@@ -194,6 +329,28 @@ def test_id_clustering_violations():
     expected_metadata = pd.DataFrame([dict(a=0, b=2, c=3, b_c_x=3)])
     pd.testing.assert_frame_equal(md_dict["metadata"], expected_metadata)
 
+    # Rows with a null in cluster_group_by are in no cluster:
+    df = pd.DataFrame(
+        [
+            dict(a="y", b=1),
+            dict(a=nan, b=2),
+            dict(a="x", b=3),
+            dict(a="y", b=1),
+        ],
+        index=[5, 6, 7, 8],
+    )
+    df, md_dict = ex.id_clustering_violations(df, ["a"], ["b"])
+    expected = pd.DataFrame(
+        [
+            [1, 2, 1, 2, 1],
+            [nan, nan, nan, nan, nan],
+            [0, 1, 1, 1, 1],
+            [1, 2, 1, 2, 2],
+        ],
+        columns=["cluster_id", "row_ct", "b_nu", "b_ct", "rn"],
+    )
+    pd.testing.assert_frame_equal(df[expected.columns], expected)
+
     # TODO: Need to figure out how to fix this and make ZeroNumeric
     #       usable in more pandas operations.
     with pytest.raises(TypeError, match="unhashable type: 'ZeroNumeric'"):
@@ -1,5 +1,10 @@
+import os
+
+import jellyfish
+import numpy as np
 import pandas as pd
 import pytest
+from numpy import nan
 
 import datagenius.lib.supplement as su
 import datagenius.lib.guides as gd
@@ -85,6 +90,341 @@ def test_do_inexact(sales, regions, stores):
     )
 
 
+def test_do_tfidf(sales, stores):
+    df1 = pd.DataFrame(**sales)
+    df2 = pd.DataFrame(**stores)
+    result = su.do_tfidf(df1, df2, ("location",), thresholds=(0.5,), top_k=1)
+    assert list(result.budget) == [100000, 90000, 110000, 90000]
+    assert list(result.match_score.round(2)) == [0.84, 0.56, 0.86, 0.85]
+
+    # Identical values always match:
+    result = su.do_tfidf(df2, df2, ("location", "region"), thresholds=(1, 1))
+    assert list(result.location_s) == list(df2.location)
+
+    # Block and rows:
+    df3 = pd.DataFrame(
+        dict(
+            name=["Acme Corporation", None, "acme corp"],
+            city=["a", "b", "a"],
+        )
+    )
+    df4 = pd.DataFrame(
+        dict(
+            name=["ACME Corporation Ltd", "Acme Corp", "Acme Corp"],
+            city=["a", "a", "b"],
+            v=[1, 2, 3],
+        )
+    )
+    result = su.do_tfidf(df3, df4, ("name",), thresholds=(0.3,), block=("city",))
+    assert list(result.v.fillna(0)) == [1, 2, 1, 2, 0]
+    result = su.do_tfidf(
+        df3, df4, ("name",), thresholds=(0.3,), rows=np.array([0]), top_k=1
+    )
+    assert list(result.v.fillna(0)) == [1, 1, 0]
+
+
+def test_do_tolerance():
+    df1 = pd.DataFrame(
+        dict(
+            acct=["a", "a", "b", None],
+            amount=[10.0, 20.0, 10.0, 1.0],
+            date=pd.to_datetime(
+                ["2021-01-01", "2021-01-05", "2021-01-01", "2021-01-01"]
+            ),
+        )
+    )
+    df2 = pd.DataFrame(
+        dict(
+            acct=["a", "a", "a", "b", "b"],
+            amount=[10.01, 19.5, 10.0, 10.0, 1.0],
+            date=pd.to_datetime(
+                ["2021-01-04", "2021-01-05", "2021-01-10", "2021-01-02", None]
+            ),
+            v=[1, 2, 3, 4, 5],
+        )
+    )
+    on = ("acct", "amount", "date")
+    result = su.do_tolerance(df1, df2, on, {"amount": 0.01, "date": "3D"})
+    assert list(result.v.fillna(0)) == [1, 4, 0, 0]
+
+    # Nearest matches:
+    result = su.do_tolerance(df1, df2, ("acct", "amount"), {"amount": 1}, top_k=1)
+    assert list(result.v.fillna(0)) == [3, 2, 4, 0]
+    assert list(result.match_score.fillna(0)) == [1, 0.5, 1, 0]
+
+    # Combined with inexact string matching:
+    result = su.do_tolerance(
+        df1, df2, ("acct", "amount"), {"amount": 1}, thresholds=(0.9,)
+    )
+    assert list(result.v.fillna(0)) == [1, 3, 2, 4, 0]
+    with pytest.raises(ValueError, match="one value for each on column without"):
+        su.do_tolerance(
+            df1, df2, ("acct", "amount"), {"amount": 1}, thresholds=(0.9, 0)
+        )
+
+    # Tolerance columns must be numeric or datetime:
+    df2["amount"] = df2["amount"].astype(str)
+    with pytest.raises(ValueError, match="amount has dtype=object"):
+        su.do_tolerance(df1, df2, ("acct", "amount"), {"amount": 1})
+    df2["amount"] = df2["amount"].astype(float)
+
+    # Rows:
+    result = su.do_tolerance(
+        df1, df2, ("acct", "amount"), {"amount": 1}, rows=np.array([0, 1])
+    )
+    assert list(result.v.fillna(0)) == [1, 2, 0, 0]
+
+
+def test_order_by_pass_rate(sales, stores):
+    df1 = pd.DataFrame(**sales)
+    df2 = pd.DataFrame(**stores)
+    candidates = su.find_candidates(df1, df2, ("location",))
+    ons = ("region", "location")
+    assert su.order_by_pass_rate(df1, df2, ons, (1, 0.7), candidates) == [1, 0]
+    assert su.order_by_pass_rate(df1, df2, ons, (1, 0), candidates) == [0, 1]
+
+    # Reordering doesn't change the results:
+    result = su.do_inexact(df1, df2, ons, (1, 0.7))
+    pd.testing.assert_frame_equal(
+        su.do_inexact(df1, df2, ons, (1, 0.7), reorder_on=True), result
+    )
+    assert list(result.budget) == [100000, 90000, 110000, 90000]
+
+
+def test_do_inexact_top_k():
+    df1 = pd.DataFrame(dict(name=["jon smith", "jane doe"], a=[1, 2]))
+    df2 = pd.DataFrame(
+        dict(name=["john smith", "jon smyth", "jane doe", "joan smith"], b=[1, 2, 3, 4])
+    )
+    result = su.do_inexact(df1, df2, ("name",), thresholds=(0.8,))
+    assert len(result) == 4
+    assert "match_score" not in result.columns
+
+    result = su.do_inexact(df1, df2, ("name",), thresholds=(0.8,), top_k=1)
+    assert list(result.b) == [1, 3]
+    assert result.match_score[1] == 1
+    assert result.match_score[0] == pytest.approx(
+        jellyfish.jaro_winkler_similarity("jon smith", "john smith")
+    )
+
+    result = su.do_inexact(df1, df2, ("name",), thresholds=(0.8,), top_k=2)
+    assert list(result.a) == [1, 1, 2]
+    assert list(result.match_score) == sorted(result.match_score[:2], reverse=True) + [
+        1
+    ]
+
+
+def test_match_inexact_workers(monkeypatch):
+    monkeypatch.setattr(su, "_SCORE_CHUNK", 1)
+    df1 = pd.DataFrame(dict(name=["jon smith", "jane doe", "jon doe"], g=[1, 2, 1]))
+    df2 = pd.DataFrame(
+        dict(name=["john smith", "jon smyth", "jane doe", "joan smith"], g=[1, 1, 2, 1])
+    )
+    expected = su.match_inexact(df1, df2, ("name",), (0.7,), block=("g",), top_k=1)
+    result = su.match_inexact(
+        df1, df2, ("name",), (0.7,), block=("g",), top_k=1, workers=2
+    )
+    for e, r in zip(expected, result):
+        np.testing.assert_array_equal(e, r)
+
+
+def test_join_all(sales, regions, stores):
+    df1 = pd.DataFrame(**sales)
+    df2 = pd.DataFrame(**regions)
+    df3 = pd.DataFrame(**stores)
+    joins = [
+        (df2, np.array([0, 2]), np.array([0, 1]), ["stores"], "_a", "region", None),
+        (
+            df3,
+            np.array([0, 0, 3]),
+            np.array([0, 1, 3]),
+            ["location", "budget"],
+            "_b",
+            None,
+            np.array([0.9, 0.8, 1]),
+        ),
+    ]
+    result = su.join_all(df1, joins)
+    assert list(result.index) == [0, 0, 1, 2, 3]
+    assert list(result.columns) == [
+        "location",
+        "region",
+        "sales",
+        "stores",
+        "merged_on",
+        "location_b",
+        "budget",
+        "match_score",
+    ]
+    assert list(result.stores.fillna(0)) == [50, 50, 0, 42, 0]
+    assert list(result.merged_on.fillna("")) == ["region", "region", "", "region", ""]
+    assert list(result.location_b.fillna("")) == [
+        "Bayside",
+        "W Valley",
+        "",
+        "",
+        "Kalliope",
+    ]
+    assert list(result.match_score.fillna(0)) == [0.9, 0.8, 0, 0, 1]
+    # Columns from fully matched joins keep their dtype:
+    result = su.join_all(
+        df1, [(df2, np.arange(4), np.array([0, 0, 1, 1]), ["stores"], "_a", None, None)]
+    )
+    assert result.stores.dtype == np.int64
+
+
+def test_score_jaro_winkler():
+    s1 = pd.Series(["Bayside", "bayside", "W Valley", nan, "Kalliope", ""])
+    s2 = pd.Series(["BAYSIDE STORE", "West Valley Store", "Kalliope", "x"])
+    candidates = su.find_candidates(
+        pd.DataFrame(dict(a=s1)), pd.DataFrame(dict(a=s2)), ("a",)
+    )
+    expected = [
+        (
+            jellyfish.jaro_winkler_similarity(str(a).lower(), str(b).lower())
+            if isinstance(a, str)
+            else 0
+        )
+        for a, b in zip(s1[candidates[0]], s2[candidates[1]])
+    ]
+    scores = su.score_jaro_winkler(s1, s2, candidates)
+    assert scores == pytest.approx(expected)
+
+    # Pruned pairs score 0, but pairs that reach the threshold never
+    # get pruned:
+    for threshold in (0.5, 0.8, 1):
+        scores = su.score_jaro_winkler(s1, s2, candidates, threshold)
+        for score, exp in zip(scores, expected):
+            if exp >= threshold:
+                assert score == pytest.approx(exp)
+            else:
+                assert score in (0, pytest.approx(exp))
+
+
+def test_find_candidates(sales, stores):
+    df1 = pd.DataFrame(**sales)
+    df2 = pd.DataFrame(**stores)
+
+    def pairs(*args):
+        return list(zip(*[x.tolist() for x in su.find_candidates(df1, df2, *args)]))
+
+    assert len(pairs(("location",))) == 16
+    assert pairs(("location",), ("region",)) == [
+        (0, 0),
+        (0, 1),
+        (1, 0),
+        (1, 1),
+        (2, 2),
+        (2, 3),
+        (3, 2),
+        (3, 3),
+    ]
+    assert pairs(("location",), None, ("sorted_neighbourhood",)) == [
+        (0, 0),
+        (0, 3),
+        (1, 1),
+        (2, 1),
+        (2, 2),
+        (3, 2),
+        (3, 3),
+    ]
+    assert pairs(("location",), None, ("qgram",)) == [
+        (0, 0),
+        (1, 1),
+        (1, 3),
+        (2, 2),
+        (3, 1),
+        (3, 3),
+    ]
+    assert pairs(("location",), None, ("prefix",)) == [(0, 0), (2, 2), (3, 3)]
+    assert pairs(("location",), ("region",), ("prefix", 1)) == [
+        (0, 0),
+        (1, 1),
+        (2, 2),
+        (3, 3),
+    ]
+    assert pairs(("location",), None, ("soundex",)) == [(2, 2)]
+    assert pairs(("location",), None, ("length",)) == []
+    assert len(pairs(("location",), None, ("length", 6))) == 10
+
+    # Null values are never candidates:
+    df1.loc[0, "location"] = nan
+    assert pairs(("location",), None, ("prefix",)) == [(2, 2), (3, 3)]
+
+
+def test_find_duplicates():
+    df = pd.DataFrame(
+        dict(name=["jon smith", "john smith", "jane doe", "jon smith"], g=[1, 1, 2, 2])
+    )
+    pos1, pos2 = su.find_candidates(df, df, ("name",), unordered=True)
+    assert list(zip(pos1, pos2)) == [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)]
+    pos1, pos2 = su.find_candidates(df, df, ("name",), block=("g",), unordered=True)
+    assert list(zip(pos1, pos2)) == [(0, 1), (2, 3)]
+
+    result = su.find_duplicates(df, gd.SupplementGuide("name"))
+    assert list(result) == [0, 1, 2, 0]
+    result = su.find_duplicates(df, gd.SupplementGuide("name", block="g"))
+    assert list(result) == [0, 1, 2, 3]
+    sg = gd.SupplementGuide("name", thresholds=0.9, inexact=True)
+    result = su.find_duplicates(df, sg)
+    assert list(result) == [0, 0, 2, 0]
+    result = su.find_duplicates(df, sg, rows=np.array([1, 2, 3]))
+    assert list(result) == [0, 1, 0]
+
+    # Null values aren't duplicates:
+    df.loc[[1, 2], "name"] = nan
+    result = su.find_duplicates(df, gd.SupplementGuide("name"))
+    assert list(result) == [0, 1, 2, 0]
+
+
+def test_cluster_pairs():
+    result = su.cluster_pairs(5, np.array([0, 3, 1]), np.array([1, 4, 0]))
+    assert list(result) == [0, 0, 2, 3, 3]
+
+
+def test_resolve_entities(monkeypatch):
+    df1 = pd.DataFrame(dict(name=["Jon Smith", "Jane Doe"], email=["j@x", None]))
+    df2 = pd.DataFrame(dict(name=["John Smith", "Bob Jones"], email=[None, None]))
+    df3 = pd.DataFrame(dict(name=["J Doe", "Bob"], email=["j@x", "b@x"]))
+    on = ["email", gd.SupplementGuide("name", thresholds=0.9, inexact=True)]
+    r1, r2, r3 = su.resolve_entities(df1, df2, df3, on=on)
+    assert list(r1.entity_id) == [0, 1]
+    assert list(r2.entity_id) == [0, 2]
+    assert list(r3.entity_id) == [0, 3]
+    assert "entity_id" not in df1.columns
+
+    monkeypatch.setattr(su, "_SCORE_CHUNK", 1)
+    results = su.resolve_entities(df1, df2, df3, on=on, entity_col="e", workers=2)
+    assert [list(r.e) for r in results] == [[0, 1], [0, 2], [0, 3]]
+
+
+class TestUnionFind:
+    def test_union(self):
+        uf = su.UnionFind(6)
+        uf.union(np.array([4, 5]), np.array([5, 3]))
+        assert list(uf.labels()) == [0, 1, 2, 3, 3, 3]
+        uf.union(np.array([1, 0, 2]), np.array([3, 2, 3]))
+        assert list(uf.labels()) == [0, 0, 0, 0, 0, 0]
+        assert list(uf.find(np.array([5]))) == [0]
+
+
+def test_plan_rows(stores):
+    df = pd.DataFrame(**stores)
+    plan = su.build_plan(
+        (({"budget": (90000,)}, "location"), ({"inventory": (4500,)}, "budget"))
+    )
+    rows = su.plan_rows(plan, df)
+    assert [list(r) for r in rows] == [[1, 3], [2]]
+
+
+def test_plan_ids(stores):
+    df = pd.DataFrame(**stores)
+    plan = su.build_plan(
+        (({"budget": (90000,)}, "location"), ({"inventory": (4500,)}, "budget"))
+    )
+    assert list(su.plan_ids(plan, df)) == [2, 0, 1, 0]
+
+
 def test_chunk_dframes(stores, sales, regions):
     df = pd.DataFrame(**stores)
     plan = su.build_plan(
@@ -95,6 +435,11 @@ def test_chunk_dframes(stores, sales, regions):
         dict(location="W Valley", region="Northern", budget=90000, inventory=4500),
         dict(location="Kalliope", region="Southern", budget=90000, inventory=4500),
     ]
+    # The passed frame is left alone:
+    assert df.shape[0] == 4
+    # Chunking again replaces the chunks:
+    c, p_df = su.chunk_dframes(plan, df)
+    assert len(c[0]) == 1
     assert c[1][0].to_dict("records") == [
         dict(location="Precioso", region="Southern", budget=110000, inventory=4500)
     ]
@@ -210,14 +555,214 @@ def test_prep_suffixes():
         su.prep_suffixes(("_x", "_y"), 3)
 
 
+def test_source_and_restore_dtypes():
+    df = pd.DataFrame(dict(k=["a"], v=[1]))
+    df2 = pd.DataFrame(dict(k=["a"], v=[1], w=[True], t=pd.to_datetime(["2020"])))
+    df3 = pd.DataFrame(dict(w=[1.5]))
+    dtypes = su.source_dtypes(df, [df2.dtypes, df3.dtypes], ("_A", "_B"))
+    assert list(dtypes) == ["k_A", "v_A", "w", "t", "w_B"]
+
+    joined = pd.DataFrame(
+        dict(
+            k=["a", "b"],
+            v_A=[1.0, nan],
+            w=[True, nan],
+            t=["2020-01-01", nan],
+            w_B=[1.5, nan],
+        )
+    )
+    result = su.restore_dtypes(joined.iloc[:1], dtypes)
+    assert list(result.dtypes) == [
+        object,
+        np.int64,
+        bool,
+        np.dtype("<M8[ns]"),
+        np.float64,
+    ]
+    # Ints and bools with nulls get the dtypes pandas fills them with:
+    result = su.restore_dtypes(joined, dtypes)
+    assert list(result.dtypes) == [
+        object,
+        np.float64,
+        object,
+        np.dtype("<M8[ns]"),
+        np.float64,
+    ]
+
+
 class TestSupplementGuide:
     def test_basics(self):
         sg = gd.SupplementGuide("a", "b", "c", inexact=True)
         # Ensures thresholds is subscriptable:
         assert sg.thresholds[0] == 0.9
 
+        sg = gd.SupplementGuide("a", inexact=True, blocking="soundex")
+        assert sg.blocking == ("soundex",)
+
+        with pytest.raises(ValueError, match="Invalid blocking method=x"):
+            gd.SupplementGuide("a", inexact=True, blocking="x")
+
+        sg = gd.SupplementGuide("a", inexact=True, method="tfidf")
+        assert sg.method == "tfidf"
+
+        with pytest.raises(ValueError, match="Invalid method=x"):
+            gd.SupplementGuide("a", inexact=True, method="x")
+
+        with pytest.raises(ValueError, match="Tolerances must be for on columns"):
+            gd.SupplementGuide("a", tolerances={"b": 1})
+
+        # Thresholds are only for the on columns without tolerances:
+        sg = gd.SupplementGuide("a", "b", inexact=True, tolerances={"b": 1})
+        assert sg.thresholds == (0.9,)
+        with pytest.raises(ValueError, match="thresholds length must match"):
+            gd.SupplementGuide(
+                "a", "b", inexact=True, thresholds=(0.9, 0), tolerances={"b": 1}
+            )
+
     def test_output(self):
         sg = gd.SupplementGuide("a", "b", "c", conditions={"c": "x"})
         assert sg.output() == (("a", "b", "c"), {"c": ("x",)})
         assert sg.output("on", "thresholds") == (("a", "b", "c"), None)
         assert sg.output("on") == ("a", "b", "c")
+
+
+class TestSupplementIndex:
+    def test_matches(self, sales, stores, regions):
+        df1 = pd.DataFrame(**sales)
+        df3 = pd.DataFrame(**stores)
+        idx = su.SupplementIndex(
+            df3,
+            on=gd.SupplementGuide(
+                "location", thresholds=0.7, inexact=True, blocking="qgram"
+            ),
+        )
+        assert len(idx._postings) == 1
+        for args in ((("location",),), (("location",), None, ("qgram",))):
+            expected = su.find_candidates(df1, df3, *args)
+            result = su.find_candidates(df1, idx, *args)
+            for e, r in zip(expected, result):
+                assert list(e) == list(r)
+
+        expected = su.do_inexact(df1, df3, ("location",), (0.7,))
+        pd.testing.assert_frame_equal(
+            su.do_inexact(df1, idx, ("location",), (0.7,)), expected
+        )
+
+        df2 = pd.DataFrame(**regions)
+        idx = su.SupplementIndex(df2, on="region")
+        result = su.do_exact(df1, idx, ("region",))
+        assert list(result.stores) == [50, 50, 42, 42]
+        assert list(result.columns) == [
+            "location",
+            "region",
+            "sales",
+            "stores",
+            "employees",
+        ]
+
+    def test_save_and_load(self, sales, stores, tmp_path):
+        df1 = pd.DataFrame(**sales)
+        df3 = pd.DataFrame(**stores)
+        sg = gd.SupplementGuide(
+            "location", thresholds=0.7, inexact=True, blocking="sorted_neighbourhood"
+        )
+        su.SupplementIndex(df3, on=sg).save(str(tmp_path))
+        idx = su.SupplementIndex.load(str(tmp_path))
+        pd.testing.assert_frame_equal(idx.df, df3)
+        assert idx.fingerprint() == su.SupplementIndex(df3).fingerprint()
+        assert isinstance(idx.normalized("location")[0], np.memmap)
+        expected = su.do_inexact(
+            df1, df3, ("location",), (0.7,), blocking=("sorted_neighbourhood",)
+        )
+        result = su.do_inexact(
+            df1, idx, ("location",), (0.7,), blocking=("sorted_neighbourhood",)
+        )
+        pd.testing.assert_frame_equal(result, expected)
+
+        # Null exact keys still match after loading:
+        df2 = pd.DataFrame(dict(a=[nan, 1], v=[10, 20]))
+        su.SupplementIndex(df2, on="a").save(str(tmp_path / "nulls"))
+        idx = su.SupplementIndex.load(str(tmp_path / "nulls"))
+        result = su.do_exact(pd.DataFrame(dict(a=[1.0, nan])), idx, ("a",))
+        assert list(result.v) == [20, 10]
+
+
+class TestSupplementStage:
+    def test_match(self, sales, stores, tmp_path):
+        df1 = pd.DataFrame(**sales)
+        df2 = pd.DataFrame(**stores)
+        plan = su.build_plan(
+            (
+                ({"region": "Northern"}, "region"),
+                gd.SupplementGuide("location", thresholds=0.5, inexact=True, top_k=1),
+            )
+        )
+        # Tiny chunks make matches for the same row span chunks:
+        stage = su.SupplementStage(
+            tmp_path, plan, df1, {0: iter([df2[:3], df2[3:]])}, chunksize=2
+        )
+        assert stage.columns(0) == list(df2.columns)
+        assert stage.size(0, 0) == 2
+
+        pos1, pos2, scores = stage.match(0, 0, plan[0])
+        assert list(pos1) == [0, 0, 1, 1]
+        assert list(pos2) == [0, 1, 0, 1]
+        assert scores is None
+
+        pos1, pos2, scores = stage.match(0, 1, plan[1])
+        rows = np.array([2, 3])
+        expected = su.match_inexact(
+            df1.iloc[rows], df2.iloc[rows], ("location",), (0.5,), top_k=1
+        )
+        assert list(pos1) == list(rows[expected[0]])
+        assert list(pos2) == list(rows[expected[1]])
+        np.testing.assert_allclose(scores, expected[2])
+
+        rows, positions = stage.fetch(0, np.array([3, 1, 3]))
+        assert list(rows.location) == ["W Valley", "Kalliope"]
+        assert list(positions) == [1, 0, 1]
+        stage.close()
+        assert os.listdir(tmp_path) == []
+
+        with pytest.raises(ValueError, match="Staged supplements only support"):
+            su.SupplementStage(
+                tmp_path,
+                (gd.SupplementGuide("location", inexact=True, blocking="soundex"),),
+                df1,
+                {},
+            )
+
+    def test_nulls_and_dtypes(self, tmp_path):
+        df1 = pd.DataFrame(dict(k=["a", None, None], n=["x1", "y", "yy"]))
+        df2 = pd.DataFrame(
+            dict(
+                k=["a", None, None],
+                n=["x", "y", "yy"],
+                d=pd.to_datetime(["2020-01-01", "2020-01-02", None]),
+                b=[True, False, True],
+                i=[1, 2, 3],
+            )
+        )
+        plan = su.build_plan(
+            (
+                ({"n": ("x1", "y")}, "k"),
+                gd.SupplementGuide("n", block="k", inexact=True, thresholds=0.1),
+                gd.SupplementGuide("n", block="k", inexact=True, thresholds=0.5),
+            )
+        )
+        stage = su.SupplementStage(tmp_path, plan, df1, {0: df2})
+        # Guides joining on the same columns (here all three) share an
+        # index:
+        assert len(stage.db.tables["o0"].indexes) == 1
+
+        # Like pandas.merge, exact matches match null keys, but like
+        # match_inexact, null blocks never match:
+        pos1, pos2, _ = stage.match(0, 0, plan[0])
+        assert list(zip(pos1, pos2)) == [(1, 1)]
+        pos1, pos2, _ = stage.match(0, 1, plan[1])
+        assert list(pos1) == []
+
+        # Rows are fetched with their original dtypes:
+        rows, _ = stage.fetch(0, np.array([0, 1, 2]))
+        pd.testing.assert_frame_equal(rows, df2)
+        stage.close()
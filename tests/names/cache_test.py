@@ -0,0 +1,51 @@
+from datagenius.config import config
+from datagenius.names.cache import NameCache
+from datagenius.names.namestring import parse_name_string
+
+
+class TestNameCache:
+    def test_get_and_put(self, tmp_path):
+        names = ["Ewan Hudson", "Dr. Jaden Blackburn", "Bob and Helen Parr"]
+        store = NameCache(tmp_path)
+        assert store.get(names) == {}
+        store.put(names, [parse_name_string(n) for n in names])
+        store.close()
+
+        store = NameCache(tmp_path)
+        result = store.get(names + ["Finley Chambers"])
+        assert result == {n: parse_name_string(n) for n in names}
+        assert (store.hits, store.misses) == (3, 1)
+        store.close()
+
+    def test_that_it_is_keyed_by_pattern_version(self, tmp_path, monkeypatch):
+        store = NameCache(tmp_path)
+        store.put(["Ewan Hudson"], [parse_name_string("Ewan Hudson")])
+        monkeypatch.setattr(config.patterns, "_version", "custom")
+        assert store.get(["Ewan Hudson"]) == {}
+        store.close()
+
+    def test_that_it_evicts_least_recently_used(self, tmp_path):
+        names = ["Ewan Hudson", "Finley Chambers", "Harley Patel"]
+        store = NameCache(tmp_path, max_size=2)
+        store.put(names[:2], [parse_name_string(n) for n in names[:2]])
+        store.get(names[:1])
+        store.put(names[2:], [parse_name_string(names[2])])
+        assert store.size() == 2
+        assert set(store.get(names)) == {"Ewan Hudson", "Harley Patel"}
+        store.close()
+
+    def test_that_concurrent_caches_stage_separately(self, tmp_path):
+        names = ["Ewan Hudson", "Finley Chambers", "Harley Patel"]
+        a = NameCache(tmp_path)
+        b = NameCache(tmp_path)
+        a.put(names, [parse_name_string(n) for n in names])
+        a._stage(names[:1])
+        b._stage(names[1:])
+        staged = next(a.db.select_chunks(f"SELECT name FROM {a._work}"))
+        assert list(staged["name"]) == names[:1]
+        assert set(b.get(names[1:])) == set(names[1:])
+        a.close()
+        b.close()
+        store = NameCache(tmp_path)
+        assert [t for t in store.db.tables if t.startswith("w_")] == []
+        store.close()
@@ -2,6 +2,7 @@ import pytest
 import pandas as pd
 
 import datagenius.names.df_tms as tms
+import datagenius.metadata as md
 from datagenius.config import config
 
 
@@ -105,3 +106,114 @@ class TestParseNameStringColumn:
         monkeypatch.setattr(config, "name_column_labels", ("a", "b", "c", "d", "e"))
         df = tms.parse_name_string_column(simple_namestrings, "name")
         assert list(df.columns) == ["id", "name", "a", "b", "c", "d", "e", "valid"]
+
+    def test_that_it_parses_repeated_names_once(self, monkeypatch):
+        df = pd.DataFrame(
+            dict(name=["Ewan Hudson", None, "Ewan Hudson", "Acme"]), index=[3, 5, 7, 9]
+        )
+        parsed = []
+        parse_name_string = tms.parse_name_string
+
+        def counting_parse(name_string):
+            parsed.append(name_string)
+            return parse_name_string(name_string)
+
+        monkeypatch.setattr(tms, "parse_name_string", counting_parse)
+        df = tms.parse_name_string_column(df, "name")
+        assert parsed == ["Ewan Hudson"]
+        assert list(df.fname) == ["Ewan", None, "Ewan", None]
+        assert list(df.lname) == ["Hudson", None, "Hudson", None]
+        assert list(df.valid) == [True, False, True, False]
+
+    def test_that_it_can_use_workers(self, monkeypatch, simple_namestrings):
+        monkeypatch.setattr(tms, "_POOL_MIN", 0)
+        expected = tms.parse_name_string_column(simple_namestrings, "name")
+        df = tms.parse_name_string_column(simple_namestrings, "name", workers=2)
+        pd.testing.assert_frame_equal(df, expected)
+
+    def test_that_it_can_use_a_cache(self, tmp_path, simple_namestrings):
+        expected = tms.parse_name_string_column(simple_namestrings, "name")
+        metadata = md.GeniusMetadata()
+        for _ in range(2):
+            df = tms.parse_name_string_column(
+                simple_namestrings, "name", cache=tmp_path, metadata=metadata
+            )
+            pd.testing.assert_frame_equal(df, expected)
+        assert list(metadata.collected.cache_hits) == [0, 5]
+        assert list(metadata.collected.hit_rate) == [0, 1]
+        assert list(metadata.collected.stage) == ["names", "names"]
+
+
+class TestParseTokenizedNames:
+    @pytest.fixture
+    def name_tokens(self):
+        return pd.DataFrame(
+            [
+                [1, "George G.", None, "Carlin"],
+                [2, "Heather and Rob", None, "Vandemar"],
+                [3, "George G.", None, "Carlin"],
+                [4, "Acme", None, None],
+                [5, "Jonathan", "R", "Strange 2"],
+            ],
+            columns=["id", "first", "middle", "last"],
+        )
+
+    def test_that_it_can_handle_a_dataframe(self, name_tokens):
+        expected = pd.DataFrame(
+            [
+                [None, "George", "G.", "Carlin", None, True],
+                [None, "Heather", None, "Vandemar", None, True],
+                [None, "George", "G.", "Carlin", None, True],
+                [None, None, None, None, None, False],
+                [None, None, None, None, None, False],
+            ],
+            columns=["prefix", "fname", "mname", "lname", "suffix", "valid"],
+        )
+        expected = name_tokens.join(expected)
+        df = tms.parse_tokenized_names(name_tokens, ["first", "middle", "last"])
+        pd.testing.assert_frame_equal(df, expected)
+
+    def test_that_it_can_handle_name2(self, name_tokens):
+        df = tms.parse_tokenized_names(
+            name_tokens, ["first", "middle", "last"], name_num=1, include_name2=True
+        )
+        assert list(df.fname2) == [None, "Rob", None, None, None]
+        assert list(df.lname2) == [None, "Vandemar", None, None, None]
+
+    def test_that_it_parses_repeated_tokens_once(self, monkeypatch, name_tokens):
+        parsed = []
+        parse_name_tokens = tms.parse_name_tokens
+
+        def counting_parse(name_list):
+            parsed.append(name_list)
+            return parse_name_tokens(name_list)
+
+        monkeypatch.setattr(tms, "parse_name_tokens", counting_parse)
+        tms.parse_tokenized_names(name_tokens, ["first", "middle", "last"])
+        assert len(parsed) == 2
+
+    def test_that_it_can_use_workers(self, monkeypatch, name_tokens):
+        monkeypatch.setattr(tms, "_POOL_MIN", 0)
+        columns = ["first", "middle", "last"]
+        expected = tms.parse_tokenized_names(name_tokens, columns)
+        df = tms.parse_tokenized_names(name_tokens, columns, workers=2)
+        pd.testing.assert_frame_equal(df, expected)
+
+
+def test_screen_invalid_names():
+    name_strings = pd.Series(
+        [
+            "Ewan Hudson",
+            "Acme",
+            "The Hudson Family",
+            "Ewan Hudson 2",
+            "Acme (Ewan Hudson)",
+            "Ewan  ",
+            None,
+        ]
+    )
+    result = tms._screen_invalid_names(name_strings)
+    assert list(result) == [False, True, True, True, False, True, True]
+    for name_string, screened in zip(name_strings[:-1], result):
+        if screened:
+            assert not tms.parse_name_string(name_string).valid
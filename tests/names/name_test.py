@@ -134,6 +134,19 @@ class TestName:
 
         assert n.name_list == ["Griffin", "McElroy"]
 
+        # Each particle only formats its first match:
+        n = Name("Sean O'Mcdonald")
+
+        assert n.name_list == ["Sean", "O'McDonald"]
+
+        n = Name("john o'mcarthy")
+
+        assert n.name_list == ["John", "O'McArthy"]
+
+        n = Name("Tom Mcmahon-Mcdonald")
+
+        assert n.name_list == ["Tom", "McMahon-Mcdonald"]
+
     def test_populate(self):
         n = Name("Bob Kevin Smith")
 
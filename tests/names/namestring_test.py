@@ -1,4 +1,7 @@
-from datagenius.names.namestring import Namestring
+import pickle
+
+from datagenius.names.name import ParsedName
+from datagenius.names.namestring import Namestring, parse_name_string
 
 
 class TestAllocate:
@@ -84,6 +87,15 @@ class TestAssignAffixes:
         assert n.prefix2 == "Mrs."
         assert n.name_list == ["Bob", "Parr"]
 
+    def test_that_it_reads_affixes_as_patterns(self):
+        # "j." matches the start of "jr." as a regex, so it's a suffix:
+        n = Namestring("J. Smith")
+        assert n.suffix == "J."
+        assert n.name_list == ["Smith"]
+        result = parse_name_string("J. Smith")
+        assert result.fname == "Smith"
+        assert not result.valid
+
 
 class TestAssignMiddleInitials:
     def test_that_it_can_handle_single_middle_initial(self):
@@ -223,3 +235,21 @@ class TestExtractAltName:
         assert n == "why you do this"
         assert a1 == "would"
         assert not a2
+
+
+def test_parse_name_string():
+    result = parse_name_string("Dr. Bob D. Parr (Mr. Incredible)")
+    assert isinstance(result, ParsedName)
+    assert result.prefix == "Dr."
+    assert result.fname == "Bob"
+    assert result.lname == "Parr"
+    assert result.alt_name == "Mr. Incredible"
+    assert result.valid
+    assert result.to_list() == ["Dr.", "Bob", "D.", "Parr", None]
+    assert result.to_list(force_name2=True)[5:] == [None] * 5
+    assert not hasattr(result, "__dict__")
+    assert pickle.loads(pickle.dumps(result)) == result
+
+    result = parse_name_string("Bob and Helen Parr")
+    assert result.to_list() == Namestring("Bob and Helen Parr").to_list()
+    assert not parse_name_string("Acme").valid
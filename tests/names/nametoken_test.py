@@ -1,4 +1,4 @@
-from datagenius.names.nametoken import Nametoken
+from datagenius.names.nametoken import Nametoken, parse_name_tokens
 
 
 def test_allocate():
@@ -73,3 +73,20 @@ def test_assign_trailing_middle_initial():
 
     assert n.fname == "S"
     assert n.mname is None
+
+
+def test_parse_name_tokens():
+    result = parse_name_tokens(["Heather and Rob", None, "Vandemar"])
+    assert result.to_list() == [
+        None,
+        "Heather",
+        None,
+        "Vandemar",
+        None,
+        None,
+        "Rob",
+        None,
+        "Vandemar",
+        None,
+    ]
+    assert result.valid
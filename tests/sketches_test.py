@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+import pytest
+from numpy import nan
+
+import datagenius.sketches as sk
+
+
+def test_hash_values():
+    s = pd.Series(["a", "b", nan, "a", [1, 2]])
+    result = sk.hash_values(s)
+    assert result.dtype == np.uint64
+    assert len(result) == 4
+    assert result[0] == result[2]
+
+    # Values are hashed by value, regardless of the dtype they're in:
+    s = pd.Series([1, "1", 1.0, True, "a", [1]], dtype=object)
+    result = sk.hash_values(s)
+    assert result[0] == result[2] == result[3]
+    assert result[0] != result[1]
+    assert result[4] == sk.hash_values(pd.Series(["a"]))[0]
+    assert result[0] == sk.hash_values(pd.Series([1]))[0]
+    assert result[5] == sk.hash_values(pd.Series(["[1]"]))[0]
+
+    # Integers too large to be exact floats still hash apart:
+    s = pd.Series(np.arange(10**18, 10**18 + 1000))
+    assert len(set(sk.hash_values(s))) == 1000
+    assert len(set(sk.hash_values(s.astype(object)))) == 1000
+    s = pd.Series([2**70, 2**70 + 1, 1, 1.5, 2.0, 2], dtype=object)
+    result = sk.hash_values(s)
+    assert len(set(result)) == 4
+    assert result[2] == sk.hash_values(pd.Series([1], dtype="Int64"))[0]
+    assert result[3] == sk.hash_values(pd.Series([1.5]))[0]
+
+
+class TestHyperLogLog:
+    def test_basics(self):
+        hll = sk.HyperLogLog(0.01)
+        assert hll.precision == 14
+        assert hll.error <= 0.01
+        hll.update(pd.Series(["a", "b", "c", "a", nan]))
+        assert len(hll) == 3
+
+        with pytest.raises(ValueError, match="error must be between 0 and 1"):
+            sk.HyperLogLog(2)
+
+    def test_large_cardinality(self):
+        hll = sk.HyperLogLog(0.01)
+        hll.update(pd.Series(np.arange(200000)))
+        assert hll.estimate() == pytest.approx(200000, rel=0.03)
+
+        hll = sk.HyperLogLog(0.01)
+        hll.update(pd.Series(np.arange(10**18, 10**18 + 100000)))
+        assert hll.estimate() == pytest.approx(100000, rel=0.03)
+
+    def test_merge(self):
+        a = sk.HyperLogLog(0.02)
+        b = sk.HyperLogLog(0.02)
+        a.update(pd.Series(np.arange(0, 60000)))
+        b.update(pd.Series(np.arange(40000, 100000)))
+        assert a.merge(b).estimate() == pytest.approx(100000, rel=0.06)
+
+        with pytest.raises(ValueError, match="different precisions"):
+            a.merge(sk.HyperLogLog(0.1))
+
+
+class TestCountMinSketch:
+    def test_basics(self):
+        cms = sk.CountMinSketch(width=256)
+        values = pd.Series(["a", "b", "c"])
+        cms.update_hashes(sk.hash_values(values), np.array([5, 2, 1]))
+        estimates = cms.query_hashes(sk.hash_values(values))
+        assert list(estimates) == [5, 2, 1]
+
+    def test_merge(self):
+        a = sk.CountMinSketch(width=256)
+        b = sk.CountMinSketch(width=256)
+        h = sk.hash_values(pd.Series(["a"]))
+        a.update_hashes(h)
+        b.update_hashes(h, np.array([3]))
+        assert list(a.merge(b).query_hashes(h)) == [4]
+
+        with pytest.raises(ValueError, match="different shapes"):
+            a.merge(sk.CountMinSketch(width=128))
+
+
+class TestMisraGries:
+    def test_basics(self):
+        mg = sk.MisraGries(2)
+        mg.update(["a", "b", "c", "d"], [10, 6, 1, 1])
+        assert [v for v, _ in mg.most_common()] == ["a", "b"]
+        assert mg.most_common(1) == [("a", 9)]
+
+    def test_merge(self):
+        a = sk.MisraGries(2)
+        b = sk.MisraGries(2)
+        a.update(["a", "b"], [5, 1])
+        b.update(["c", "a"], [4, 2])
+        assert a.merge(b).most_common(1)[0][0] == "a"
+
+
+class TestFrameProfile:
+    def test_update_and_merge(self):
+        df = pd.DataFrame(
+            dict(
+                a=["x", "y", "x", nan, "x", "z"],
+                b=[1, 2, 3, 4, 5, 6],
+                c=[[1], [2], [1], nan, "w", "w"],
+            )
+        )
+        whole = sk.FrameProfile(top_k=2)
+        whole.update(df)
+        first = sk.FrameProfile(top_k=2)
+        first.update(df.iloc[:3])
+        second = sk.FrameProfile(top_k=2)
+        second.update(df.iloc[3:])
+        merged = first.merge(second)
+        pd.testing.assert_frame_equal(merged.to_metadata(), whole.to_metadata())
+
+        md = whole.to_metadata().set_index("transmutation")
+        assert list(md["a"][:4]) == [5, 3, 1, "nan(0.17),str(0.83)"]
+        assert md.loc["top_values", "a"] == "x(3),y(1)"
+        assert md.loc["min_values", "b"] == 1
+        assert md.loc["max_values", "b"] == 6
+        assert md.loc["max_lengths", "a"] == 1
+        assert md.loc["collect_data_types", "c"] == "list(0.5),nan(0.17),str(0.33)"
+        assert md.loc["count_uniques", "c"] == 3
+
+    def test_categorical_and_mixed(self):
+        df = pd.DataFrame(
+            dict(
+                a=pd.Categorical(["x", "y", "x", "y"]),
+                b=pd.Categorical(
+                    ["lo", "lo", "hi", "lo"], categories=["lo", "hi"], ordered=True
+                ),
+                c=[1, "1", 1, 1.0],
+            )
+        )
+        whole = sk.FrameProfile()
+        whole.update(df)
+        first = sk.FrameProfile()
+        first.update(df.iloc[:2])
+        second = sk.FrameProfile()
+        second.update(df.iloc[2:])
+        merged = first.merge(second)
+        pd.testing.assert_frame_equal(merged.to_metadata(), whole.to_metadata())
+
+        md = whole.to_metadata().set_index("transmutation")
+        # Unordered categories have no extremes, ordered ones use their order:
+        assert md.loc["min_values", "a"] is None
+        assert md.loc["max_values", "a"] is None
+        assert md.loc["min_values", "b"] == "lo"
+        assert md.loc["max_values", "b"] == "hi"
+        # Values are counted by value, so 1 and "1" are counted apart:
+        assert md.loc["count_uniques", "c"] == 2
+        assert md.loc["top_values", "c"] == "1(3),1(1)"
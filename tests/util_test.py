@@ -6,8 +6,10 @@ import pandas as pd
 import numpy as np
 from numpy import nan
 
+import datagenius.genius  # noqa: F401
 import datagenius.util as u
 import datagenius.element as e
+from datagenius.tms_registry import TMS
 
 
 def test_transmutation():
@@ -51,6 +53,31 @@ def test_align_args():
 
     assert u.align_args(_func, dict(x=1, y=2, z=3)) == dict(x=1, y=2, z=3)
 
+    # Missing args fall back to their defaults:
+    @u.transmutation
+    def _func2(x, y, z=" "):
+        return x, y, z
+
+    assert u.align_args(_func2, dict(x=1)) == dict(x=1, y=None, z=" ")
+
+
+def test_align_args_registered_transmutations():
+    # Filling in defaults only changes the args of transmutations with
+    # non-None defaults. All others are aligned exactly as before:
+    changed = dict()
+    for tms in TMS.values():
+        for tm in [t for t in tms if t.__module__.startswith("datagenius.")]:
+            before = {k: None for k in tm.args if k != "df"}
+            after = u.align_args(tm, dict(), "df")
+            diff = {k: v for k, v in after.items() if v != before[k]}
+            if diff:
+                changed[tm.__name__] = diff
+    assert changed == dict(
+        discover_dependencies=dict(dependency_sample=10000),
+        profile_columns=dict(profile_top_k=5, uniques_error=0.01),
+        accrete=dict(accretion_sep=" "),
+    )
+
 
 def test_broadcast_suffix():
     assert u.broadcast_suffix(["x", "y", "z"], "_1") == ["x_1", "y_1", "z_1"]
@@ -112,6 +139,15 @@ def test_gen_empty_md_df():
     pd.testing.assert_frame_equal(u.gen_empty_md_df(["a", "b", "c"], "x"), expected)
 
 
+def test_get_arg_defaults():
+    @u.transmutation
+    def _func(x, y=1, z=None):
+        return x, y, z
+
+    assert u.get_arg_defaults(_func) == dict(y=1, z=None)
+    assert u.get_arg_defaults(lambda x: x) == dict()
+
+
 def test_get_class_name():
     assert u.get_class_name("string") == "str"
     assert u.get_class_name(123) == "int"
@@ -206,6 +242,18 @@ def test_standardize_header():
     assert u.standardize_header(header) == (["0", "1"], list(header))
 
 
+def test_stringify_unhashable():
+    s = pd.Series([1, "a", [1, 2], nan])
+    result = u.stringify_unhashable(s)
+    assert list(result[:3]) == [1, "a", "[1, 2]"]
+    assert pd.isna(result[3])
+    # Original Series is untouched:
+    assert s[2] == [1, 2]
+
+    s = pd.Series(["a", "b"])
+    assert u.stringify_unhashable(s) is s
+
+
 def test_translate_null():
     assert pd.isna(u.translate_null(None))
     assert pd.isna(u.translate_null(nan))